@@ -3,6 +3,7 @@ Simplified chat.py using direct function imports
 """
 import os
 import logging
+import time
 from typing import List, Dict, Any, Optional, AsyncGenerator
 import json
 from pydantic import BaseModel, Field
@@ -21,7 +22,7 @@ from workflows import (
     ResumeGenerationWorkflow,
     GenerateReachoutWorkflow
 )
-from config import get_openai_tools, execute_function, get_user_required_functions
+from functions import get_openai_tools, execute_function, get_user_required_functions
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,37 @@ logger = logging.getLogger(__name__)
 litellm.drop_params = True
 litellm.set_verbose = False
 
+# Routes handled by a workflow
+ROUTE_WORKFLOWS = {
+    "PROFILE_ANALYSIS": ProfileAnalysisWorkflow,
+    "PROFILE_GAP_ANALYSIS": GapProfileWorkflow,
+    "JOB_GAP_ANALYSIS": JobGapWorkflow,
+    "RESUME_GENERATION": ResumeGenerationWorkflow,
+    "GENERATE_REACHOUT": GenerateReachoutWorkflow
+}
+
+# Session name of each route's workflow, for clearing the user's other workflows
+ROUTE_WORKFLOW_NAMES = {
+    "PROFILE_ANALYSIS": "profile_analysis",
+    "PROFILE_GAP_ANALYSIS": "gap_analysis_profile",
+    "JOB_GAP_ANALYSIS": "gap_analysis_job",
+    "RESUME_GENERATION": "resume_generation",
+    "GENERATE_REACHOUT": "generate_reachout"
+}
+
+# Pseudo-route for a message that cleared the user's workflows with an escape phrase
+ESCAPED_ROUTE = "ESCAPED"
+
+ESCAPE_MESSAGE = (
+    "✅ **Workflow cleared!** I've reset our conversation and cleared any ongoing workflows. "
+    "What would you like to do next? I can help you with:\n\n"
+    "• **Profile analysis** - Analyze your professional background\n"
+    "• **Gap analysis** - Compare your profile to job requirements\n" 
+    "• **Resume generation** - Create tailored resumes\n"
+    "• **General questions** - Ask me anything!\n\n"
+    "Just let me know how I can assist you."
+)
+
 # Configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
@@ -45,6 +77,7 @@ class ChatCompletionRequest(BaseModel):
     temperature: Optional[float] = Field(default=0.7, ge=0, le=2, description="Sampling temperature")
     max_tokens: Optional[int] = Field(default=1000, ge=1, description="Maximum tokens to generate")
     stream: Optional[bool] = Field(default=False, description="Whether to stream the response")
+    job_posting_id: Optional[int] = Field(default=None, description="Job posting for job-specific workflows (defaults to the most recently saved one)")
 
 class ChatCompletionResponse(BaseModel):
     id: str
@@ -79,7 +112,23 @@ async def _build_user_context(current_user, session) -> Dict[str, Any]:
     
     return context
 
-async def _handle_workflow_response(workflow, request: ChatCompletionRequest, session, current_user) -> Dict[str, Any]:
+def _workflow_context(route: str, request: ChatCompletionRequest) -> Dict[str, Any]:
+    """Extra context a routed workflow needs from the request"""
+    if route in ("JOB_GAP_ANALYSIS", "RESUME_GENERATION"):
+        return {"job_posting_id": request.job_posting_id}
+    return {}
+
+def _workflow_metadata(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Workflow state exposed to the client alongside the response"""
+    return {
+        "workflow_name": result.get("workflow_name"),
+        "workflow_complete": result.get("workflow_complete", False),
+        "current_step": result.get("current_step"),
+        **result.get("metadata", {})  # Flatten metadata to top level
+    }
+
+async def _handle_workflow_response(workflow, request: ChatCompletionRequest, session, current_user,
+                                    context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Handle response from a workflow"""
     latest_message = request.messages[-1].content
     
@@ -87,10 +136,9 @@ async def _handle_workflow_response(workflow, request: ChatCompletionRequest, se
         user_message=latest_message,
         user_id=current_user.id if current_user else 0,
         session=session,
-        context={}
+        context=context or {}
     )
     
-    import time
     return {
         "id": f"chatcmpl-workflow-{int(time.time())}",
         "object": "chat.completion",
@@ -111,14 +159,56 @@ async def _handle_workflow_response(workflow, request: ChatCompletionRequest, se
             "prompt_tokens": sum(len(msg.content.split()) for msg in request.messages),
             "total_tokens": len(result["response"].split()) + sum(len(msg.content.split()) for msg in request.messages)
         },
-        "workflow_metadata": {
-            "workflow_name": result.get("workflow_name"),
-            "workflow_complete": result.get("workflow_complete", False),
-            "current_step": result.get("current_step"),
-            **result.get("metadata", {})  # Flatten metadata to top level
-        }
+        "workflow_metadata": _workflow_metadata(result)
     }
 
+async def _stream_workflow_response(workflow, request: ChatCompletionRequest, session, current_user,
+                                    context: Optional[Dict[str, Any]] = None) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Stream a workflow turn as chat.completion.chunk dicts
+    
+    Generated text arrives as content deltas while the workflow's nodes run; step
+    and reset events are passed through as ``workflow_event`` on empty deltas, and
+    the final chunk carries ``workflow_metadata``.
+    """
+    completion_id = f"chatcmpl-workflow-{int(time.time())}"
+    created = int(time.time())
+    
+    def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra) -> Dict[str, Any]:
+        return {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": request.model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            **extra
+        }
+    
+    yield chunk({"role": "assistant"})
+    streamed: List[str] = []
+    
+    async for event in workflow.stream_message(
+        user_message=request.messages[-1].content,
+        user_id=current_user.id if current_user else 0,
+        session=session,
+        context=context or {}
+    ):
+        if event["type"] == "token":
+            streamed.append(event["content"])
+            yield chunk({"content": event["content"]})
+        elif event["type"] == "result":
+            result = event["result"]
+            # Nodes that don't stream (or a failed turn) deliver their response in one piece
+            if "".join(streamed) != result["response"]:
+                if streamed:
+                    yield chunk({}, workflow_event={"type": "reset"})
+                yield chunk({"content": result["response"]})
+            yield chunk({}, finish_reason="stop", workflow_metadata=_workflow_metadata(result))
+        else:
+            if event["type"] == "reset":
+                streamed.clear()
+            yield chunk({}, workflow_event=event)
+
 async def _handle_direct_response(request: ChatCompletionRequest, session, current_user) -> Dict[str, Any]:
     """Handle direct response without workflow"""
     
@@ -154,7 +244,6 @@ Beyond these individual tools, I can also guide you through comprehensive workfl
 
 **How to use:** Simply describe what you need help with, and I'll automatically use the appropriate tools and workflows to assist you!"""
 
-        import time
         return {
             "id": f"chatcmpl-tools-{int(time.time())}",
             "object": "chat.completion",
@@ -261,17 +350,7 @@ Beyond these individual tools, I can also guide you through comprehensive workfl
 
 async def _handle_escape_response(request: ChatCompletionRequest, session, current_user) -> Dict[str, Any]:
     """Handle escape response with helpful feedback"""
-    import time
-    
-    escape_message = (
-        "✅ **Workflow cleared!** I've reset our conversation and cleared any ongoing workflows. "
-        "What would you like to do next? I can help you with:\n\n"
-        "• **Profile analysis** - Analyze your professional background\n"
-        "• **Gap analysis** - Compare your profile to job requirements\n" 
-        "• **Resume generation** - Create tailored resumes\n"
-        "• **General questions** - Ask me anything!\n\n"
-        "Just let me know how I can assist you."
-    )
+    escape_message = ESCAPE_MESSAGE
     
     return {
         "id": f"chatcmpl-escape-{int(time.time())}",
@@ -295,20 +374,17 @@ async def _handle_escape_response(request: ChatCompletionRequest, session, curre
         }
     }
 
-async def create_chat_completion(
-    request: ChatCompletionRequest,
-    session=None,
-    current_user=None
-) -> ChatCompletionResponse:
-    """Create a chat completion using simple function approach"""
-    
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY is not configured")
+async def _resolve_route(request: ChatCompletionRequest, session, current_user) -> str:
+    """
+    Route the latest user message and tidy up the user's workflow sessions to match
     
+    Returns:
+        A router route, or ESCAPED_ROUTE if an escape phrase cleared active workflows
+    """
     # Get the latest user message
     user_messages = [msg for msg in request.messages if msg.role == "user"]
     if not user_messages:
-        return await _handle_direct_response(request, session, current_user)
+        return "DIRECT_RESPONSE"
     
     latest_message = user_messages[-1].content
     
@@ -335,20 +411,6 @@ async def create_chat_completion(
     
     # Import workflows to check for escape phrases and manage sessions
     from workflows.base_workflow import BaseWorkflow
-    from workflows.profile_analysis_workflow import ProfileAnalysisWorkflow
-    from workflows.gap_profile_workflow import GapProfileWorkflow
-    from workflows.gap_job_workflow import JobGapWorkflow
-    from workflows.resume_generation_workflow import ResumeGenerationWorkflow
-    from workflows.generate_reachout_workflow import GenerateReachoutWorkflow
-    
-    # Map routes to workflow names for session management
-    ROUTE_TO_WORKFLOW_NAME = {
-        "PROFILE_ANALYSIS": "profile_analysis",
-        "PROFILE_GAP_ANALYSIS": "gap_analysis_profile",
-        "JOB_GAP_ANALYSIS": "gap_analysis_job",
-        "RESUME_GENERATION": "resume_generation",
-        "GENERATE_REACHOUT": "generate_reachout"
-    }
     
     # Check if user wants to escape any existing workflow
     should_escape = any(phrase in latest_message.lower() for phrase in BaseWorkflow.ESCAPE_PHRASES)
@@ -356,106 +418,86 @@ async def create_chat_completion(
     if should_escape:
         logger.info(f"User triggered escape phrase, clearing all workflow sessions for user {user_id}")
         # Clear all workflow sessions for this user
-        sessions_to_clear = [key for key in BaseWorkflow._global_workflow_sessions.keys() 
-                           if key.startswith(f"user_{user_id}_")]
-        for session_key in sessions_to_clear:
-            del BaseWorkflow._global_workflow_sessions[session_key]
+        sessions_to_clear = await BaseWorkflow.clear_user_sessions(user_id)
         
-        # If user explicitly wanted to escape, give them confirmation and route to direct response
+        # If user explicitly wanted to escape, give them confirmation instead of routing
         if sessions_to_clear:
             logger.info(f"Cleared {len(sessions_to_clear)} workflow sessions for user escape")
-            # Override route to direct response with a helpful message
-            return await _handle_escape_response(request, session, current_user)
+            return ESCAPED_ROUTE
     
     # Option 1: Respect router decisions - clear incompatible sessions
-    if route != "DIRECT_RESPONSE" and not should_escape:
-        routed_workflow_name = ROUTE_TO_WORKFLOW_NAME.get(route)
-        if routed_workflow_name:
-            # Check for existing sessions from different workflows
-            existing_workflow_sessions = [key for key in BaseWorkflow._global_workflow_sessions.keys() 
-                                        if key.startswith(f"user_{user_id}_") and not key.endswith(f"_{routed_workflow_name}")]
-            
-            if existing_workflow_sessions:
-                logger.info(f"Router decided on {route}, but found existing sessions: {existing_workflow_sessions}")
-                logger.info(f"Clearing incompatible sessions to respect router decision")
-                # Clear sessions from different workflows
-                for session_key in existing_workflow_sessions:
-                    del BaseWorkflow._global_workflow_sessions[session_key]
-    
-    # Handle based on route
-    if route == "DIRECT_RESPONSE":
-        # Clear all workflow sessions when going to direct response
-        sessions_to_clear = [key for key in BaseWorkflow._global_workflow_sessions.keys() 
-                           if key.startswith(f"user_{user_id}_")]
-        for session_key in sessions_to_clear:
-            del BaseWorkflow._global_workflow_sessions[session_key]
-        return await _handle_direct_response(request, session, current_user)
-    elif route == "PROFILE_ANALYSIS":
-        workflow = ProfileAnalysisWorkflow()
-        return await _handle_workflow_response(workflow, request, session, current_user)
-    elif route == "PROFILE_GAP_ANALYSIS":
-        workflow = GapProfileWorkflow()
-        return await _handle_workflow_response(workflow, request, session, current_user)
-    elif route == "JOB_GAP_ANALYSIS":
-        # For job gap analysis, we need to pass job_posting_id in context
-        context = {"job_posting_id": user_context.get("job_posting_id", 1)}  # Default to job ID 1 for demo
-        workflow = JobGapWorkflow()
-        result = await workflow.process_message(
-            user_message=request.messages[-1].content,
-            user_id=current_user.id if current_user else 0,
-            session=session,
-            context=context
-        )
+    if route in ROUTE_WORKFLOWS and not should_escape:
+        routed_workflow_name = ROUTE_WORKFLOW_NAMES[route]
+        # Clear sessions from different workflows to respect router decision
+        cleared_workflows = await BaseWorkflow.clear_user_sessions(user_id, keep=routed_workflow_name)
         
-        import time
-        return {
-            "id": f"chatcmpl-workflow-{int(time.time())}",
-            "object": "chat.completion",
-            "created": int(time.time()),
-            "model": request.model,
-            "choices": [{
-                "finish_reason": "stop",
-                "index": 0,
-                "message": {
-                    "content": result["response"],
-                    "role": "assistant",
-                    "tool_calls": None,
-                    "function_call": None
-                }
-            }],
-            "usage": {
-                "completion_tokens": len(result["response"].split()),
-                "prompt_tokens": sum(len(msg.content.split()) for msg in request.messages),
-                "total_tokens": len(result["response"].split()) + sum(len(msg.content.split()) for msg in request.messages)
-            },
-            "workflow_metadata": {
-                "workflow_name": result.get("workflow_name"),
-                "workflow_complete": result.get("workflow_complete", False),
-                "current_step": result.get("current_step"),
-                **result.get("metadata", {})
-            }
-        }
-    elif route == "RESUME_GENERATION":
-        workflow = ResumeGenerationWorkflow()
-        return await _handle_workflow_response(workflow, request, session, current_user)
-    elif route == "GENERATE_REACHOUT":
-        workflow = GenerateReachoutWorkflow()
-        return await _handle_workflow_response(workflow, request, session, current_user)
+        if cleared_workflows:
+            logger.info(f"Router decided on {route}, cleared incompatible sessions: {cleared_workflows}")
+    elif route == "DIRECT_RESPONSE":
+        # Clear all workflow sessions when going to direct response
+        await BaseWorkflow.clear_user_sessions(user_id)
     else:
         logger.warning(f"Unknown route {route}, falling back to direct response")
+    
+    return route
+
+async def create_chat_completion(
+    request: ChatCompletionRequest,
+    session=None,
+    current_user=None
+) -> ChatCompletionResponse:
+    """Create a chat completion using simple function approach"""
+    
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY is not configured")
+    
+    route = await _resolve_route(request, session, current_user)
+    
+    if route == ESCAPED_ROUTE:
+        return await _handle_escape_response(request, session, current_user)
+    
+    workflow_class = ROUTE_WORKFLOWS.get(route)
+    if workflow_class is None:
         return await _handle_direct_response(request, session, current_user)
+    
+    return await _handle_workflow_response(
+        workflow_class(), request, session, current_user, context=_workflow_context(route, request)
+    )
 
 async def create_chat_completion_stream(
     request: ChatCompletionRequest,
     session=None,
     current_user=None
 ) -> AsyncGenerator[Dict[str, Any], None]:
-    """Create a streaming chat completion"""
+    """Create a streaming chat completion, streaming workflow output as it is generated"""
     
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY is not configured")
     
-    # For now, streaming doesn't use workflows
+    route = await _resolve_route(request, session, current_user)
+    
+    if route == ESCAPED_ROUTE:
+        yield {
+            "id": f"chatcmpl-escape-{int(time.time())}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.model,
+            "choices": [{
+                "index": 0,
+                "delta": {"role": "assistant", "content": ESCAPE_MESSAGE},
+                "finish_reason": "stop"
+            }]
+        }
+        return
+    
+    workflow_class = ROUTE_WORKFLOWS.get(route)
+    if workflow_class is not None:
+        async for chunk in _stream_workflow_response(
+            workflow_class(), request, session, current_user, context=_workflow_context(route, request)
+        ):
+            yield chunk
+        return
+    
     # Convert messages to liteLLM format
     messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
     
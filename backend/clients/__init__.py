@@ -1,75 +1,181 @@
 """
 Clients package for external API integrations
+
+Clients are created on first use and creating them makes no network calls, so
+importing the package never blocks. start_client_probes() (run from the app
+lifespan) checks the external services in the background, re-checks them
+periodically and recreates a client whose service stopped answering; the
+results are reported by get_client_status().
 """
+import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Any, Dict, Optional
 from .dify_client import DifyClient
 from .s3_client import S3Client
 
 logger = logging.getLogger(__name__)
 
-# Global client instances
+# Global client instances, created by the getters
 resume_parser_client: Optional[DifyClient] = None
 s3_client: Optional[S3Client] = None
 
-def initialize_clients():
-    """Initialize global client instances with configuration"""
-    global resume_parser_client, s3_client
-    
+# Latest probe result per client
+_status: Dict[str, Dict[str, Any]] = {}
+_probe_task: Optional[asyncio.Task] = None
+
+
+def _create_dify_client() -> Optional[DifyClient]:
     # Import config here to avoid circular imports
     from config import (
-        DIFY_RESUME_PARSE_API_KEY, 
+        DIFY_RESUME_PARSE_API_KEY,
         DIFY_API_BASE_URL,
+        DIFY_MAX_CONNECTIONS,
+        DIFY_MAX_KEEPALIVE_CONNECTIONS,
+        DIFY_KEEPALIVE_EXPIRY_SECONDS,
+        DIFY_CONNECT_TIMEOUT_SECONDS,
+        DIFY_READ_TIMEOUT_SECONDS,
+        DIFY_HTTP2
+    )
+
+    if not DIFY_RESUME_PARSE_API_KEY:
+        return None
+    return DifyClient(
+        api_key=DIFY_RESUME_PARSE_API_KEY,
+        base_url=DIFY_API_BASE_URL,
+        max_connections=DIFY_MAX_CONNECTIONS,
+        max_keepalive_connections=DIFY_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=DIFY_KEEPALIVE_EXPIRY_SECONDS,
+        connect_timeout=DIFY_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=DIFY_READ_TIMEOUT_SECONDS,
+        http2=DIFY_HTTP2
+    )
+
+
+def _create_s3_client() -> Optional[S3Client]:
+    from config import (
         AWS_ACCESS_KEY_ID,
-        AWS_SECRET_ACCESS_KEY, 
+        AWS_SECRET_ACCESS_KEY,
         AWS_REGION,
-        S3_BUCKET_NAME
+        S3_BUCKET_NAME,
+        S3_ENDPOINT_URL,
+        S3_MAX_WORKERS,
+        S3_MULTIPART_THRESHOLD,
+        S3_MULTIPART_CHUNK_SIZE,
+        S3_MULTIPART_CONCURRENCY
     )
-    
-    # Initialize resume parser client if configured
-    if DIFY_RESUME_PARSE_API_KEY:
-        try:
-            resume_parser_client = DifyClient(
-                api_key=DIFY_RESUME_PARSE_API_KEY,
-                base_url=DIFY_API_BASE_URL
-            )
-            logger.info("✅ Resume parser client initialized successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize resume parser client: {e}")
-            resume_parser_client = None
-    else:
-        logger.warning("⚠️ Resume parser client not initialized - DIFY_RESUME_PARSE_API_KEY not configured")
-    
-    # Initialize S3 client if configured
-    if all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, S3_BUCKET_NAME]):
-        try:
-            s3_client = S3Client(
-                access_key_id=AWS_ACCESS_KEY_ID,
-                secret_access_key=AWS_SECRET_ACCESS_KEY,
-                region=AWS_REGION,
-                bucket_name=S3_BUCKET_NAME
-            )
-            logger.info("✅ S3 client initialized successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize S3 client: {e}")
-            s3_client = None
-    else:
-        logger.warning("⚠️ S3 client not initialized - AWS credentials not configured")
+
+    if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, S3_BUCKET_NAME]):
+        return None
+    return S3Client(
+        access_key_id=AWS_ACCESS_KEY_ID,
+        secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region=AWS_REGION,
+        bucket_name=S3_BUCKET_NAME,
+        max_workers=S3_MAX_WORKERS,
+        multipart_threshold=S3_MULTIPART_THRESHOLD,
+        multipart_chunk_size=S3_MULTIPART_CHUNK_SIZE,
+        multipart_concurrency=S3_MULTIPART_CONCURRENCY,
+        endpoint_url=S3_ENDPOINT_URL
+    )
+
 
 def get_dify_resume_parser_client() -> Optional[DifyClient]:
-    """Get the global Dify resume parser client instance"""
+    """Get the global Dify resume parser client instance, creating it on first use"""
+    global resume_parser_client
     if resume_parser_client is None:
-        logger.error("Dify resume parser client is not initialized")
+        resume_parser_client = _create_dify_client()
+        if resume_parser_client is None:
+            logger.error("Dify resume parser client is not configured - DIFY_RESUME_PARSE_API_KEY is missing")
     return resume_parser_client
 
+
 def get_s3_client() -> Optional[S3Client]:
-    """Get the global S3 client instance"""
+    """Get the global S3 client instance, creating it on first use"""
+    global s3_client
     if s3_client is None:
-        logger.error("S3 client is not initialized")
+        s3_client = _create_s3_client()
+        if s3_client is None:
+            logger.error("S3 client is not configured - AWS credentials are missing")
     return s3_client
 
-# Initialize clients when module is imported
-try:
-    initialize_clients()
-except Exception as e:
-    logger.error(f"Failed to initialize clients during import: {e}") 
\ No newline at end of file
+
+async def probe_s3(timeout: float) -> Dict[str, Any]:
+    """Check the S3 bucket; a client that fails the check is replaced on the next get_s3_client()"""
+    global s3_client
+    if s3_client is None:
+        s3_client = _create_s3_client()
+    client = s3_client
+    if client is None:
+        _status["s3"] = {"configured": False, "ready": False}
+        return _status["s3"]
+
+    status: Dict[str, Any] = {"configured": True, "checked_at": time.time()}
+    try:
+        await asyncio.wait_for(client.check_bucket(), timeout)
+        status.update(ready=True, error=None)
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        status.update(ready=False, error=error)
+        if _status.get("s3", {}).get("ready", True):
+            logger.error(f"❌ S3 probe failed: {error}")
+        # Reconnect with a fresh client (new connection pool) next time. The old one
+        # isn't closed, as requests may still hold it; its threads exit once it is unreferenced.
+        if s3_client is client:
+            s3_client = None
+    else:
+        if not _status.get("s3", {}).get("ready"):
+            logger.info("✅ S3 client ready")
+    _status["s3"] = status
+    return status
+
+
+async def probe_clients(timeout: float) -> Dict[str, Dict[str, Any]]:
+    """Probe every client once and record the results"""
+    await probe_s3(timeout)
+    # Dify has no cheap health endpoint; it is ready once configured
+    configured = get_dify_resume_parser_client() is not None
+    _status["dify"] = {"configured": configured, "ready": configured}
+    return get_client_status()
+
+
+async def _probe_loop(interval: float, timeout: float) -> None:
+    while True:
+        try:
+            await probe_clients(timeout)
+        except Exception as e:
+            logger.error(f"Client probe failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_client_probes(interval: float = 60.0, timeout: float = 5.0) -> None:
+    """Start probing the clients in the background (the first probe runs right away)"""
+    global _probe_task
+    if _probe_task is None or _probe_task.done():
+        _probe_task = asyncio.create_task(_probe_loop(interval, timeout))
+
+
+def get_client_status() -> Dict[str, Dict[str, Any]]:
+    """Latest probe result per client ("ready" is False until a probe has passed)"""
+    return {
+        name: dict(_status.get(name, {"ready": False, "checked_at": None}))
+        for name in ("s3", "dify")
+    }
+
+
+async def close_clients():
+    """Stop the probes and release resources held by the global clients (S3 threads, Dify connections)"""
+    global _probe_task, s3_client, resume_parser_client
+    if _probe_task is not None:
+        _probe_task.cancel()
+        try:
+            await _probe_task
+        except asyncio.CancelledError:
+            pass
+        _probe_task = None
+    if s3_client is not None:
+        s3_client.close()
+        s3_client = None
+    if resume_parser_client is not None:
+        await resume_parser_client.aclose()
+        resume_parser_client = None
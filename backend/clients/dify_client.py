@@ -1,12 +1,22 @@
 """
 Dify API client for chat completion
 Provides configurable client class to interact with Dify's chat API
+
+One pooled httpx client is kept for the DifyClient's lifetime, so requests reuse
+keep-alive connections (multiplexed over HTTP/2 when the h2 package is
+installed) instead of paying DNS, TCP and TLS setup on every call.
 """
 import logging
 from typing import List, Dict, Any, Optional, AsyncGenerator
 import httpx
 from pydantic import BaseModel, Field
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 # Pydantic models for Dify API
@@ -30,13 +40,27 @@ class DifyChatRequest(BaseModel):
 class DifyClient:
     """Configurable client for interacting with Dify API"""
     
-    def __init__(self, api_key: str, base_url: str = "https://api.dify.ai/v1"):
+    def __init__(self,
+                 api_key: str,
+                 base_url: str = "https://api.dify.ai/v1",
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 60.0,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 120.0,
+                 http2: bool = True):
         """
         Initialize Dify client with API key and base URL
         
         Args:
             api_key: Dify API key
             base_url: Dify API base URL (default: https://api.dify.ai/v1)
+            max_connections: Most connections open to Dify at once
+            max_keepalive_connections: Idle connections kept for reuse
+            keepalive_expiry: Seconds an idle connection is kept
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait for response data (parses can be slow)
+            http2: Use HTTP/2 when the h2 package is installed
         """
         if not api_key:
             raise ValueError("API key is required")
@@ -47,6 +71,34 @@ class DifyClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("h2 is not installed - Dify client falls back to HTTP/1.1")
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared HTTP client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def send_chat_message(self, request: DifyChatRequest) -> Dict[str, Any]:
         """Send a chat message to Dify API"""
@@ -55,58 +107,54 @@ class DifyClient:
         # Use the response_mode from the request
         request_data = request.model_dump(exclude_none=True)
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            try:
-                response = await client.post(
-                    url,
-                    headers=self.headers,
-                    json=request_data
-                )
-                response.raise_for_status()
-                return response.json()
-                
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Dify API HTTP error: {e.response.status_code}")
-                raise e
-            except httpx.RequestError as e:
-                logger.error(f"Dify API request error: {str(e)}")
-                raise e
-            except Exception as e:
-                logger.error(f"Unexpected error calling Dify API: {str(e)}")
-                raise e
+        try:
+            response = await self.client.post(url, json=request_data)
+            response.raise_for_status()
+            return response.json()
+            
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Dify API HTTP error: {e.response.status_code}")
+            raise e
+        except httpx.RequestError as e:
+            logger.error(f"Dify API request error: {str(e)}")
+            raise e
+        except Exception as e:
+            logger.error(f"Unexpected error calling Dify API: {str(e)}")
+            raise e
     
-    async def send_chat_message_stream(self, request: DifyChatRequest) -> AsyncGenerator[str, None]:
-        """Send a chat message to Dify API (streaming mode)"""
+    async def send_chat_message_stream(self, request: DifyChatRequest) -> AsyncGenerator[bytes, None]:
+        """
+        Send a chat message to Dify API (streaming mode)
+        
+        Yields the raw response bytes as they arrive, undecoded: a chunk may end
+        partway through a multibyte character or an SSE event. The next chunk is
+        only read once the caller asks for it, and closing the generator closes
+        the upstream response.
+        """
         url = f"{self.base_url}/chat-messages"
         
         # Use the response_mode from the request
         request_data = request.model_dump(exclude_none=True)
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            try:
-                async with client.stream(
-                    "POST",
-                    url,
-                    headers=self.headers,
-                    json=request_data
-                ) as response:
-                    response.raise_for_status()
-                    
-                    async for chunk in response.aiter_bytes():
-                        # Direct proxy - return raw bytes as-is from Dify API
-                        yield chunk.decode('utf-8')
-                                        
-            except httpx.HTTPStatusError as e:
-                # For streaming responses, we can't access response.text directly
-                logger.error(f"Dify API HTTP error: {e.response.status_code}")
-                raise e
-                
-            except httpx.RequestError as e:
-                logger.error(f"Dify API request error: {str(e)}")
-                raise e
+        try:
+            async with self.client.stream("POST", url, json=request_data) as response:
+                response.raise_for_status()
                 
-            except Exception as e:
-                logger.error(f"Unexpected error calling Dify API: {str(e)}")
-                raise e
+                async for chunk in response.aiter_bytes():
+                    # Direct proxy - return raw bytes as-is from Dify API
+                    yield chunk
+                                    
+        except httpx.HTTPStatusError as e:
+            # For streaming responses, we can't access response.text directly
+            logger.error(f"Dify API HTTP error: {e.response.status_code}")
+            raise e
+            
+        except httpx.RequestError as e:
+            logger.error(f"Dify API request error: {str(e)}")
+            raise e
+            
+        except Exception as e:
+            logger.error(f"Unexpected error calling Dify API: {str(e)}")
+            raise e
     
  
\ No newline at end of file
@@ -1,17 +1,30 @@
 """
 AWS S3 client for file upload operations
 Provides configurable client class to interact with AWS S3
+
+boto3 is blocking, so every S3 call runs on the client's own thread pool rather
+than on the event loop. Large uploads go up as multipart uploads with their parts
+sent concurrently.
 """
+import asyncio
+import functools
+import io
 import logging
-from typing import Optional, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, BinaryIO, Tuple, Union
 import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
 import mimetypes
 import os
 from nanoid import generate
 
 logger = logging.getLogger(__name__)
 
+MB = 1024 * 1024
+
 class S3Client:
     """Configurable client for interacting with AWS S3"""
     
@@ -19,7 +32,12 @@ class S3Client:
                  access_key_id: str, 
                  secret_access_key: str, 
                  region: str = "us-east-1",
-                 bucket_name: str = ""):
+                 bucket_name: str = "",
+                 max_workers: int = 8,
+                 multipart_threshold: int = 8 * MB,
+                 multipart_chunk_size: int = 8 * MB,
+                 multipart_concurrency: int = 4,
+                 endpoint_url: Optional[str] = None):
         """
         Initialize S3 client with AWS credentials
         
@@ -28,6 +46,11 @@ class S3Client:
             secret_access_key: AWS Secret Access Key
             region: AWS region (default: us-east-1)
             bucket_name: S3 bucket name
+            max_workers: Threads for blocking S3 calls (concurrent requests)
+            multipart_threshold: Uploads of at least this many bytes use multipart upload
+            multipart_chunk_size: Part size for multipart uploads (S3 minimum is 5MB)
+            multipart_concurrency: Parts of one upload sent at once
+            endpoint_url: S3-compatible endpoint (e.g. MinIO); AWS when not set
         """
         if not access_key_id or not secret_access_key:
             raise ValueError("AWS credentials are required")
@@ -37,89 +60,194 @@ class S3Client:
             
         self.bucket_name = bucket_name
         self.region = region
+        self.endpoint_url = endpoint_url
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunk_size,
+            max_concurrency=multipart_concurrency
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3")
         
+        # Creating the client makes no network call; check_bucket() probes S3
+        self.s3_client = boto3.client(
+            's3',
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            region_name=region,
+            endpoint_url=endpoint_url,
+            # Enough pooled connections for every worker thread's multipart parts
+            config=Config(max_pool_connections=max_workers * multipart_concurrency)
+        )
+        logger.info(f"S3 client created for bucket: {bucket_name}")
+    
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking boto3 call on the S3 thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def check_bucket(self) -> None:
+        """
+        Check that S3 is reachable and the bucket exists
+        
+        Raises:
+            ValueError: If the credentials are invalid, the bucket does not exist or S3 can't be reached
+        """
         try:
-            self.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=access_key_id,
-                aws_secret_access_key=secret_access_key,
-                region_name=region
-            )
-            
-            # Test connection by checking if bucket exists
-            self.s3_client.head_bucket(Bucket=bucket_name)
-            logger.info(f"S3 client initialized successfully for bucket: {bucket_name}")
-            
+            await self._run(self.s3_client.head_bucket, Bucket=self.bucket_name)
         except NoCredentialsError:
-            logger.error("AWS credentials not found")
             raise ValueError("AWS credentials are invalid")
         except ClientError as e:
             error_code = e.response['Error']['Code']
             if error_code == '404':
-                logger.error(f"S3 bucket '{bucket_name}' not found")
-                raise ValueError(f"S3 bucket '{bucket_name}' does not exist")
-            else:
-                logger.error(f"Failed to initialize S3 client: {e}")
-                raise ValueError(f"Failed to connect to S3: {e}")
+                raise ValueError(f"S3 bucket '{self.bucket_name}' does not exist")
+            raise ValueError(f"Failed to connect to S3: {e}")
+        except BotoCoreError as e:
+            raise ValueError(f"Failed to connect to S3: {e}")
+    
+    def close(self) -> None:
+        """Shut down the S3 thread pool"""
+        self._executor.shutdown(wait=False)
+    
+    def file_url(self, s3_key: str) -> str:
+        """Public URL of an object in the bucket"""
+        if self.endpoint_url:
+            # S3-compatible stores are addressed by path: <endpoint>/<bucket>/<key>
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket_name}/{s3_key}"
+        return f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{s3_key}"
+    
+    @staticmethod
+    def _new_key(file_name: str, folder: str) -> Tuple[str, str]:
+        """A unique S3 key for a file, keeping its extension; returns (s3_key, unique_file_name)"""
+        # Generate unique file name with nanoid (21 characters)
+        unique_file_name = f"{generate()}{os.path.splitext(file_name)[1]}"
+        s3_key = f"{folder}/{unique_file_name}" if folder else unique_file_name
+        return s3_key, unique_file_name
+    
+    @staticmethod
+    def _content_type(file_name: str, content_type: Optional[str]) -> str:
+        """The given MIME type, or one guessed from the file name"""
+        if content_type:
+            return content_type
+        guessed, _ = mimetypes.guess_type(file_name)
+        return guessed or "application/octet-stream"
+    
+    async def create_upload_post(self,
+                                 file_name: str,
+                                 max_bytes: int,
+                                 folder: str = "uploads",
+                                 content_type: Optional[str] = None,
+                                 expires_in: int = 900) -> Dict[str, Any]:
+        """
+        Presigned POST policy for uploading a file straight to the bucket
+        
+        The policy pins the key and content type and limits the size, so the
+        client can only upload that one file. Signing makes no request to S3, but
+        may load credentials, so it runs on the S3 thread pool like other calls.
+        
+        Args:
+            file_name: Original file name
+            max_bytes: Largest accepted file size
+            folder: S3 folder/prefix (default: uploads)
+            content_type: MIME type of the file (auto-detected if not provided)
+            expires_in: Seconds the policy stays valid
+            
+        Returns:
+            Dict with the form "url" and "fields" to POST the file with, and the
+            key and URL the file will have
+        """
+        s3_key, unique_file_name = self._new_key(file_name, folder)
+        content_type = self._content_type(file_name, content_type)
+        
+        post = await self._run(
+            self.s3_client.generate_presigned_post,
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_bytes]
+            ],
+            ExpiresIn=expires_in
+        )
+        
+        return {
+            "url": post["url"],
+            "fields": post["fields"],
+            "file_url": self.file_url(s3_key),
+            "s3_key": s3_key,
+            "bucket": self.bucket_name,
+            "original_name": file_name,
+            "uploaded_name": unique_file_name,
+            "content_type": content_type,
+            "max_file_size": max_bytes,
+            "folder": folder,
+            "expires_in": expires_in
+        }
     
     async def upload_file(self, 
-                         file_content: bytes,
+                         file_content: Union[bytes, BinaryIO],
                          file_name: str,
                          folder: str = "uploads",
-                         content_type: Optional[str] = None) -> Dict[str, Any]:
+                         content_type: Optional[str] = None,
+                         file_size: Optional[int] = None) -> Dict[str, Any]:
         """
         Upload file to S3 bucket
         
+        Files of at least the multipart threshold are uploaded in parts, several at
+        a time; smaller files use a single PUT.
+        
         Args:
-            file_content: File content as bytes
+            file_content: File content as bytes, or a file handle to stream from
             file_name: Original file name
             folder: S3 folder/prefix (default: uploads)
             content_type: MIME type of the file (auto-detected if not provided)
+            file_size: Size of a file handle's content (required when passing a handle)
             
         Returns:
             Dict containing upload result with file URL and metadata
         """
         try:
-            # Generate unique file name with nanoid
-            file_extension = os.path.splitext(file_name)[1]
-            unique_id = generate()  # Generate 21-character nanoid
-            unique_file_name = f"{unique_id}{file_extension}"
+            s3_key, unique_file_name = self._new_key(file_name, folder)
+            content_type = self._content_type(file_name, content_type)
             
-            # Construct S3 key (path)
-            s3_key = f"{folder}/{unique_file_name}" if folder else unique_file_name
-            
-            # Auto-detect content type if not provided
-            if not content_type:
-                content_type, _ = mimetypes.guess_type(file_name)
-                if not content_type:
-                    content_type = "application/octet-stream"
+            if isinstance(file_content, (bytes, bytearray)):
+                if file_size is None:
+                    file_size = len(file_content)
+                file_content = io.BytesIO(file_content)
             
             # Upload file to S3
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_content,
-                ContentType=content_type,
+            started = time.perf_counter()
+            await self._run(
+                self.s3_client.upload_fileobj,
+                file_content,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={"ContentType": content_type},
+                Config=self.transfer_config
             )
+            duration = time.perf_counter() - started
             
-            # Construct file URL
-            file_url = f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{s3_key}"
-            
-            # Get file info
-            file_size = len(file_content)
-            
-            logger.info(f"File uploaded successfully: {s3_key}")
+            throughput = file_size / MB / duration if file_size and duration > 0 else None
+            multipart = bool(file_size) and file_size >= self.transfer_config.multipart_threshold
+            logger.info(
+                f"File uploaded successfully: {s3_key} ({file_size} bytes in {duration:.2f}s"
+                + (f", {throughput:.1f} MB/s" if throughput is not None else "")
+                + (", multipart" if multipart else "") + ")"
+            )
             
             return {
                 "success": True,
-                "file_url": file_url,
+                "file_url": self.file_url(s3_key),
                 "s3_key": s3_key,
                 "bucket": self.bucket_name,
                 "original_name": file_name,
                 "uploaded_name": unique_file_name,
                 "content_type": content_type,
                 "file_size": file_size,
-                "folder": folder
+                "folder": folder,
+                "multipart": multipart,
+                "duration_seconds": round(duration, 3),
+                "throughput_mbps": round(throughput, 2) if throughput is not None else None
             }
             
         except ClientError as e:
@@ -140,7 +268,8 @@ class S3Client:
             Dict containing deletion result
         """
         try:
-            self.s3_client.delete_object(
+            await self._run(
+                self.s3_client.delete_object,
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
@@ -172,16 +301,15 @@ class S3Client:
             Dict containing file metadata
         """
         try:
-            response = self.s3_client.head_object(
+            response = await self._run(
+                self.s3_client.head_object,
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
             
-            file_url = f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{s3_key}"
-            
             return {
                 "success": True,
-                "file_url": file_url,
+                "file_url": self.file_url(s3_key),
                 "s3_key": s3_key,
                 "bucket": self.bucket_name,
                 "content_type": response.get('ContentType'),
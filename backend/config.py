@@ -1,104 +1,12 @@
 """
-Simple configuration using direct function imports
+Simple configuration from environment variables
 """
 import os
-from typing import List, Dict, Any, Callable
-import inspect
-import functions  # Import the functions module
 
 
 # MCP Configuration
 MCP_MOUNT_PATH = "/mcp"
 
-# Simple function mapping - just import and list!
-EXPOSED_FUNCTIONS = [
-    functions.get_database_statistics,
-    functions.get_user_profile,
-    functions.get_user_resumes,
-    functions.identify_profile_gaps,
-    functions.identify_gaps_per_job,
-    functions.get_context,
-]
-
-# Auto-generate function names for MCP
-MCP_OPERATIONS = [func.__name__ for func in EXPOSED_FUNCTIONS]
-
-# Auto-generate OpenAI tool definitions
-def get_openai_tools() -> List[Dict[str, Any]]:
-    """Generate OpenAI tool definitions from function signatures and docstrings"""
-    tools = []
-    
-    for func in EXPOSED_FUNCTIONS:
-        # Get function signature
-        sig = inspect.signature(func)
-        
-        # Build parameters from function signature
-        parameters = {
-            "type": "object",
-            "properties": {},
-            "required": []
-        }
-        
-        for param_name, param in sig.parameters.items():
-            if param_name in ['session', 'kwargs']:  # Skip internal params
-                continue
-                
-            param_info = {"type": "string"}  # Default type
-            
-            # Try to infer type from annotation
-            if param.annotation != inspect.Parameter.empty:
-                if param.annotation == int:
-                    param_info["type"] = "integer"
-                elif param.annotation == bool:
-                    param_info["type"] = "boolean"
-            
-            parameters["properties"][param_name] = param_info
-            
-            # Mark as required if no default value
-            if param.default == inspect.Parameter.empty and param_name != 'user_id':
-                parameters["required"].append(param_name)
-        
-        tools.append({
-            "type": "function",
-            "function": {
-                "name": func.__name__,
-                "description": func.__doc__ or f"Execute {func.__name__}",
-                "parameters": parameters
-            }
-        })
-    
-    return tools
-
-# Function execution helper
-async def execute_function(function_name: str, arguments: Dict[str, Any], session, user_id=None) -> Dict[str, Any]:
-    """Execute a function by name"""
-    # Find the function
-    func = None
-    for f in EXPOSED_FUNCTIONS:
-        if f.__name__ == function_name:
-            func = f
-            break
-    
-    if not func:
-        return {"success": False, "error": f"Unknown function: {function_name}"}
-    
-    try:
-        # Call the function with session, user_id, and arguments
-        result = await func(session=session, user_id=user_id, **arguments)
-        return {"success": True, **result}
-    except Exception as e:
-        return {"success": False, "error": f"Function execution failed: {str(e)}"}
-
-# Function info helper
-def get_user_required_functions() -> List[str]:
-    """Get list of functions that require user_id"""
-    user_functions = []
-    for func in EXPOSED_FUNCTIONS:
-        sig = inspect.signature(func)
-        if 'user_id' in sig.parameters:
-            user_functions.append(func.__name__)
-    return user_functions
-
 # Supabase Configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
@@ -106,12 +14,72 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
 # Dify API Configuration
 DIFY_API_BASE_URL = "https://api.dify.ai/v1"
 DIFY_RESUME_PARSE_API_KEY = os.getenv("DIFY_RESUME_PARSE_API_KEY", "")
+DIFY_MAX_CONNECTIONS = int(os.getenv("DIFY_MAX_CONNECTIONS", "20"))
+DIFY_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("DIFY_MAX_KEEPALIVE_CONNECTIONS", "10"))
+DIFY_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("DIFY_KEEPALIVE_EXPIRY_SECONDS", "60"))
+DIFY_CONNECT_TIMEOUT_SECONDS = float(os.getenv("DIFY_CONNECT_TIMEOUT_SECONDS", "5"))
+DIFY_READ_TIMEOUT_SECONDS = float(os.getenv("DIFY_READ_TIMEOUT_SECONDS", "120"))
+DIFY_HTTP2 = os.getenv("DIFY_HTTP2", "true").lower() == "true"
 
 # AWS S3 Configuration
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID", "")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", "")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None  # S3-compatible storage such as MinIO
+S3_MAX_WORKERS = int(os.getenv("S3_MAX_WORKERS", "8"))
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+S3_MULTIPART_CHUNK_SIZE = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", "4"))
+S3_PRESIGN_EXPIRES_SECONDS = int(os.getenv("S3_PRESIGN_EXPIRES_SECONDS", "900"))  # Direct-upload policy lifetime
+
+# External client health probes (S3), run in the background
+CLIENT_PROBE_INTERVAL_SECONDS = float(os.getenv("CLIENT_PROBE_INTERVAL_SECONDS", "60"))
+CLIENT_PROBE_TIMEOUT_SECONDS = float(os.getenv("CLIENT_PROBE_TIMEOUT_SECONDS", "5"))
+
+# Workflow Session Store Configuration
+WORKFLOW_SESSION_TTL_SECONDS = int(os.getenv("WORKFLOW_SESSION_TTL_SECONDS", "1800"))
+WORKFLOW_SESSION_MAX_SESSIONS = int(os.getenv("WORKFLOW_SESSION_MAX_SESSIONS", "10000"))
+WORKFLOW_SESSION_MAX_MESSAGES = int(os.getenv("WORKFLOW_SESSION_MAX_MESSAGES", "50"))
+
+# Workflow Checkpointer Configuration ("sqlite" locally, "postgres" in production, or "memory")
+WORKFLOW_CHECKPOINTER = os.getenv("WORKFLOW_CHECKPOINTER", "sqlite")
+WORKFLOW_CHECKPOINT_SQLITE_PATH = os.getenv("WORKFLOW_CHECKPOINT_SQLITE_PATH", "workflow_checkpoints.sqlite")
+WORKFLOW_CHECKPOINT_POSTGRES_URL = os.getenv("WORKFLOW_CHECKPOINT_POSTGRES_URL", "")
+
+# Gap Analysis Configuration (ranking is always deterministic; the LLM only rewrites the suggestions when enabled)
+GAP_ADVICE_USE_LLM = os.getenv("GAP_ADVICE_USE_LLM", "false").lower() == "true"
+
+# Resume Generation Configuration (section LLM calls in flight for one resume)
+RESUME_SECTION_CONCURRENCY = int(os.getenv("RESUME_SECTION_CONCURRENCY", "4"))
+
+# Resume Parsing Configuration (processes and backend used for PDF text extraction)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_EXTRACT_BACKEND = os.getenv("PDF_EXTRACT_BACKEND", "pypdf2")  # "pypdf2", "pypdfium2" or "pdfminer"
+
+# Upload Configuration (uploads up to this size stay in memory; larger ones are spooled to disk)
+UPLOAD_SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+
+# Long Resume Configuration (extracted text longer than the threshold is parsed in concurrent chunks)
+RESUME_CHUNK_THRESHOLD_CHARS = int(os.getenv("RESUME_CHUNK_THRESHOLD_CHARS", "12000"))
+RESUME_CHUNK_CHARS = int(os.getenv("RESUME_CHUNK_CHARS", "6000"))
+RESUME_CHUNK_CONCURRENCY = int(os.getenv("RESUME_CHUNK_CONCURRENCY", "4"))
+
+# Resume Batch Parsing Configuration (resumes parsed at once, and limits on one batch after zips are unpacked)
+RESUME_BATCH_CONCURRENCY = int(os.getenv("RESUME_BATCH_CONCURRENCY", "4"))
+RESUME_BATCH_MAX_FILES = int(os.getenv("RESUME_BATCH_MAX_FILES", "100"))
+RESUME_BATCH_MAX_FILE_BYTES = int(os.getenv("RESUME_BATCH_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+RESUME_BATCH_MAX_UPLOAD_BYTES = int(os.getenv("RESUME_BATCH_MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))  # Per uploaded file or zip
+
+# Resume Parse Cache Configuration ("sqlite" on local disk, "memory", or "off")
+RESUME_PARSE_CACHE = os.getenv("RESUME_PARSE_CACHE", "sqlite")
+RESUME_PARSE_CACHE_PATH = os.getenv("RESUME_PARSE_CACHE_PATH", "resume_parse_cache.sqlite")
+RESUME_PARSE_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_PARSE_CACHE_MAX_ENTRIES", "5000"))
+RESUME_PARSE_CACHE_TTL_SECONDS = int(os.getenv("RESUME_PARSE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# Resume Parse Job Queue Configuration (parses running at once, and uploads allowed to wait)
+RESUME_PARSE_WORKERS = int(os.getenv("RESUME_PARSE_WORKERS", "4"))
+RESUME_PARSE_QUEUE_SIZE = int(os.getenv("RESUME_PARSE_QUEUE_SIZE", "100"))
 
 # Application Settings
 APP_TITLE = "Resume Management API"
@@ -4,12 +4,11 @@ Handles resume parsing API endpoints
 """
 import logging
 from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from services.resume_parse_service import parse_resume_from_url
 from services.exceptions import ServiceUnavailableException, ResumeParseException, ExternalAPIException
-from .utils import create_error_response
+from .utils import ClosingStreamingResponse, create_error_response
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +26,8 @@ async def parse_resume_endpoint(request: ResumeParseRequest):
     """
     Parse resume from file URL using Dify API (streaming mode).
     Returns real-time streaming response for better user experience.
+    Dify's SSE bytes are proxied untouched; the next chunk is read from Dify only
+    after the previous one was sent, and a client disconnect closes the Dify request.
     """
     logger.info("POST /resume-parse - file_url=%s", request.file_url)
     
@@ -49,8 +50,10 @@ async def parse_resume_endpoint(request: ResumeParseRequest):
                 logger.error(f"Error during streaming: {str(e)}")
                 # Simply end the stream
                 return
+            finally:
+                await stream_generator.aclose()
         
-        return StreamingResponse(
+        return ClosingStreamingResponse(
             generate_stream(),
             media_type="text/event-stream",
             headers={
@@ -3,14 +3,47 @@ File upload controller
 Handles file upload API endpoints
 """
 import logging
-from fastapi import APIRouter, UploadFile, File
+from typing import Optional
+from fastapi import APIRouter, Depends, UploadFile, File
 from botocore.exceptions import ClientError
+from pydantic import BaseModel, Field
 
+from auth import get_current_user
 from clients import get_s3_client
+from config import S3_PRESIGN_EXPIRES_SECONDS
+from models import User
+from services.exceptions import UploadTooLargeException
+from services.upload_ingest import UPLOAD_MAX_BYTES, ingest_upload
 from .utils import create_error_response
 
 logger = logging.getLogger(__name__)
 
+# S3 prefix for uploaded files
+UPLOAD_FOLDER = "uploads"
+
+
+def _user_upload_folder(user_id: int) -> str:
+    """S3 prefix for a user's direct uploads; /upload/complete only accepts keys under it"""
+    return f"{UPLOAD_FOLDER}/{user_id}"
+
+
+class UploadPresignRequest(BaseModel):
+    filename: str = Field(..., description="Name of the file to upload")
+    content_type: Optional[str] = Field(None, description="MIME type (guessed from the file name if not set)")
+    file_size: Optional[int] = Field(None, description="Size in bytes, checked against the limit up front")
+
+
+class UploadCompleteRequest(BaseModel):
+    s3_key: str = Field(..., description="Key returned by /upload/presign")
+
+
+def _s3_not_configured():
+    return create_error_response(
+        status_code=503,
+        detail="File upload service is not configured. AWS S3 credentials are missing.",
+        code="S3_SERVICE_NOT_CONFIGURED"
+    )
+
 
 # Create router for upload-related endpoints
 upload_router = APIRouter(prefix="", tags=["upload"])
@@ -27,32 +60,28 @@ async def upload_file_endpoint(file: UploadFile = File(...)):
     # Get the global S3 client instance
     s3_client = get_s3_client()
     if not s3_client:
-        return create_error_response(
-            status_code=503,
-            detail="File upload service is not configured. AWS S3 credentials are missing.",
-            code="S3_SERVICE_NOT_CONFIGURED"
-        )
+        return _s3_not_configured()
     
-    # Check file size (limit to 10MB)
-    max_file_size = 10 * 1024 * 1024  # 10MB
-    if file.size and file.size > max_file_size:
+    try:
+        # Read the file in chunks, enforcing the 10MB limit as it arrives
+        upload = await ingest_upload(file, max_bytes=UPLOAD_MAX_BYTES)
+    except UploadTooLargeException:
         return create_error_response(
             status_code=413,
-            detail=f"File too large. Maximum size is {max_file_size // (1024*1024)}MB",
+            detail=f"File too large. Maximum size is {UPLOAD_MAX_BYTES // (1024*1024)}MB",
             code="FILE_TOO_LARGE"
         )
     
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Upload file to S3
-        result = await s3_client.upload_file(
-            file_content=file_content,
-            file_name=file.filename,
-            folder="uploads",
-            content_type=file.content_type
-        )
+        # Stream the spooled file to S3
+        with upload, upload.open() as file_content:
+            result = await s3_client.upload_file(
+                file_content=file_content,
+                file_name=file.filename,
+                folder=UPLOAD_FOLDER,
+                content_type=file.content_type,
+                file_size=upload.size
+            )
         
         return result
         
@@ -78,4 +107,111 @@ async def upload_file_endpoint(file: UploadFile = File(...)):
             status_code=500,
             detail=f"Internal server error: {str(e)}",
             code="INTERNAL_SERVER_ERROR"
-        ) 
\ No newline at end of file
+        )
+
+
+@upload_router.post("/upload/presign", operation_id="create_upload_url")
+async def create_upload_url_endpoint(request: UploadPresignRequest, current_user: User = Depends(get_current_user)):
+    """
+    Issue a presigned POST policy for uploading a file straight to S3.
+    POST the file as multipart form data to "url" with "fields" followed by the
+    file, then call /upload/complete with the returned s3_key.
+    """
+    logger.info("POST /upload/presign - filename=%s, content_type=%s", request.filename, request.content_type)
+    
+    s3_client = get_s3_client()
+    if not s3_client:
+        return _s3_not_configured()
+    
+    if request.file_size is not None and request.file_size > UPLOAD_MAX_BYTES:
+        return create_error_response(
+            status_code=413,
+            detail=f"File too large. Maximum size is {UPLOAD_MAX_BYTES // (1024*1024)}MB",
+            code="FILE_TOO_LARGE"
+        )
+    
+    try:
+        return await s3_client.create_upload_post(
+            file_name=request.filename,
+            max_bytes=UPLOAD_MAX_BYTES,
+            folder=_user_upload_folder(current_user.id),
+            content_type=request.content_type,
+            expires_in=S3_PRESIGN_EXPIRES_SECONDS
+        )
+    except Exception as e:
+        logger.error(f"Failed to create presigned upload: {str(e)}")
+        return create_error_response(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}",
+            code="INTERNAL_SERVER_ERROR"
+        )
+
+
+@upload_router.post("/upload/complete", operation_id="complete_upload")
+async def complete_upload_endpoint(request: UploadCompleteRequest, current_user: User = Depends(get_current_user)):
+    """
+    Confirm a direct upload to S3.
+    Checks the object exists and is within the size limit, and returns its file
+    URL and metadata (the file_url can be passed to /resume-parse).
+    """
+    logger.info("POST /upload/complete - s3_key=%s", request.s3_key)
+    
+    s3_client = get_s3_client()
+    if not s3_client:
+        return _s3_not_configured()
+    
+    # Only keys handed out to this user by /upload/presign can be confirmed
+    folder = _user_upload_folder(current_user.id)
+    if not request.s3_key.startswith(f"{folder}/") or ".." in request.s3_key:
+        return create_error_response(
+            status_code=400,
+            detail="Invalid upload key",
+            code="INVALID_S3_KEY"
+        )
+    
+    try:
+        info = await s3_client.get_file_info(request.s3_key)
+        
+        # The POST policy limits the size already; this guards against objects put there another way
+        if not info["file_size"]:
+            await s3_client.delete_file(request.s3_key)
+            return create_error_response(
+                status_code=400,
+                detail="The uploaded file is empty",
+                code="EMPTY_FILE"
+            )
+        if info["file_size"] > UPLOAD_MAX_BYTES:
+            await s3_client.delete_file(request.s3_key)
+            return create_error_response(
+                status_code=413,
+                detail=f"File too large. Maximum size is {UPLOAD_MAX_BYTES // (1024*1024)}MB",
+                code="FILE_TOO_LARGE"
+            )
+        
+        return {
+            **info,
+            "uploaded_name": request.s3_key.rsplit("/", 1)[-1],
+            "folder": folder
+        }
+        
+    except ClientError as e:
+        error_code = e.response.get('Error', {}).get('Code', 'Unknown')
+        if error_code in ('404', 'NoSuchKey'):
+            return create_error_response(
+                status_code=404,
+                detail="Upload not found. The file was not uploaded or the upload has not finished.",
+                code="UPLOAD_NOT_FOUND"
+            )
+        logger.error(f"S3 upload check failed with error code {error_code}: {e}")
+        return create_error_response(
+            status_code=500,
+            detail=f"S3 upload check failed: {e}",
+            code=f"S3_UPLOAD_ERROR_{error_code}"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error completing upload: {str(e)}")
+        return create_error_response(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}",
+            code="INTERNAL_SERVER_ERROR"
+        )
@@ -2,7 +2,9 @@
 Controller utilities
 Common functions shared across controllers
 """
-from fastapi.responses import JSONResponse
+import anyio
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.types import Send
 
 
 def create_error_response(status_code: int, detail: str, code: str = None):
@@ -13,4 +15,24 @@ def create_error_response(status_code: int, detail: str, code: str = None):
     return JSONResponse(
         status_code=status_code,
         content=error_data
-    ) 
\ No newline at end of file
+    )
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that closes its body iterator however the response ends
+
+    Starlette stops iterating when the client disconnects but leaves the
+    generator open, so an upstream stream behind it would stay open until the
+    generator is garbage collected. This closes it right away.
+    """
+
+    async def stream_response(self, send: Send) -> None:
+        try:
+            await super().stream_response(send)
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                # Shielded, as the response may be ending because its task was cancelled
+                with anyio.CancelScope(shield=True):
+                    await aclose()
@@ -4,7 +4,7 @@ import os
 import logging
 from datetime import datetime
 import asyncio
-from functools import wraps
+from functools import lru_cache, wraps
 import json
 
 # Import config
@@ -13,16 +13,14 @@ from config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
 logger = logging.getLogger(__name__)
 
 # Supabase client configuration
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
-    """Get Supabase client with service role key for server-side operations"""
+    """Get the shared Supabase client with service role key for server-side operations, created on first use"""
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
     
     return create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
-# Global client instance
-supabase: Client = get_supabase_client()
-
 # Async wrapper for Supabase operations
 def async_supabase_operation(func):
     """Decorator to wrap synchronous Supabase operations in async context"""
@@ -35,8 +33,9 @@ def async_supabase_operation(func):
 # Compatibility layer for session-based operations
 class SupabaseSession:
     """Mock session object to maintain compatibility with existing code"""
-    def __init__(self):
-        self.client = supabase
+    @property
+    def client(self) -> Client:
+        return get_supabase_client()
     
     async def __aenter__(self):
         return self
@@ -214,6 +213,39 @@ async def get_resumes_by_user_id(session: SupabaseSession, user_id: int) -> List
         logger.error(f"Error getting resumes by user_id: {e}")
         return []
 
+def _resume_insert_data(resume_data: dict, profile_id: int) -> Dict[str, Any]:
+    """Prepare a resume for the Supabase V2 schema"""
+    return {
+        'name': resume_data['name'],
+        'email': resume_data.get('email'),
+        'phone': resume_data.get('phone'),
+        'location': resume_data.get('location'),
+        'professional_summary': resume_data.get('professional_summary'),
+        'career_level': resume_data.get('career_level'),
+        'years_experience': resume_data.get('years_experience'),
+        'primary_domain': resume_data.get('primary_domain'),
+        'seniority_keywords': resume_data.get('seniority_keywords'),
+        'experience': resume_data.get('experience'),
+        'education': resume_data.get('education'),
+        'skills': resume_data.get('skills'),
+        'languages': resume_data.get('languages'),
+        'career_trajectory': resume_data.get('career_trajectory'),
+        'domain_expertise': resume_data.get('domain_expertise'),
+        'leadership_experience': resume_data.get('leadership_experience'),
+        'achievement_highlights': resume_data.get('achievement_highlights'),
+        'source_documents': resume_data.get('source_documents'),
+        'misc_data': resume_data.get('misc_data'),
+        'file_path': resume_data.get('file_path'),
+        'file_type': resume_data.get('file_type', 'generated'),
+        'version': resume_data.get('version', 1),
+        'is_active': resume_data.get('is_active', True),
+        'customization_notes': resume_data.get('customization_notes'),
+        'job_posting_id': resume_data.get('job_posting_id'),
+        'profile_id': profile_id,
+        'created_at': datetime.now().isoformat(),
+        'updated_at': datetime.now().isoformat()
+    }
+
 async def create_resume(session: SupabaseSession, resume_data: dict) -> Dict[str, Any]:
     """Create a new resume (V2 schema)"""
     try:
@@ -229,39 +261,9 @@ async def create_resume(session: SupabaseSession, resume_data: dict) -> Dict[str
         if not profile_id:
             raise Exception("profile_id is required for creating resume")
         
-        # Prepare data for Supabase V2 schema
-        insert_data = {
-            'name': resume_data['name'],
-            'email': resume_data.get('email'),
-            'phone': resume_data.get('phone'),
-            'location': resume_data.get('location'),
-            'professional_summary': resume_data.get('professional_summary'),
-            'career_level': resume_data.get('career_level'),
-            'years_experience': resume_data.get('years_experience'),
-            'primary_domain': resume_data.get('primary_domain'),
-            'seniority_keywords': resume_data.get('seniority_keywords'),
-            'experience': resume_data.get('experience'),
-            'education': resume_data.get('education'),
-            'skills': resume_data.get('skills'),
-            'languages': resume_data.get('languages'),
-            'career_trajectory': resume_data.get('career_trajectory'),
-            'domain_expertise': resume_data.get('domain_expertise'),
-            'leadership_experience': resume_data.get('leadership_experience'),
-            'achievement_highlights': resume_data.get('achievement_highlights'),
-            'source_documents': resume_data.get('source_documents'),
-            'misc_data': resume_data.get('misc_data'),
-            'file_path': resume_data.get('file_path'),
-            'file_type': resume_data.get('file_type', 'generated'),
-            'version': resume_data.get('version', 1),
-            'is_active': resume_data.get('is_active', True),
-            'customization_notes': resume_data.get('customization_notes'),
-            'job_posting_id': resume_data.get('job_posting_id'),
-            'profile_id': profile_id,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
-        }
+        insert_data = _resume_insert_data(resume_data, profile_id)
         
-        result = session.client.table('resumes_v2').insert(insert_data).execute()
+        result = await asyncio.to_thread(session.client.table('resumes_v2').insert(insert_data).execute)
         
         if result.data:
             return _convert_supabase_record_to_dict(result.data[0])
@@ -271,6 +273,23 @@ async def create_resume(session: SupabaseSession, resume_data: dict) -> Dict[str
         logger.error(f"Error creating resume: {e}")
         raise
 
+async def create_resumes(session: SupabaseSession, profile_id: int, resumes_data: List[dict]) -> List[Dict[str, Any]]:
+    """Create several resumes for a profile in one insert (V2 schema)"""
+    if not resumes_data:
+        return []
+    try:
+        insert_data = [_resume_insert_data(resume_data, profile_id) for resume_data in resumes_data]
+        
+        result = session.client.table('resumes_v2').insert(insert_data).execute()
+        
+        if result.data:
+            return [_convert_supabase_record_to_dict(record) for record in result.data]
+        else:
+            raise Exception("Failed to create resumes")
+    except Exception as e:
+        logger.error(f"Error creating resumes: {e}")
+        raise
+
 async def delete_resume(session: SupabaseSession, resume_id: int, user_id: int) -> bool:
     """Delete a resume by ID (only if it belongs to the user) - V2 schema"""
     try:
@@ -335,7 +354,7 @@ async def create_profile(session: SupabaseSession, profile_data: dict) -> Dict[s
             'updated_at': datetime.now().isoformat()
         }
         
-        result = session.client.table('profiles_v2').insert(insert_data).execute()
+        result = await asyncio.to_thread(session.client.table('profiles_v2').insert(insert_data).execute)
         
         if result.data:
             return _convert_supabase_record_to_dict(result.data[0])
@@ -348,7 +367,7 @@ async def create_profile(session: SupabaseSession, profile_data: dict) -> Dict[s
 async def get_profile_by_user_id(session: SupabaseSession, user_id: int) -> Optional[Dict[str, Any]]:
     """Get profile by user ID"""
     try:
-        result = session.client.table('profiles_v2').select('*').eq('user_id', user_id).execute()
+        result = await asyncio.to_thread(session.client.table('profiles_v2').select('*').eq('user_id', user_id).execute)
         if result.data:
             return _convert_supabase_record_to_dict(result.data[0])
         return None
@@ -393,6 +412,77 @@ async def clear_profile(session: SupabaseSession, user_id: int) -> bool:
         logger.error(f"Error clearing profile: {e}")
         raise
 
+# Job posting CRUD operations
+async def get_job_posting_by_id(session: SupabaseSession, job_posting_id: int, profile_id: int) -> Optional[Dict[str, Any]]:
+    """Get a job posting by ID, scoped to the owning profile"""
+    try:
+        result = session.client.table('job_postings_v2').select('*').eq('id', job_posting_id).eq('profile_id', profile_id).execute()
+        if result.data:
+            return _convert_supabase_record_to_dict(result.data[0])
+        return None
+    except Exception as e:
+        logger.error(f"Error getting job posting {job_posting_id}: {e}")
+        return None
+
+async def get_job_postings_by_profile_id(session: SupabaseSession, profile_id: int) -> List[Dict[str, Any]]:
+    """Get all job postings saved to a profile, newest first"""
+    try:
+        result = session.client.table('job_postings_v2').select('*').eq('profile_id', profile_id).order('created_at', desc=True).execute()
+        return [_convert_supabase_record_to_dict(record) for record in result.data]
+    except Exception as e:
+        logger.error(f"Error getting job postings for profile {profile_id}: {e}")
+        return []
+
+# Resume parse job operations
+# Synchronous: the job queue runs them in worker threads so the event loop never waits on Supabase
+def create_resume_parse_job(session: SupabaseSession, job_data: dict) -> Dict[str, Any]:
+    """Create a resume parse job row"""
+    try:
+        insert_data = {
+            'id': job_data['id'],
+            'user_id': job_data['user_id'],
+            'filename': job_data.get('filename'),
+            'status': job_data.get('status', 'queued'),
+            'progress': job_data.get('progress', 0),
+            'created_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat()
+        }
+
+        result = session.client.table('resume_parse_jobs').insert(insert_data).execute()
+
+        if result.data:
+            return _convert_supabase_record_to_dict(result.data[0])
+        else:
+            raise Exception("Failed to create resume parse job")
+    except Exception as e:
+        logger.error(f"Error creating resume parse job: {e}")
+        raise
+
+def get_resume_parse_job(session: SupabaseSession, job_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+    """Get a resume parse job by ID, scoped to the user who submitted it"""
+    try:
+        result = session.client.table('resume_parse_jobs').select('*').eq('id', job_id).eq('user_id', user_id).execute()
+        if result.data:
+            return _convert_supabase_record_to_dict(result.data[0])
+        return None
+    except Exception as e:
+        logger.error(f"Error getting resume parse job {job_id}: {e}")
+        return None
+
+def update_resume_parse_job(session: SupabaseSession, job_id: str, job_data: dict) -> Optional[Dict[str, Any]]:
+    """Update a resume parse job's status, progress or outcome"""
+    try:
+        update_data = {**job_data, 'updated_at': datetime.now().isoformat()}
+
+        result = session.client.table('resume_parse_jobs').update(update_data).eq('id', job_id).execute()
+
+        if result.data:
+            return _convert_supabase_record_to_dict(result.data[0])
+        return None
+    except Exception as e:
+        logger.error(f"Error updating resume parse job {job_id}: {e}")
+        return None
+
 # Waitlist CRUD operations
 async def add_to_waitlist(session: SupabaseSession, email: str, info: dict = None) -> Dict[str, Any]:
     """Add email to waitlist"""
@@ -7,13 +7,14 @@ from typing import Optional, List, Dict, Any
 import os
 import logging
 import asyncio
-from functools import wraps
+from functools import lru_cache, wraps
 
 logger = logging.getLogger(__name__)
 
-# Direct Supabase client (without importing from config to avoid circular dependency)
+# Direct Supabase client
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
-    """Get Supabase client with service role key for server-side operations"""
+    """Get the shared Supabase client with service role key for server-side operations, created on first use"""
     supabase_url = os.getenv("SUPABASE_URL")
     supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     
@@ -22,9 +23,6 @@ def get_supabase_client() -> Client:
     
     return create_client(supabase_url, supabase_key)
 
-# Global client instance
-supabase: Client = get_supabase_client()
-
 # Async wrapper for Supabase operations
 def async_supabase_operation(func):
     """Decorator to wrap synchronous Supabase operations in async context"""
@@ -55,15 +53,15 @@ def _get_database_stats_sync() -> dict:
     """Synchronous version of get_database_stats"""
     try:
         # Get resume count
-        resume_response = supabase.table("resumes").select("id", count="exact").execute()
+        resume_response = get_supabase_client().table("resumes").select("id", count="exact").execute()
         resume_count = resume_response.count or 0
         
         # Get user count
-        user_response = supabase.table("users").select("id", count="exact").execute()
+        user_response = get_supabase_client().table("users").select("id", count="exact").execute()
         user_count = user_response.count or 0
         
         # Get profile count
-        profile_response = supabase.table("profiles").select("id", count="exact").execute()
+        profile_response = get_supabase_client().table("profiles").select("id", count="exact").execute()
         profile_count = profile_response.count or 0
         
         return {
@@ -90,7 +88,7 @@ async def get_database_stats(session) -> dict:
 def _get_profile_by_user_id_sync(user_id: int) -> Optional[Dict[str, Any]]:
     """Synchronous version of get_profile_by_user_id"""
     try:
-        response = supabase.table("profiles").select("*").eq("user_id", user_id).execute()
+        response = get_supabase_client().table("profiles").select("*").eq("user_id", user_id).execute()
         if response.data:
             return _convert_supabase_record_to_dict(response.data[0])
         return None
@@ -106,7 +104,7 @@ async def get_profile_by_user_id(session, user_id: int) -> Optional[Dict[str, An
 def _get_resumes_by_user_id_sync(user_id: int) -> List[Dict[str, Any]]:
     """Synchronous version of get_resumes_by_user_id"""
     try:
-        response = supabase.table("resumes").select("*").eq("user_id", user_id).execute()
+        response = get_supabase_client().table("resumes").select("*").eq("user_id", user_id).execute()
         if response.data:
             return [_convert_supabase_record_to_dict(record) for record in response.data]
         return []
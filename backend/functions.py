@@ -2,9 +2,11 @@
 Simple direct functions for MCP and Chat
 No registry needed - just import and use!
 """
-from typing import Dict, Any
+import inspect
+from typing import Dict, Any, List
 from db_functions import get_database_stats, get_profile_by_user_id, get_resumes_by_user_id
 from models import ProfileRead, ResumeRead
+from services import NotFoundException, gap_analysis_service
 
 
 async def get_database_statistics(session, user_id=None, **kwargs) -> Dict[str, Any]:
@@ -41,13 +43,11 @@ async def identify_profile_gaps(session, user_id: int, **kwargs) -> Dict[str, An
     if not user_id:
         return {"error": "User authentication required"}
     
-    # TODO: Implement actual gap identification logic
-    return {
-        "gaps": [
-            {"skill": "Cloud Technologies", "importance": "high"},
-            {"skill": "Leadership Experience", "importance": "medium"}
-        ]
-    }
+    analysis = await gap_analysis_service.get_profile_gaps(session, user_id)
+    if not analysis:
+        return {"gaps": [], "message": "No profile found for user"}
+    
+    return analysis
 
 
 async def identify_gaps_per_job(session, user_id: int, job_posting_id: int, **kwargs) -> Dict[str, Any]:
@@ -57,14 +57,21 @@ async def identify_gaps_per_job(session, user_id: int, job_posting_id: int, **kw
     if not job_posting_id:
         return {"error": "job_posting_id is required"}
     
-    # TODO: Implement actual job gap analysis logic
-    return {
-        "job_posting_id": job_posting_id,
-        "gaps": [
-            {"requirement": "React Native", "user_level": "None", "required_level": "Intermediate"},
-            {"requirement": "5+ years experience", "user_level": "3 years", "required_level": "5 years"}
-        ]
-    }
+    try:
+        return await gap_analysis_service.get_job_gaps(session, user_id, job_posting_id)
+    except NotFoundException as e:
+        return {"error": e.message}
+
+
+async def rank_job_postings(session, user_id: int, **kwargs) -> Dict[str, Any]:
+    """Rank all of the user's saved job postings by how well their profile fits, with the top gaps for each"""
+    if not user_id:
+        return {"error": "User authentication required"}
+    
+    try:
+        return await gap_analysis_service.rank_job_postings(session, user_id)
+    except NotFoundException as e:
+        return {"error": e.message}
 
 
 async def get_context(session, user_id: int, **kwargs) -> Dict[str, Any]:
@@ -82,4 +89,95 @@ async def get_context(session, user_id: int, **kwargs) -> Dict[str, Any]:
             "resume_count": len(resumes),
             "profile": ProfileRead.model_validate(profile).model_dump(mode='json') if profile else None
         }
-    }
\ No newline at end of file
+    }
+
+
+# Simple function mapping - just import and list!
+EXPOSED_FUNCTIONS = [
+    get_database_statistics,
+    get_user_profile,
+    get_user_resumes,
+    identify_profile_gaps,
+    identify_gaps_per_job,
+    rank_job_postings,
+    get_context,
+]
+
+# Auto-generate function names for MCP
+MCP_OPERATIONS = [func.__name__ for func in EXPOSED_FUNCTIONS]
+
+# Auto-generate OpenAI tool definitions
+def get_openai_tools() -> List[Dict[str, Any]]:
+    """Generate OpenAI tool definitions from function signatures and docstrings"""
+    tools = []
+    
+    for func in EXPOSED_FUNCTIONS:
+        # Get function signature
+        sig = inspect.signature(func)
+        
+        # Build parameters from function signature
+        parameters = {
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+        
+        for param_name, param in sig.parameters.items():
+            if param_name in ['session', 'kwargs']:  # Skip internal params
+                continue
+                
+            param_info = {"type": "string"}  # Default type
+            
+            # Try to infer type from annotation
+            if param.annotation != inspect.Parameter.empty:
+                if param.annotation == int:
+                    param_info["type"] = "integer"
+                elif param.annotation == bool:
+                    param_info["type"] = "boolean"
+            
+            parameters["properties"][param_name] = param_info
+            
+            # Mark as required if no default value
+            if param.default == inspect.Parameter.empty and param_name != 'user_id':
+                parameters["required"].append(param_name)
+        
+        tools.append({
+            "type": "function",
+            "function": {
+                "name": func.__name__,
+                "description": func.__doc__ or f"Execute {func.__name__}",
+                "parameters": parameters
+            }
+        })
+    
+    return tools
+
+# Function execution helper
+async def execute_function(function_name: str, arguments: Dict[str, Any], session, user_id=None) -> Dict[str, Any]:
+    """Execute a function by name"""
+    # Find the function
+    func = None
+    for f in EXPOSED_FUNCTIONS:
+        if f.__name__ == function_name:
+            func = f
+            break
+    
+    if not func:
+        return {"success": False, "error": f"Unknown function: {function_name}"}
+    
+    try:
+        # Call the function with session, user_id, and arguments
+        result = await func(session=session, user_id=user_id, **arguments)
+        return {"success": True, **result}
+    except Exception as e:
+        return {"success": False, "error": f"Function execution failed: {str(e)}"}
+
+# Function info helper
+def get_user_required_functions() -> List[str]:
+    """Get list of functions that require user_id"""
+    user_functions = []
+    for func in EXPOSED_FUNCTIONS:
+        sig = inspect.signature(func)
+        if 'user_id' in sig.parameters:
+            user_functions.append(func.__name__)
+    return user_functions
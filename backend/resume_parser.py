@@ -1,15 +1,35 @@
 # Core Resume Parser for FastAPI
-from typing import Dict, Optional
+# One pipeline, compiled once, serves /parse-resume and /parse-resume-stream
+from typing import Awaitable, Callable, Dict, List, Optional
 from langgraph.graph import StateGraph, END
-from litellm import completion
-import PyPDF2
-from io import BytesIO
+from langchain_core.runnables import RunnableConfig
+from litellm import acompletion
+from datetime import datetime
+import asyncio
 import json
-import time
+import logging
+import os
+
+from config import RESUME_CHUNK_THRESHOLD_CHARS, RESUME_CHUNK_CHARS, RESUME_CHUNK_CONCURRENCY
+from services.pdf_extraction import PdfSource, extract_pdf_pages, extractor_id
+from services.resume_parse_cache import (
+    pdf_digest, file_digest, prompt_version, get_cached_text, set_cached_text, get_cached_profile, set_cached_profile
+)
+from services.resume_sections import segment_sections, preextract_resume, find_contact_in_text, merge_contact_fields
+from services.partial_json import PartialJSONScanner
+
+logger = logging.getLogger(__name__)
+
+# Sinks receive progress events / parsed fields; passed in the run config, not the state
+ProgressSink = Callable[[Dict], Awaitable[None]]
 
 class GraphState(Dict):
-    pdf_content: bytes
+    pdf_content: PdfSource
+    pdf_digest: str
     extracted_text: str
+    contact_fields: Dict
+    fallback_contact_fields: Dict
+    llm_text: str
     parsed_profile: Optional[Dict]
     error: Optional[str]
     validation_passed: bool
@@ -40,65 +60,297 @@ Resume Text:
 {resume_text}
 """
 
-def extract_pdf_text(state: GraphState) -> GraphState:
-    """Extract text from PDF content"""
+RESUME_CHUNK_PROMPT = """You are an automated resume parser. This is part {part} of {parts} of a long resume or CV.
+
+Extract ONLY the information that appears in this part into JSON with these keys:
+   - name, email, phone, location: Strings, or null if not in this part
+   - summary: Professional summary, or null if not in this part
+   - experience: Array of job objects
+   - education: Array of education objects
+   - skills: Array of skill strings
+   - certifications: Array of certification objects
+   - languages: Array of language objects
+
+Use empty arrays for sections not in this part. Return ONLY the JSON object.
+
+Resume Text (part {part} of {parts}):
+{resume_text}
+"""
+
+# Fields that identify the same entry when it appears in more than one chunk
+ITEM_IDENTITY_KEYS = {
+    "experience": ("company", "title", "position", "start_date"),
+    "education": ("institution", "school", "degree"),
+    "certifications": ("name", "title"),
+    "languages": ("language", "name"),
+}
+
+# Top-level fields requested by RESUME_PARSER_PROMPT, used to measure LLM progress
+RESUME_FIELDS = (
+    "name", "email", "phone", "location", "summary",
+    "experience", "education", "skills", "certifications", "languages"
+)
+
+# Locally extracted values that the LLM's streamed fields don't replace (see merge_contact_fields)
+LOCAL_CONTACT_FIELDS = ("email", "phone")
+
+# Cached parse results are only reused while the prompts are unchanged
+RESUME_PARSER_PROMPT_VERSION = prompt_version(RESUME_PARSER_PROMPT + RESUME_CHUNK_PROMPT)
+
+def _pack(pieces: List[str], max_chars: int) -> List[str]:
+    """Greedily join pieces into chunks of at most max_chars (a single oversized piece stays whole)"""
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def split_resume_text(text: str, max_chars: int = RESUME_CHUNK_CHARS) -> List[str]:
+    """
+    Split long resume text into chunks of at most max_chars
+
+    Chunks break at section headings where possible; sections longer than a
+    chunk are split between lines.
+    """
+    pieces: List[str] = []
+    for _, section in segment_sections(text):
+        section_text = "\n".join(section)
+        if len(section_text) <= max_chars:
+            pieces.append(section_text)
+        else:
+            pieces.extend(_pack(section, max_chars))
+    return _pack(pieces, max_chars)
+
+def _normalise(value) -> str:
+    return " ".join(str(value).split()).casefold()
+
+def _item_identity(field: str, item) -> str:
+    """Key under which two array items count as the same entry"""
+    if not isinstance(item, dict):
+        return _normalise(item)
+    keys = [key for key in ITEM_IDENTITY_KEYS.get(field, ()) if item.get(key)]
+    if keys:
+        return "|".join(f"{key}={_normalise(item[key])}" for key in keys)
+    return _normalise(json.dumps(item, sort_keys=True))
+
+def merge_chunk_profiles(profiles: List[Dict]) -> Dict:
+    """
+    Merge per-chunk parse results in chunk order
+
+    Scalar fields keep the first non-empty value. Array fields are concatenated
+    and deduplicated; a duplicate item fills in fields missing from the first copy.
+    """
+    merged: Dict = {}
+    seen: Dict[str, Dict[str, Dict]] = {}
+    for profile in profiles:
+        for field, value in profile.items():
+            if isinstance(value, list):
+                items = merged.setdefault(field, [])
+                index = seen.setdefault(field, {})
+                for item in value:
+                    identity = _item_identity(field, item)
+                    if identity not in index:
+                        index[identity] = item
+                        items.append(item)
+                    elif isinstance(item, dict) and isinstance(index[identity], dict):
+                        for key, item_value in item.items():
+                            if index[identity].get(key) in (None, "", []):
+                                index[identity][key] = item_value
+            elif merged.get(field) in (None, "", []):
+                merged[field] = value
+    return merged
+
+async def emit_progress(config: RunnableConfig, step: str, progress: int, message: str, **extra):
+    """Emit progress update if a progress sink was given"""
+    sink = config.get("configurable", {}).get("progress_callback")
+    if sink:
+        await sink({
+            "step": step,
+            "progress": progress,
+            "message": message,
+            **extra,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+async def emit_field(config: RunnableConfig, field_event: Dict):
+    """Emit a completed resume field (or array item) if a field sink was given"""
+    sink = config.get("configurable", {}).get("field_callback")
+    if sink and field_event["field"] != "error":
+        await sink(field_event)
+
+def _decode_json(response_content: str) -> Dict:
+    """Decode the LLM's JSON answer, which may be wrapped in a markdown fence"""
+    try:
+        return json.loads(response_content)
+    except json.JSONDecodeError:
+        if "```json" in response_content:
+            json_start = response_content.find("```json") + 7
+            json_end = response_content.find("```", json_start)
+            if json_end != -1:
+                return json.loads(response_content[json_start:json_end].strip())
+        raise
+
+async def _stream_completion(
+    prompt: str,
+    model_name: str,
+    on_token: Optional[Callable[[str], Awaitable[None]]] = None
+) -> str:
+    """Stream one prompt's answer from the LLM, passing each token to on_token"""
+    # Set API key if available
+    api_key = os.getenv("GEMINI_API_KEY")
+    if api_key:
+        os.environ["GEMINI_API_KEY"] = api_key
+
+    response = await acompletion(
+        model=model_name,
+        messages=[{
+            "role": "user",
+            "content": prompt
+        }],
+        temperature=0.1,
+        api_key=api_key if api_key else None,
+        stream=True
+    )
+
+    tokens = []
+    async for chunk in response:
+        token = chunk.choices[0].delta.content if chunk.choices else None
+        if token:
+            tokens.append(token)
+            if on_token:
+                await on_token(token)
+    return "".join(tokens)
+
+async def extract_pdf_text(state: GraphState, config: RunnableConfig) -> GraphState:
+    """Extract text from PDF content in the extraction process pool"""
     try:
-        pdf_file = BytesIO(state["pdf_content"])
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        await emit_progress(config, "extract", 0, "Starting PDF extraction...")
+
+        extractor = extractor_id()
+        cached_text = await get_cached_text(state["pdf_digest"], extractor)
+        if cached_text is not None:
+            state["extracted_text"] = cached_text
+            await emit_progress(config, "extract", 30, "PDF text loaded from cache")
+            return state
 
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
+        async def on_pages(done: int, page_count: int):
+            await emit_progress(
+                config, "extract", 5 + 25 * done // max(page_count, 1),
+                f"Extracted {done} of {page_count} pages",
+                pages_done=done, page_count=page_count
+            )
+
+        # Batches of pages are extracted in the extraction process pool
+        pages = await extract_pdf_pages(state["pdf_content"], on_progress=on_pages)
+        text = "".join(page + "\n" for page in pages)
 
         state["extracted_text"] = text.strip()
+        await set_cached_text(state["pdf_digest"], extractor, state["extracted_text"])
         print(f"Extracted PDF text (first 200 chars): {text[:200]}")
+        await emit_progress(config, "extract", 30, "PDF extraction complete")
         return state
     except Exception as e:
+        await emit_progress(config, "extract", 0, f"Error: {str(e)}")
         state["error"] = f"PDF extraction failed: {str(e)}"
         return state
 
-def parse_resume_with_llm(state: GraphState) -> GraphState:
-    """Parse resume text using LLM"""
+async def preextract_fields(state: GraphState, config: RunnableConfig) -> GraphState:
+    """Extract contact fields locally, emit them, and drop text the LLM doesn't need to read"""
+    if state.get("error"):
+        return state
+
+    contact, llm_text = preextract_resume(state["extracted_text"])
+    state["contact_fields"] = contact
+    state["fallback_contact_fields"] = find_contact_in_text(state["extracted_text"], contact)
+    state["llm_text"] = llm_text
+    logger.debug(f"Pre-extracted {sorted(contact)}; LLM text {len(llm_text)} of {len(state['extracted_text'])} chars")
+
+    for field, value in contact.items():
+        await emit_field(config, {"field": field, "value": value})
+    await emit_progress(config, "extract", 30, f"Found {len(contact)} contact details", contact_fields=sorted(contact))
+    return state
+
+async def _parse_whole(text: str, model_name: str, contact: Dict, config: RunnableConfig) -> Dict:
+    """Parse the resume in one prompt, emitting fields as soon as the streamed JSON completes them"""
+    scanner = PartialJSONScanner()
+
+    async def on_token(token: str):
+        # Progress follows the number of top-level fields completed
+        fields_before = scanner.completed_fields
+        for field_event in scanner.feed(token):
+            if field_event["field"] not in LOCAL_CONTACT_FIELDS or field_event["field"] not in contact:
+                await emit_field(config, field_event)
+        if scanner.completed_fields != fields_before:
+            fields = scanner.completed_fields
+            await emit_progress(
+                config, "parse", 30 + 60 * min(fields, len(RESUME_FIELDS)) // len(RESUME_FIELDS),
+                f"Parsed {fields} of {len(RESUME_FIELDS)} resume fields",
+                fields_parsed=fields
+            )
+
+    response_content = await _stream_completion(
+        RESUME_PARSER_PROMPT.format(resume_text=text), model_name, on_token
+    )
+    print(f"LLM response content: {response_content}")
+    return _decode_json(response_content)
+
+async def _parse_in_chunks(text: str, model_name: str, config: RunnableConfig) -> Dict:
+    """Parse a long resume by extracting each chunk concurrently and merging the results"""
+    chunks = split_resume_text(text)
+    semaphore = asyncio.Semaphore(RESUME_CHUNK_CONCURRENCY)
+    done = 0
+    logger.info(f"Parsing long resume ({len(text)} chars) in {len(chunks)} chunks")
+
+    async def parse_chunk(index: int, chunk: str) -> Optional[Dict]:
+        nonlocal done
+        try:
+            async with semaphore:
+                response_content = await _stream_completion(
+                    RESUME_CHUNK_PROMPT.format(part=index + 1, parts=len(chunks), resume_text=chunk),
+                    model_name
+                )
+            result = _decode_json(response_content)
+        except Exception as e:
+            # One unreadable part shouldn't fail the whole resume; the other parts are still merged
+            logger.warning(f"Resume part {index + 1} of {len(chunks)} could not be parsed: {e}")
+            result = None
+        done += 1
+        await emit_progress(
+            config, "parse", 30 + 60 * done // len(chunks),
+            f"Parsed {done} of {len(chunks)} resume parts", chunks_parsed=done, chunk_count=len(chunks)
+        )
+        return result
+
+    results = await asyncio.gather(*[parse_chunk(i, chunk) for i, chunk in enumerate(chunks)])
+    profiles = [result for result in results if isinstance(result, dict) and "error" not in result]
+    if not profiles:
+        return {"error": "Not a valid resume"}
+    return merge_chunk_profiles(profiles)
+
+async def parse_resume_with_llm(state: GraphState, config: RunnableConfig) -> GraphState:
+    """Parse resume text using LLM, in concurrent chunks when the text is long"""
     if state.get("error"):
         return state
 
     try:
         # Try different model names
         model_name = state.get("model_name", "gemini/gemini-1.5-flash")
-        
-        # Set API key if available
-        import os
-        api_key = os.getenv("GEMINI_API_KEY")
-        if api_key:
-            os.environ["GEMINI_API_KEY"] = api_key
-
-        response = completion(
-            model=model_name,
-            messages=[{
-                "role": "user",
-                "content": RESUME_PARSER_PROMPT.format(resume_text=state["extracted_text"])
-            }],
-            temperature=0.1,
-            api_key=api_key if api_key else None
-        )
+        text = state.get("llm_text") or state["extracted_text"]
+        contact = state.get("contact_fields") or {}
 
-        response_content = response.choices[0].message.content
-        print(f"LLM response content: {response_content}")
-
-        # Handle JSON extraction from markdown
-        try:
-            parsed_data = json.loads(response_content)
-        except json.JSONDecodeError:
-            if "```json" in response_content:
-                json_start = response_content.find("```json") + 7
-                json_end = response_content.find("```", json_start)
-                if json_end != -1:
-                    response_content = response_content[json_start:json_end].strip()
-                    parsed_data = json.loads(response_content)
-                else:
-                    raise
-            else:
-                raise
+        await emit_progress(config, "parse", 30, "Analyzing resume content...")
+        if len(text) > RESUME_CHUNK_THRESHOLD_CHARS:
+            parsed_data = await _parse_in_chunks(text, model_name, config)
+            chunked = True
+        else:
+            parsed_data = await _parse_whole(text, model_name, contact, config)
+            chunked = False
 
         print(f"Parsed data: {parsed_data}")
         
@@ -106,29 +358,46 @@ def parse_resume_with_llm(state: GraphState) -> GraphState:
         if "error" in parsed_data:
             state["error"] = parsed_data["error"]
             print(f"LLM returned error: {parsed_data['error']}")
+            await emit_progress(config, "parse", 0, f"Error: {parsed_data['error']}")
         else:
-            state["parsed_profile"] = parsed_data
+            fallback = state.get("fallback_contact_fields") or {}
+            state["parsed_profile"] = merge_contact_fields(parsed_data, contact, fallback)
+            if chunked:
+                # Chunk results are only final once merged
+                for field, value in state["parsed_profile"].items():
+                    await emit_field(config, {"field": field, "value": value})
+            else:
+                # Fields the LLM left empty are filled from the text once it has finished
+                for field in fallback:
+                    if not parsed_data.get(field):
+                        await emit_field(config, {"field": field, "value": state["parsed_profile"][field]})
+            await emit_progress(config, "parse", 90, "Resume analysis complete")
 
         return state
     except Exception as e:
         import traceback
         error_detail = traceback.format_exc()
         print(f"LLM parsing error details: {error_detail}")
+        await emit_progress(config, "parse", 0, f"Error: {str(e)}")
         state["error"] = f"LLM parsing failed: {str(e)}"
         return state
 
-def validate_profile(state: GraphState) -> GraphState:
+async def validate_profile(state: GraphState, config: RunnableConfig) -> GraphState:
     """Validate the parsed profile has minimum required fields"""
     if state.get("error"):
         state["validation_passed"] = False
         return state
 
+    await emit_progress(config, "validate", 90, "Validating resume data...")
+
     profile = state.get("parsed_profile")
     if not profile or not profile.get("name"):
         state["error"] = "Missing required field: name"
         state["validation_passed"] = False
+        await emit_progress(config, "validate", 0, "Validation failed: missing required fields")
     else:
         state["validation_passed"] = True
+        await emit_progress(config, "validate", 100, "Resume successfully parsed and validated!")
 
     return state
 
@@ -142,12 +411,14 @@ def create_resume_parser_dag():
 
     # Add nodes
     workflow.add_node("extract_pdf", extract_pdf_text)
+    workflow.add_node("preextract", preextract_fields)
     workflow.add_node("parse_resume", parse_resume_with_llm)
     workflow.add_node("validate", validate_profile)
 
     # Add edges
     workflow.set_entry_point("extract_pdf")
-    workflow.add_edge("extract_pdf", "parse_resume")
+    workflow.add_edge("extract_pdf", "preextract")
+    workflow.add_edge("preextract", "parse_resume")
     workflow.add_edge("parse_resume", "validate")
 
     # Add conditional edge
@@ -159,31 +430,73 @@ def create_resume_parser_dag():
 
     return workflow.compile()
 
+# Compiled once; per-request sinks travel in the run config
+RESUME_PARSER_DAG = create_resume_parser_dag()
+
 async def parse_resume_pdf(
-    pdf_bytes: bytes, 
-    model_name: str = "gemini/gemini-1.5-flash"
+    pdf: PdfSource, 
+    model_name: str = "gemini/gemini-1.5-flash",
+    progress_callback: Optional[ProgressSink] = None,
+    field_callback: Optional[ProgressSink] = None,
+    digest: Optional[str] = None
 ) -> Dict:
     """
     Main function: Parse resume and return JSON or failure
+
+    pdf is the file's bytes or the path of a spooled upload; pass digest when the
+    upload was already hashed while it was received.
+    progress_callback receives progress events ({"step", "progress", "message", ...});
+    field_callback receives each parsed field ({"field", "value"}) and array item
+    ({"field", "index", "value"}) as soon as it is complete.
     """
-    # Create the DAG
-    app = create_resume_parser_dag()
+    # Re-uploads of the same file skip extraction and the LLM call
+    if digest is None:
+        digest = pdf_digest(pdf) if isinstance(pdf, bytes) else await asyncio.to_thread(file_digest, pdf)
+    cached_profile = await get_cached_profile(digest, model_name, RESUME_PARSER_PROMPT_VERSION)
+    if cached_profile is not None:
+        logger.info(f"Resume parse cache hit: {digest}")
+        if progress_callback:
+            await progress_callback({
+                "step": "cache",
+                "progress": 100,
+                "message": "Resume loaded from cache",
+                "cache_hit": True,
+                "timestamp": datetime.utcnow().isoformat()
+            })
+        if field_callback:
+            for field, value in cached_profile.items():
+                await field_callback({"field": field, "value": value})
+        return {
+            "success": True,
+            "profile": cached_profile
+        }
 
     # Initialize state
     initial_state = {
-        "pdf_content": pdf_bytes,
+        "pdf_content": pdf,
+        "pdf_digest": digest,
         "extracted_text": "",
+        "contact_fields": {},
+        "fallback_contact_fields": {},
+        "llm_text": "",
         "parsed_profile": None,
         "error": None,
         "validation_passed": False,
         "model_name": model_name
     }
+    config: RunnableConfig = {
+        "configurable": {
+            "progress_callback": progress_callback,
+            "field_callback": field_callback
+        }
+    }
 
     # Run the DAG
-    final_state = await app.ainvoke(initial_state)
+    final_state = await RESUME_PARSER_DAG.ainvoke(initial_state, config=config)
 
     # Return result
     if final_state.get("validation_passed"):
+        await set_cached_profile(digest, model_name, RESUME_PARSER_PROMPT_VERSION, final_state["parsed_profile"])
         return {
             "success": True,
             "profile": final_state["parsed_profile"]
@@ -191,5 +504,9 @@ async def parse_resume_pdf(
     else:
         return {
             "success": False,
-            "error": final_state.get("error", "Unknown error")
-        }
\ No newline at end of file
+            "error": final_state.get("error", "Unknown error"),
+            # Locally extracted contact fields are usable even when the LLM is down
+            "partial_profile": merge_contact_fields(
+                {}, final_state.get("contact_fields") or {}, final_state.get("fallback_contact_fields")
+            ) or None
+        }
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Benchmark Dify request latency with per-call vs pooled HTTP clients
+
+Sends chat requests (blocking and streaming) to a local fake Dify server.
+"per-call" reproduces the old DifyClient, which opened a new httpx client (and
+so a new connection) for every request; "pooled" is the current DifyClient,
+which reuses keep-alive connections.
+
+The fake server delays the first request on every new connection by
+--handshake-ms to stand in for DNS, TCP and TLS setup to api.dify.ai (several
+round trips), and every response by --response-ms.
+
+Usage:
+    python scripts/benchmark_dify_client.py [--requests 50] [--concurrency 1] [--handshake-ms 60] [--response-ms 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clients.dify_client import DifyChatRequest, DifyClient  # noqa: E402
+
+ANSWER_EVENTS = [
+    {"event": "message", "answer": '{"name": "Benchmark Candidate", '},
+    {"event": "message", "answer": '"skills": ["Python"]}'},
+    {"event": "message_end", "metadata": {}},
+]
+
+
+class FakeDify:
+    """Minimal HTTP/1.1 keep-alive server answering POST /v1/chat-messages like Dify"""
+
+    def __init__(
+        self,
+        handshake_latency: float = 0.0,
+        response_latency: float = 0.0,
+        events: Optional[List[Dict[str, Any]]] = None,
+        chunk_bytes: Optional[int] = None,
+        event_latency: float = 0.0
+    ):
+        """
+        Args:
+            handshake_latency: Delay before the first request on a new connection
+            response_latency: Delay before every response
+            events: SSE events of a streaming response (UTF-8, non-ASCII kept as is)
+            chunk_bytes: Split the streaming response into chunks of this size,
+                even in the middle of a character (default: one chunk per event)
+            event_latency: Delay between streamed chunks
+        """
+        self.handshake_latency = handshake_latency
+        self.response_latency = response_latency
+        self.events = events or ANSWER_EVENTS
+        self.chunk_bytes = chunk_bytes
+        self.event_latency = event_latency
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def start(self) -> "FakeDify":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _stream_chunks(self) -> List[bytes]:
+        events = [f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode() for event in self.events]
+        if not self.chunk_bytes:
+            return events
+        body = b"".join(events)
+        return [body[i:i + self.chunk_bytes] for i in range(0, len(body), self.chunk_bytes)]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.handshake_latency)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                self.requests += 1
+
+                await asyncio.sleep(self.response_latency)
+                if json.loads(body or b"{}").get("response_mode") == "streaming":
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n"
+                    )
+                    for chunk in self._stream_chunks():
+                        writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        if self.event_latency:
+                            await writer.drain()
+                            await asyncio.sleep(self.event_latency)
+                    writer.write(b"0\r\n\r\n")
+                else:
+                    payload = json.dumps({"answer": "".join(e.get("answer", "") for e in self.events)}).encode()
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s"
+                        % (len(payload), payload)
+                    )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def chat_request(streaming: bool) -> DifyChatRequest:
+    return DifyChatRequest(
+        query="Please analyze and parse this resume file.",
+        response_mode="streaming" if streaming else "blocking",
+        user="benchmark"
+    )
+
+
+def per_call_sender(base_url: str, streaming: bool) -> Callable[[], Awaitable[None]]:
+    """The old DifyClient: a new httpx client for every request"""
+    url = f"{base_url}/chat-messages"
+    headers = {"Authorization": "Bearer bench", "Content-Type": "application/json"}
+    body = chat_request(streaming).model_dump(exclude_none=True)
+
+    async def send():
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            if streaming:
+                async with client.stream("POST", url, headers=headers, json=body) as response:
+                    response.raise_for_status()
+                    async for _ in response.aiter_bytes():
+                        pass
+            else:
+                response = await client.post(url, headers=headers, json=body)
+                response.raise_for_status()
+                response.json()
+    return send
+
+
+def pooled_sender(client: DifyClient, streaming: bool) -> Callable[[], Awaitable[None]]:
+    request = chat_request(streaming)
+
+    async def send():
+        if streaming:
+            async for _ in client.send_chat_message_stream(request):
+                pass
+        else:
+            await client.send_chat_message(request)
+    return send
+
+
+async def run(send: Callable[[], Awaitable[None]], requests: int, concurrency: int) -> List[float]:
+    """Per-request latencies in seconds"""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed():
+        async with semaphore:
+            started = time.perf_counter()
+            await send()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[timed() for _ in range(requests)])
+    return latencies
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per mode")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight at once")
+    parser.add_argument("--handshake-ms", type=float, default=60.0, help="Simulated connection setup per new connection")
+    parser.add_argument("--response-ms", type=float, default=20.0, help="Simulated Dify response time")
+    args = parser.parse_args()
+
+    server = await FakeDify(args.handshake_ms / 1000, args.response_ms / 1000).start()
+    print(f"{args.requests} requests per mode, concurrency {args.concurrency}, "
+          f"{args.handshake_ms:.0f}ms connection setup, {args.response_ms:.0f}ms response time\n")
+    print(f"{'mode':<22}{'mean':>10}{'p50':>10}{'p95':>10}{'connections':>13}")
+
+    for streaming in (False, True):
+        kind = "streaming" if streaming else "blocking"
+        pooled = DifyClient(api_key="bench", base_url=server.base_url, http2=False)
+        senders = {
+            f"per-call {kind}": per_call_sender(server.base_url, streaming),
+            f"pooled {kind}": pooled_sender(pooled, streaming),
+        }
+        for mode, send in senders.items():
+            connections = server.connections
+            result = summarize(await run(send, args.requests, args.concurrency))
+            print(f"{mode:<22}{result['mean_ms']:>8.1f}ms{result['p50_ms']:>8.1f}ms{result['p95_ms']:>8.1f}ms"
+                  f"{server.connections - connections:>13}")
+        await pooled.aclose()
+
+    await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
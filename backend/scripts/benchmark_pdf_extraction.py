@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF text extraction backends
+
+Extracts a corpus of sample PDFs with every installed backend through the
+extraction process pool and reports pages/s and text fidelity. Fidelity is the
+word-sequence similarity (0-1) between the extracted text and the known text,
+so it drops when words are lost or read in the wrong order (e.g. interleaved
+columns).
+
+The default corpus is generated in code: single-column resumes of several
+lengths and a two-column CV. --corpus adds real PDFs from a directory; a PDF's
+fidelity is reported when a .txt file with the same name holds its text.
+
+Usage:
+    python scripts/benchmark_pdf_extraction.py [--workers 4] [--rounds 3] [--corpus samples/]
+"""
+import argparse
+import asyncio
+import difflib
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.benchmark_resume_parser import build_pdf, build_resume_pdf, resume_page_lines  # noqa: E402
+from config import PDF_EXTRACT_WORKERS  # noqa: E402
+from services import pdf_extraction  # noqa: E402
+
+# Words compared per document; keeps the similarity check fast on long CVs
+FIDELITY_WORDS = 3000
+
+LEFT_COLUMN = [
+    "CONTACT", "jane.doe@example.com", "(555) 010-0199", "Boston, MA",
+    "SKILLS", "Python", "Statistics", "Machine Learning", "SQL",
+    "LANGUAGES", "English", "Spanish",
+]
+RIGHT_COLUMN = [
+    "Jane Doe - Research Scientist",
+    "EXPERIENCE",
+    "Northwind Labs - Senior Research Scientist (2020 - Present)",
+    "Designed causal inference pipelines for pricing experiments.",
+    "Published four papers on uplift modelling at KDD and NeurIPS.",
+    "Contoso Analytics - Data Scientist (2016 - 2020)",
+    "Built churn models that cut customer attrition by twelve percent.",
+    "EDUCATION",
+    "PhD Statistics, Boston University",
+    "BS Mathematics, Tufts University",
+]
+
+
+def build_two_column_pdf(pages: int) -> Tuple[bytes, str]:
+    """
+    A CV with a narrow left sidebar and a main right column on every page
+
+    Lines are drawn row by row, alternating between the columns, as many
+    generators do, so text read in content-stream order interleaves them.
+    """
+    streams = []
+    for _ in range(pages):
+        operations = []
+        for row in range(max(len(LEFT_COLUMN), len(RIGHT_COLUMN))):
+            y = 760 - 14 * row
+            if row < len(LEFT_COLUMN):
+                operations.append(f"1 0 0 1 40 {y} Tm ({LEFT_COLUMN[row]}) Tj")
+            if row < len(RIGHT_COLUMN):
+                operations.append(f"1 0 0 1 220 {y} Tm ({RIGHT_COLUMN[row]}) Tj")
+        streams.append(("BT /F1 10 Tf " + " ".join(operations) + " ET").encode("latin-1"))
+    # Expected reading order: the whole sidebar, then the main column
+    text = "\n".join("\n".join(LEFT_COLUMN + RIGHT_COLUMN) for _ in range(pages))
+    return build_pdf(streams), text
+
+
+def build_corpus(corpus_dir: Optional[str]) -> List[Tuple[str, bytes, Optional[str]]]:
+    """(name, pdf bytes, expected text or None) for every sample"""
+    corpus = []
+    for pages in (1, 3, 20):
+        expected = "\n".join(line for page in range(pages) for line in resume_page_lines(page))
+        corpus.append((f"resume-{pages}p", build_resume_pdf(pages), expected))
+    pdf, expected = build_two_column_pdf(2)
+    corpus.append(("two-column-2p", pdf, expected))
+
+    if corpus_dir:
+        for filename in sorted(os.listdir(corpus_dir)):
+            if not filename.lower().endswith(".pdf"):
+                continue
+            path = os.path.join(corpus_dir, filename)
+            with open(path, "rb") as f:
+                pdf = f.read()
+            expected = None
+            text_path = os.path.splitext(path)[0] + ".txt"
+            if os.path.exists(text_path):
+                with open(text_path, encoding="utf-8") as f:
+                    expected = f.read()
+            corpus.append((filename, pdf, expected))
+    return corpus
+
+
+def fidelity(extracted: str, expected: str) -> float:
+    """Similarity of the word sequences, 1.0 when every word is present in order"""
+    return difflib.SequenceMatcher(
+        None, expected.split()[:FIDELITY_WORDS], extracted.split()[:FIDELITY_WORDS], autojunk=False
+    ).ratio()
+
+
+async def benchmark_backend(backend: str, corpus, workers: int, rounds: int) -> Optional[Dict[str, Dict]]:
+    """Per-document pages/s and fidelity for one backend, or None if it is not installed"""
+    pdf_extraction.start_pdf_executor(workers, backend=backend)
+    try:
+        # Warm the worker processes (and check the backend's library is installed)
+        await asyncio.gather(*[pdf_extraction.extract_pdf_pages(corpus[0][1]) for _ in range(workers)])
+    except ImportError:
+        pdf_extraction.shutdown_pdf_executor()
+        return None
+
+    results = {}
+    for name, pdf, expected in corpus:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            pages = await pdf_extraction.extract_pdf_pages(pdf)
+        elapsed = (time.perf_counter() - start) / rounds
+        text = "\n".join(pages)
+        results[name] = {
+            "pages": len(pages),
+            "pages_per_s": len(pages) / elapsed if elapsed else float("inf"),
+            "fidelity": fidelity(text, expected) if expected is not None else None
+        }
+    pdf_extraction.shutdown_pdf_executor()
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=PDF_EXTRACT_WORKERS,
+                        help="PDF extraction worker processes")
+    parser.add_argument("--rounds", type=int, default=3, help="Extractions per document (averaged)")
+    parser.add_argument("--corpus", help="Directory of extra sample PDFs (with optional .txt ground truth)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.corpus)
+    print(f"{len(corpus)} documents, {args.workers} extraction workers, {args.rounds} rounds\n")
+    print(f"{'backend':<11}{'document':<22}{'pages':>6}{'pages/s':>10}{'fidelity':>10}")
+
+    for backend in pdf_extraction.PDF_EXTRACT_BACKENDS:
+        results = await benchmark_backend(backend, corpus, args.workers, args.rounds)
+        if results is None:
+            print(f"{backend:<11}not installed")
+            continue
+        for name, result in results.items():
+            score = f"{result['fidelity']:.3f}" if result["fidelity"] is not None else "n/a"
+            print(f"{backend:<11}{name:<22}{result['pages']:>6}{result['pages_per_s']:>10.0f}{score:>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
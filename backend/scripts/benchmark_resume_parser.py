@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent resume parsing for head-of-line blocking
+
+Parses several large generated PDFs concurrently while a small resume is
+uploaded and a probe measures event loop lag. "inline" reproduces the old
+parser (PyPDF2 and a blocking LLM call on the event loop); "pool" is the
+current parser (extraction process pool and async LLM call).
+
+The LLM is simulated with a fixed latency unless --live is given.
+
+Usage:
+    python scripts/benchmark_resume_parser.py [--uploads 4] [--pages 60] [--llm-latency 0.5] [--workers 4]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resume_parser  # noqa: E402
+from config import PDF_EXTRACT_WORKERS  # noqa: E402
+from services import pdf_extraction, resume_parse_cache  # noqa: E402
+
+FAKE_PROFILE = {"name": "Benchmark Candidate", "email": "bench@example.com", "skills": ["Python"]}
+
+RESUME_LINES = [
+    "Benchmark Candidate - Senior Software Engineer",
+    "bench@example.com | (555) 010-0000 | Seattle, WA",
+    "EXPERIENCE",
+    "Acme Corp - Staff Engineer (2019 - Present)",
+    "Led migration of the billing platform to event-driven services, cutting latency by 40%.",
+    "Built Python and FastAPI services handling 20k requests per second on Kubernetes.",
+    "Mentored six engineers and ran the architecture review for the payments team.",
+    "EDUCATION",
+    "BS Computer Science, University of Washington",
+    "SKILLS",
+    "Python, FastAPI, PostgreSQL, Docker, Kubernetes, AWS, React, TypeScript",
+]
+
+
+def build_pdf(page_streams: List[bytes]) -> bytes:
+    """Build a PDF from raw page content streams drawn in Helvetica (no PDF library needed)"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for stream in page_streams:
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_streams))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+
+def resume_page_lines(page: int, lines_per_page: int = 45) -> List[str]:
+    """The text lines of one generated resume page"""
+    return [f"{RESUME_LINES[i % len(RESUME_LINES)]} - page {page + 1}" for i in range(lines_per_page)]
+
+
+def build_resume_pdf(pages: int = 1, lines_per_page: int = 45) -> bytes:
+    """Build a text PDF with the given number of resume-like pages"""
+    streams = []
+    for page in range(pages):
+        lines = [f"({line}) Tj T*" for line in resume_page_lines(page, lines_per_page)]
+        streams.append(("BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(lines) + " ET").encode("latin-1"))
+    return build_pdf(streams)
+
+
+def _fake_response():
+    """A streamed LLM response carrying FAKE_PROFILE in one chunk"""
+    async def stream():
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=json.dumps(FAKE_PROFILE)))])
+    return stream()
+
+
+def use_inline_parser(llm_latency: float):
+    """Restore the old behaviour: extraction and the LLM call block the event loop"""
+    async def extract_on_loop(pdf_bytes, on_progress=None):
+        return pdf_extraction.extract_pages(pdf_bytes)
+
+    async def blocking_completion(**kwargs):
+        time.sleep(llm_latency)
+        return _fake_response()
+
+    resume_parser.extract_pdf_pages = extract_on_loop
+    resume_parser.acompletion = blocking_completion
+
+
+def use_pool_parser(llm_latency: float, live: bool):
+    resume_parser.extract_pdf_pages = pdf_extraction.extract_pdf_pages
+    if live:
+        from litellm import acompletion
+        resume_parser.acompletion = acompletion
+        return
+
+    async def async_completion(**kwargs):
+        await asyncio.sleep(llm_latency)
+        return _fake_response()
+
+    resume_parser.acompletion = async_completion
+
+
+async def run_scenario(large_pdf: bytes, small_pdf: bytes, uploads: int) -> dict:
+    """Parse large PDFs concurrently, then time a small upload and probe loop lag meanwhile"""
+    lags = []
+    stop = asyncio.Event()
+
+    async def probe():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - start - 0.005)
+
+    async def timed_parse(pdf_bytes):
+        start = time.perf_counter()
+        result = await resume_parser.parse_resume_pdf(pdf_bytes)
+        assert result["success"], result
+        return time.perf_counter() - start
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    large = [asyncio.create_task(timed_parse(large_pdf)) for _ in range(uploads)]
+    await asyncio.sleep(0.05)
+    small_latency = await timed_parse(small_pdf)
+    large_latencies = await asyncio.gather(*large)
+    total = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    return {
+        "small_upload_s": small_latency,
+        "large_upload_avg_s": sum(large_latencies) / len(large_latencies),
+        "total_s": total,
+        "max_loop_lag_ms": max(lags) * 1000 if lags else 0.0
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=4, help="Concurrent large uploads")
+    parser.add_argument("--pages", type=int, default=60, help="Pages per large upload")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Simulated LLM latency in seconds")
+    parser.add_argument("--workers", type=int, default=PDF_EXTRACT_WORKERS,
+                        help="PDF extraction worker processes")
+    parser.add_argument("--live", action="store_true", help="Call the real LLM in pool mode (needs GEMINI_API_KEY)")
+    args = parser.parse_args()
+
+    large_pdf = build_resume_pdf(args.pages)
+    small_pdf = build_resume_pdf(1)
+    print(f"{args.uploads} concurrent uploads of {args.pages} pages ({len(large_pdf) / 1024:.0f} KB) "
+          f"+ 1 single-page upload, LLM latency {'live' if args.live else f'{args.llm_latency}s'}, "
+          f"{args.workers} extraction workers\n")
+
+    pdf_extraction.start_pdf_executor(args.workers)
+    # Every upload is the same file, so the parse cache would answer all but the first
+    resume_parse_cache.open_parse_cache("off")
+    # Warm the worker processes so spawn time isn't counted
+    await asyncio.gather(*[pdf_extraction.extract_pdf_pages(small_pdf) for _ in range(args.workers)])
+
+    results = {}
+    use_inline_parser(args.llm_latency)
+    results["inline"] = await run_scenario(large_pdf, small_pdf, args.uploads)
+    use_pool_parser(args.llm_latency, args.live)
+    results["pool"] = await run_scenario(large_pdf, small_pdf, args.uploads)
+    pdf_extraction.shutdown_pdf_executor()
+
+    print(f"{'mode':<8}{'small upload':>14}{'large avg':>12}{'total':>10}{'max loop lag':>15}")
+    for mode, result in results.items():
+        print(f"{mode:<8}{result['small_upload_s']:>13.2f}s{result['large_upload_avg_s']:>11.2f}s"
+              f"{result['total_s']:>9.2f}s{result['max_loop_lag_ms']:>13.0f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,6 +4,7 @@ import logging
 import asyncio
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+from typing import List
 
 # Load environment variables from .env.local in development
 load_dotenv(".env.local")
@@ -14,8 +15,8 @@ from fastapi_mcp import FastApiMCP
 # Import our modules
 from database import (
     init_db, get_session,
-    get_resumes_by_email, create_resume, delete_resume, get_database_stats, 
-    add_to_waitlist, update_waitlist_info, SupabaseSession, create_profile, clear_profile, get_profile_by_user_id
+    get_resumes_by_email, delete_resume, get_database_stats, 
+    add_to_waitlist, update_waitlist_info, SupabaseSession, clear_profile, get_profile_by_user_id
 )
 from auth import get_current_user
 from models import User, UserRead, ResumeRead, WaitlistCreate, WaitlistUpdate, WaitlistRead, ProfileRead
@@ -23,14 +24,32 @@ from resume_parser import parse_resume_pdf
 from admin import create_admin
 from klaviyo_integration import subscribe_to_klaviyo_from_waitlist, update_klaviyo_from_waitlist
 from middleware import custom_cors_middleware, https_redirect_middleware
-from config import MCP_MOUNT_PATH, MCP_OPERATIONS, APP_TITLE, APP_DESCRIPTION, APP_VERSION
+from functions import MCP_OPERATIONS
+from config import (
+    MCP_MOUNT_PATH, APP_TITLE, APP_DESCRIPTION, APP_VERSION,
+    WORKFLOW_CHECKPOINTER, WORKFLOW_CHECKPOINT_SQLITE_PATH, WORKFLOW_CHECKPOINT_POSTGRES_URL,
+    PDF_EXTRACT_WORKERS, PDF_EXTRACT_BACKEND, RESUME_PARSE_CACHE, RESUME_PARSE_CACHE_PATH,
+    RESUME_PARSE_CACHE_MAX_ENTRIES, RESUME_PARSE_CACHE_TTL_SECONDS, RESUME_PARSE_WORKERS, RESUME_PARSE_QUEUE_SIZE,
+    CLIENT_PROBE_INTERVAL_SECONDS, CLIENT_PROBE_TIMEOUT_SECONDS, RESUME_BATCH_MAX_UPLOAD_BYTES
+)
 from chat import (
     ChatCompletionRequest, 
     create_chat_completion, 
     create_chat_completion_stream
 )
-from workflows import workflow_visualizer
+from workflows import BaseWorkflow, workflow_visualizer
+from workflows.checkpointing import open_checkpointer, close_checkpointer, get_checkpointer_backend
 from controllers import upload_router, resume_router
+from clients import start_client_probes, get_client_status, close_clients
+from services import NotFoundException, ServiceUnavailableException, ResumeParseException, UploadTooLargeException
+from services.gap_analysis_service import get_profile_gaps, get_job_gaps, rank_job_postings, iter_job_rankings
+from services.resume_generation_service import generate_resume as generate_resume_for_job
+from services.pdf_extraction import start_pdf_executor, shutdown_pdf_executor
+from services.resume_parse_cache import open_parse_cache, close_parse_cache
+from services.resume_parse_jobs import start_resume_parse_jobs, get_resume_parse_jobs, stop_resume_parse_jobs
+from services.profile_service import save_parsed_resume
+from services.resume_batch_service import is_zip_upload, iter_batch_parse
+from services.upload_ingest import IngestedUpload, UPLOAD_MAX_BYTES, ingest_upload
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -88,6 +107,31 @@ async def lifespan(app: FastAPI):
         await asyncio.sleep(1)  # Ensure database is ready
         await initialize_mcp_server(app)
         
+        # Durable workflow state so multi-turn workflows survive restarts; startup
+        # fails if the configured backend can't be opened
+        await open_checkpointer(
+            WORKFLOW_CHECKPOINTER,
+            sqlite_path=WORKFLOW_CHECKPOINT_SQLITE_PATH,
+            postgres_url=WORKFLOW_CHECKPOINT_POSTGRES_URL
+        )
+        
+        # PDF text extraction runs in worker processes, off the event loop
+        start_pdf_executor(PDF_EXTRACT_WORKERS, backend=PDF_EXTRACT_BACKEND)
+        
+        # Re-uploaded resumes are served from the parse cache
+        open_parse_cache(
+            RESUME_PARSE_CACHE,
+            path=RESUME_PARSE_CACHE_PATH,
+            max_entries=RESUME_PARSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=RESUME_PARSE_CACHE_TTL_SECONDS
+        )
+        
+        # Uploaded resumes submitted as jobs are parsed by a bounded worker pool
+        start_resume_parse_jobs(RESUME_PARSE_WORKERS, max_queued=RESUME_PARSE_QUEUE_SIZE)
+        
+        # External clients are checked in the background so startup never waits on them
+        start_client_probes(CLIENT_PROBE_INTERVAL_SECONDS, timeout=CLIENT_PROBE_TIMEOUT_SECONDS)
+        
         # Generate workflow system documentation
         logger.info("🔄 Generating workflow system documentation...")
         
@@ -109,6 +153,11 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down...")
     app_state.mcp_initialized = False
+    await close_checkpointer()
+    await stop_resume_parse_jobs()
+    shutdown_pdf_executor()
+    close_parse_cache()
+    await close_clients()
 
 
 # Create FastAPI app
@@ -183,9 +232,17 @@ async def get_server_info():
 @app.get("/health", operation_id="check_server_health")
 async def health_check():
     """Health check endpoint."""
+    clients = get_client_status()
     return {
         "status": "healthy",
-        "mcp_ready": app_state.mcp_initialized
+        "mcp_ready": app_state.mcp_initialized,
+        # Ready once every configured external client has passed its probe
+        "ready": app_state.mcp_initialized and all(
+            client["ready"] for client in clients.values() if client.get("configured", True)
+        ),
+        "clients": clients,
+        "workflow_sessions": BaseWorkflow.get_session_store().get_stats(),
+        "workflow_checkpointer": get_checkpointer_backend()
     }
 
 
@@ -413,7 +470,16 @@ async def identify_profile_gaps(
 ):
     """Analyze user's profile to identify missing skills, experience gaps, and improvement areas."""
     logger.info("GET /identify-profile-gaps for user: %s", current_user.email)
-    raise NotImplementedError("Profile gap analysis not yet implemented")
+    
+    analysis = await get_profile_gaps(session, current_user.id)
+    
+    if not analysis:
+        raise HTTPException(
+            status_code=404,
+            detail="Profile not found. Upload a resume to create your profile."
+        )
+    
+    return analysis
 
 
 @app.post("/identify-gaps-per-job", response_model=dict, operation_id="identify_gaps_per_job")
@@ -424,7 +490,62 @@ async def identify_gaps_per_job(
 ):
     """Compare user's profile against a specific job posting to identify skill/experience gaps."""
     logger.info("POST /identify-gaps-per-job job=%d for user: %s", job_posting_id, current_user.email)
-    raise NotImplementedError("Job-specific gap analysis not yet implemented")
+    
+    try:
+        return await get_job_gaps(session, current_user.id, job_posting_id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=e.message)
+
+
+@app.get("/rank-job-postings", operation_id="rank_job_postings")
+async def rank_job_postings_endpoint(
+    stream: bool = False,
+    top_k_gaps: int = 3,
+    current_user: User = Depends(get_current_user),
+    session: SupabaseSession = Depends(get_session)
+):
+    """Rank all of the user's saved job postings by how well their profile fits, with the top gaps for each. Set stream=true for server-sent events in ranked order."""
+    logger.info("GET /rank-job-postings stream=%s for user: %s", stream, current_user.email)
+    
+    if not stream:
+        try:
+            return await rank_job_postings(session, current_user.id, top_k_gaps)
+        except NotFoundException as e:
+            raise HTTPException(status_code=404, detail=e.message)
+    
+    from fastapi.responses import StreamingResponse
+    import json
+    
+    rankings = iter_job_rankings(session, current_user.id, top_k_gaps)
+    try:
+        # Surface a missing profile as a 404 before the stream starts
+        first = await anext(rankings, None)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    
+    async def generate_events():
+        count = 0
+        try:
+            result = first
+            while result is not None:
+                count += 1
+                yield f"data: {json.dumps({'event': 'ranking', 'data': {'rank': count, **result}})}\n\n"
+                result = await anext(rankings, None)
+            
+            yield f"data: {json.dumps({'event': 'complete', 'data': {'count': count}})}\n\n"
+        except Exception as e:
+            logger.error("Error in job ranking stream: %s", e)
+            yield f"data: {json.dumps({'event': 'error', 'data': {'success': False, 'error': str(e)}})}\n\n"
+    
+    return StreamingResponse(
+        generate_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
 
 
 @app.post("/generate-resume", response_model=dict, operation_id="generate_resume")
@@ -433,9 +554,18 @@ async def generate_resume(
     current_user: User = Depends(get_current_user),
     session: SupabaseSession = Depends(get_session)
 ):
-    """Generate a customized resume tailored to a specific job posting. Validates no critical gaps exist."""
+    """Generate a customized resume tailored to a specific job posting and save it as a new resume version."""
     logger.info("POST /generate-resume job=%d for user: %s", job_posting_id, current_user.email)
-    raise NotImplementedError("Resume generation not yet implemented")
+    
+    try:
+        result = await generate_resume_for_job(session, current_user.id, job_posting_id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    
+    return {
+        **result,
+        "resume": ResumeRead.model_validate(result["resume"])
+    }
 
 
 @app.post("/generate-referral", response_model=dict, operation_id="generate_referral")
@@ -461,6 +591,14 @@ async def get_context(
     raise NotImplementedError("Context retrieval not yet implemented")
 
 
+async def _ingest_or_413(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> IngestedUpload:
+    """Receive an upload in chunks, answering 413 as soon as it passes the size limit"""
+    try:
+        return await ingest_upload(file, max_bytes=max_bytes)
+    except UploadTooLargeException as e:
+        raise HTTPException(status_code=413, detail=e.message)
+
+
 @app.post("/parse-resume", response_model=dict, operation_id="parse_resume")
 async def parse_resume_endpoint(
     file: UploadFile = File(...),
@@ -476,57 +614,21 @@ async def parse_resume_endpoint(
             detail="Only PDF files are supported"
         )
     
+    upload = await _ingest_or_413(file)
+    
     try:
-        # Read PDF content
-        pdf_bytes = await file.read()
-        
         # Parse resume using LLM DAG
-        parse_result = await parse_resume_pdf(pdf_bytes)
+        parse_result = await parse_resume_pdf(upload.source, digest=upload.digest)
         
         if not parse_result["success"]:
             return {
                 "success": False,
-                "error": parse_result["error"]
+                "error": parse_result["error"],
+                "partial_profile": parse_result.get("partial_profile")
             }
         
-        # Create profile from parsed data
-        parsed_data = parse_result["profile"]
-        
-        # Convert parsed resume data to profile format
-        profile_data = {
-            "name": parsed_data.get("name"),
-            "email": parsed_data.get("email"),
-            "phone": parsed_data.get("phone"),
-            "location": parsed_data.get("location"),
-            "professional_summary": parsed_data.get("summary"),
-            "years_experience": len(parsed_data.get("experience", [])),
-            "skills": {"raw_skills": parsed_data.get("skills", [])},
-            "experience": {"jobs": parsed_data.get("experience", [])},
-            "education": {"degrees": parsed_data.get("education", [])},
-            "languages": {"spoken": parsed_data.get("languages", [])},
-            "source_documents": {"original_resume": file.filename},
-            "processing_quality": 0.85,  # Default quality score
-            "user_id": current_user.id,
-            "enhancement_status": "basic",
-            "data_sources": {"sources": ["resume_upload"]}
-        }
-        
-        # Create profile in database
-        profile = await create_profile(session, profile_data)
-        
-        # Also create a resume entry for backward compatibility with dashboard
-        resume_data = {
-            "name": parsed_data.get("name"),
-            "email": parsed_data.get("email"),
-            "phone": parsed_data.get("phone"),
-            "professional_summary": parsed_data.get("summary"),
-            "years_experience": len(parsed_data.get("experience", [])),
-            "skills": {"raw_skills": parsed_data.get("skills", [])},
-            "education": {"degrees": parsed_data.get("education", [])},
-            "user_id": current_user.id
-        }
-        
-        resume = await create_resume(session, resume_data)
+        # Save the parsed data as the user's profile
+        profile, resume = await save_parsed_resume(session, parse_result["profile"], file.filename, current_user.id)
         
         return {
             "success": True,
@@ -543,6 +645,8 @@ async def parse_resume_endpoint(
             status_code=500,
             detail=f"Failed to parse resume: {str(e)}"
         )
+    finally:
+        upload.close()
 
 
 @app.post("/parse-resume-stream", operation_id="parse_resume_stream")
@@ -563,12 +667,12 @@ async def parse_resume_stream_endpoint(
     
     from fastapi.responses import StreamingResponse
     import json
-    from resume_parser_stream import parse_resume_pdf_stream
     
-    # Read PDF content before starting the generator
-    pdf_bytes = await file.read()
+    # Receive the PDF before starting the generator
+    upload = await _ingest_or_413(file)
     
     async def generate_events():
+        task = None
         try:
             # Create a queue to collect progress events
             import asyncio
@@ -578,9 +682,16 @@ async def parse_resume_stream_endpoint(
             async def progress_callback(progress_data):
                 await progress_queue.put(progress_data)
             
+            # Parsed fields are forwarded as soon as the LLM has written them
+            async def field_callback(field_data):
+                await progress_queue.put({"field": field_data})
+            
             # Parse resume in background task
             async def parse_task():
-                result = await parse_resume_pdf_stream(pdf_bytes, progress_callback)
+                result = await parse_resume_pdf(
+                    upload.source, progress_callback=progress_callback, field_callback=field_callback,
+                    digest=upload.digest
+                )
                 await progress_queue.put({"done": True, "result": result})
             
             # Start parsing task
@@ -593,6 +704,15 @@ async def parse_resume_stream_endpoint(
                 if "done" in item:
                     result = item["result"]
                     break
+                
+                if "field" in item:
+                    # Yield parsed field event
+                    event = {
+                        "event": "field",
+                        "data": item["field"]
+                    }
+                    yield f"data: {json.dumps(event)}\n\n"
+                    continue
                     
                 # Yield progress event
                 event = {
@@ -602,44 +722,8 @@ async def parse_resume_stream_endpoint(
                 yield f"data: {json.dumps(event)}\n\n"
             
             if result["success"]:
-                # Get parsed data
-                parsed_data = result["profile"]
-                
-                # Convert parsed resume data to profile format
-                profile_data = {
-                    "name": parsed_data.get("name"),
-                    "email": parsed_data.get("email"),
-                    "phone": parsed_data.get("phone"),
-                    "location": parsed_data.get("location"),
-                    "professional_summary": parsed_data.get("summary"),
-                    "years_experience": len(parsed_data.get("experience", [])),
-                    "skills": {"raw_skills": parsed_data.get("skills", [])},
-                    "experience": {"jobs": parsed_data.get("experience", [])},
-                    "education": {"degrees": parsed_data.get("education", [])},
-                    "languages": {"spoken": parsed_data.get("languages", [])},
-                    "source_documents": {"original_resume": file.filename},
-                    "processing_quality": 0.85,  # Default quality score
-                    "user_id": current_user.id,
-                    "enhancement_status": "basic",
-                    "data_sources": {"sources": ["resume_upload"]}
-                }
-                
-                # Create profile in database
-                profile = await create_profile(session, profile_data)
-                
-                # Also create a resume entry for backward compatibility with dashboard
-                resume_data = {
-                    "name": parsed_data.get("name"),
-                    "email": parsed_data.get("email"),
-                    "phone": parsed_data.get("phone"),
-                    "professional_summary": parsed_data.get("summary"),
-                    "years_experience": len(parsed_data.get("experience", [])),
-                    "skills": {"raw_skills": parsed_data.get("skills", [])},
-                    "education": {"degrees": parsed_data.get("education", [])},
-                    "user_id": current_user.id
-                }
-                
-                resume = await create_resume(session, resume_data)
+                # Save the parsed data as the user's profile
+                profile, resume = await save_parsed_resume(session, result["profile"], file.filename, current_user.id)
                 
                 # Send final result
                 final_event = {
@@ -658,7 +742,8 @@ async def parse_resume_stream_endpoint(
                     "event": "error",
                     "data": {
                         "success": False,
-                        "error": result["error"]
+                        "error": result["error"],
+                        "partial_profile": result.get("partial_profile")
                     }
                 }
                 yield f"data: {json.dumps(error_event)}\n\n"
@@ -673,6 +758,161 @@ async def parse_resume_stream_endpoint(
                 }
             }
             yield f"data: {json.dumps(error_event)}\n\n"
+        finally:
+            # Don't leave the parse running if the client disconnected, and let it
+            # unwind before the spooled upload it reads from is removed
+            if task is not None and not task.done():
+                task.cancel()
+                await asyncio.wait({task})
+            upload.close()
+
+    return StreamingResponse(
+        generate_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@app.post("/parse-resume-batch", operation_id="parse_resume_batch")
+async def parse_resume_batch_endpoint(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user),
+    session: SupabaseSession = Depends(get_session)
+):
+    """Parse several resume PDFs (or zip archives of PDFs) and save them as resumes of the user's profile. Streams server-sent events as each file finishes."""
+    logger.info("POST /parse-resume-batch with %d files for user: %s", len(files), current_user.email)
+    
+    for file in files:
+        if file.content_type != "application/pdf" and not is_zip_upload(file.filename, file.content_type):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Only PDF files and zip archives of PDFs are supported ({file.filename})"
+            )
+    
+    from fastapi.responses import StreamingResponse
+    import json
+    
+    uploads = []
+    try:
+        for file in files:
+            uploads.append(await _ingest_or_413(file, max_bytes=RESUME_BATCH_MAX_UPLOAD_BYTES))
+    except HTTPException:
+        for upload in uploads:
+            upload.close()
+        raise
+    
+    results = iter_batch_parse(session, current_user.id, uploads)
+    try:
+        # Surface a missing profile or an invalid batch before the stream starts
+        first = await anext(results)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except ResumeParseException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    except UploadTooLargeException as e:
+        raise HTTPException(status_code=413, detail=e.message)
+    
+    async def generate_events():
+        try:
+            yield f"data: {json.dumps(first)}\n\n"
+            async for event in results:
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error("Error in resume batch stream: %s", e)
+            yield f"data: {json.dumps({'event': 'error', 'data': {'success': False, 'error': str(e)}})}\n\n"
+        finally:
+            await results.aclose()
+    
+    return StreamingResponse(
+        generate_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@app.post("/parse-resume-jobs", status_code=202, operation_id="submit_resume_parse_job")
+async def submit_resume_parse_job(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    session: SupabaseSession = Depends(get_session)
+):
+    """Queue an uploaded resume PDF for background parsing. Returns the job immediately; poll it or subscribe to its events."""
+    logger.info("POST /parse-resume-jobs for user: %s", current_user.email)
+
+    if not file.content_type == "application/pdf":
+        raise HTTPException(
+            status_code=400,
+            detail="Only PDF files are supported"
+        )
+
+    upload = await _ingest_or_413(file)
+    try:
+        return await get_resume_parse_jobs().submit(session, current_user.id, upload)
+    except ServiceUnavailableException as e:
+        raise HTTPException(status_code=503, detail=e.message)
+
+
+@app.get("/parse-resume-jobs/{job_id}", operation_id="get_resume_parse_job")
+async def get_resume_parse_job_endpoint(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    session: SupabaseSession = Depends(get_session)
+):
+    """Get the status, progress and (once finished) result of a resume parse job."""
+    try:
+        return await get_resume_parse_jobs().get(session, job_id, current_user.id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=e.message)
+
+
+@app.post("/parse-resume-jobs/{job_id}/cancel", operation_id="cancel_resume_parse_job")
+async def cancel_resume_parse_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    session: SupabaseSession = Depends(get_session)
+):
+    """Cancel a queued or running resume parse job. Finished jobs are returned unchanged."""
+    logger.info("POST /parse-resume-jobs/%s/cancel for user: %s", job_id, current_user.email)
+    try:
+        return await get_resume_parse_jobs().cancel(session, job_id, current_user.id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except ServiceUnavailableException as e:
+        raise HTTPException(status_code=503, detail=e.message)
+
+
+@app.get("/parse-resume-jobs/{job_id}/events", operation_id="stream_resume_parse_job")
+async def stream_resume_parse_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    session: SupabaseSession = Depends(get_session)
+):
+    """Subscribe to a resume parse job with server-sent events: its status, parsed fields and progress, then a final complete, error or cancelled event. Disconnecting doesn't stop the job."""
+    from fastapi.responses import StreamingResponse
+    import json
+
+    events = get_resume_parse_jobs().subscribe(session, job_id, current_user.id)
+    try:
+        # Surface an unknown job as a 404 before the stream starts
+        first = await anext(events)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=e.message)
+
+    async def generate_events():
+        try:
+            yield f"data: {json.dumps(first)}\n\n"
+            async for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            await events.aclose()
     
     return StreamingResponse(
         generate_events(),
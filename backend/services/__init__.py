@@ -5,6 +5,8 @@ Services package for business logic
 from .exceptions import (
     ServiceException,
     ServiceUnavailableException,
+    NotFoundException,
     ResumeParseException,
+    UploadTooLargeException,
     ExternalAPIException
 ) 
\ No newline at end of file
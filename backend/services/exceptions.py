@@ -17,11 +17,21 @@ class ServiceUnavailableException(ServiceException):
     pass
 
 
+class NotFoundException(ServiceException):
+    """Raised when a requested record does not exist for the user"""
+    pass
+
+
 class ResumeParseException(ServiceException):
     """Raised when resume parsing fails"""
     pass
 
 
+class UploadTooLargeException(ServiceException):
+    """Raised when an uploaded file exceeds its size limit"""
+    pass
+
+
 class ExternalAPIException(ServiceException):
     """Raised when external API call fails"""
     def __init__(self, message: str, api_name: str, status_code: int = None, error_code: str = None):
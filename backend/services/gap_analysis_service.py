@@ -0,0 +1,215 @@
+"""
+Gap analysis service
+Loads a user's profile and ranks skill gaps with the gap engine and job matcher
+"""
+import heapq
+import json
+import logging
+from typing import AsyncIterator, Dict, Any, List, Optional
+from litellm import acompletion
+
+from config import GAP_ADVICE_USE_LLM
+
+from .cache import TTLCache
+from .exceptions import NotFoundException
+from .gap_engine import rank_profile_gaps
+from .job_matcher import iter_profile_job_matches, match_profile_to_job
+from .job_posting_service import job_posting_version, load_job_posting, load_job_postings
+from .profile_features import extract_profile_features
+from .profile_service import load_profile, profile_version
+from .skill_taxonomy import get_skill_taxonomy
+
+logger = logging.getLogger(__name__)
+
+GAP_ADVICE_MODEL = "gemini/gemini-1.5-flash"
+
+# (profile version, posting version, taxonomy version, top_k_gaps) -> job match result
+_job_match_cache = TTLCache(max_entries=20000, ttl_seconds=24 * 3600)
+
+GAP_ADVICE_PROMPT = """You are a career coach. For each skill gap below, write 2 short, specific,
+actionable suggestions tailored to this candidate. Return ONLY a JSON array of arrays of strings,
+one inner array per gap, in the same order.
+
+Candidate: {seniority} level, skills: {skills}
+Gaps:
+{gaps}
+"""
+
+
+async def get_profile_gaps(session, user_id: int, top_k: int = 5,
+                           phrase_with_llm: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+    """
+    Identify the user's most valuable skill gaps
+
+    Args:
+        session: Database session
+        user_id: ID of the user
+        top_k: Maximum number of gaps
+        phrase_with_llm: Let the LLM phrase the suggestions (defaults to config.GAP_ADVICE_USE_LLM)
+
+    Returns:
+        Dict with taxonomy_version, profile_version, seniority and gaps,
+        or None if the user has no profile
+    """
+    profile = await load_profile(session, user_id)
+    if not profile:
+        return None
+
+    features = extract_profile_features(profile)
+    gaps = rank_profile_gaps(profile, features["seniority"]["rank"], top_k=top_k)
+
+    if phrase_with_llm is None:
+        phrase_with_llm = GAP_ADVICE_USE_LLM
+
+    if phrase_with_llm:
+        gaps = await phrase_gap_suggestions(gaps, features)
+
+    return {
+        "taxonomy_version": get_skill_taxonomy().version,
+        "profile_version": profile_version(profile),
+        "seniority": features["seniority"]["level"],
+        "gaps": gaps
+    }
+
+
+async def get_job_gaps(session, user_id: int, job_posting_id: Optional[int] = None,
+                       top_k: int = 5) -> Dict[str, Any]:
+    """
+    Identify gaps between the user's profile and one of their saved job postings
+
+    Args:
+        session: Database session
+        user_id: ID of the user
+        job_posting_id: Job posting to compare against (defaults to the most recently saved one)
+        top_k: Maximum number of gaps
+
+    Returns:
+        Dict with job_posting_id, job_title, company, match_score, matched_skills,
+        gaps and taxonomy_version
+
+    Raises:
+        NotFoundException: If the user has no profile or the job posting does not exist
+    """
+    profile = await load_profile(session, user_id)
+    if not profile:
+        raise NotFoundException("No profile found for user", "PROFILE_NOT_FOUND")
+
+    if job_posting_id:
+        posting = await load_job_posting(session, profile["id"], job_posting_id)
+    else:
+        postings = await load_job_postings(session, profile["id"])
+        posting = postings[0] if postings else None
+    if not posting:
+        raise NotFoundException("Job posting not found", "JOB_POSTING_NOT_FOUND")
+
+    features = extract_profile_features(profile)
+    match = match_profile_to_job(profile, features, posting, top_k_gaps=top_k)
+    return {**match, "taxonomy_version": get_skill_taxonomy().version}
+
+
+async def iter_job_rankings(session, user_id: int, top_k_gaps: int = 3) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Rank every job posting the user has saved by fit, best first
+
+    Profile features are computed once for all postings. Results are cached per
+    (profile version, posting version), so only new or edited postings (or any
+    posting after a profile change) are scored again, in one vectorised pass.
+
+    Args:
+        session: Database session
+        user_id: ID of the user
+        top_k_gaps: Maximum gaps reported per posting
+
+    Yields:
+        Job match results ordered by match_score
+
+    Raises:
+        NotFoundException: If the user has no profile
+    """
+    profile = await load_profile(session, user_id)
+    if not profile:
+        raise NotFoundException("No profile found for user", "PROFILE_NOT_FOUND")
+
+    postings = await load_job_postings(session, profile["id"])
+    version = profile_version(profile)
+    taxonomy_version = get_skill_taxonomy().version
+
+    def cache_key(posting: Dict[str, Any]) -> tuple:
+        return version, job_posting_version(posting), taxonomy_version, top_k_gaps
+
+    cached, misses = [], []
+    for posting in postings:
+        result = _job_match_cache.get(cache_key(posting))
+        if result is None:
+            misses.append(posting)
+        else:
+            cached.append(result)
+    logger.info(f"Ranking {len(postings)} job postings for user {user_id} ({len(cached)} cached)")
+
+    def fresh_results():
+        if not misses:
+            return
+        keys = {posting.get("id"): cache_key(posting) for posting in misses}
+        features = extract_profile_features(profile)
+        for result in iter_profile_job_matches(profile, features, misses, top_k_gaps):
+            _job_match_cache.set(keys[result["job_posting_id"]], result)
+            yield result
+
+    cached.sort(key=lambda result: -result["match_score"])
+    for result in heapq.merge(cached, fresh_results(), key=lambda result: -result["match_score"]):
+        yield result
+
+
+async def rank_job_postings(session, user_id: int, top_k_gaps: int = 3) -> Dict[str, Any]:
+    """
+    Rank every job posting the user has saved by fit
+
+    Returns:
+        Dict with taxonomy_version, count and rankings (best match first)
+
+    Raises:
+        NotFoundException: If the user has no profile
+    """
+    rankings = [result async for result in iter_job_rankings(session, user_id, top_k_gaps)]
+    return {
+        "taxonomy_version": get_skill_taxonomy().version,
+        "count": len(rankings),
+        "rankings": rankings
+    }
+
+
+async def phrase_gap_suggestions(gaps: List[Dict[str, Any]], features: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rewrite gap suggestions with the LLM, keeping the template suggestions if it fails"""
+    if not gaps:
+        return gaps
+
+    gap_lines = "\n".join(f"- {gap['skill']} (current: {gap['current_level']})" for gap in gaps)
+    try:
+        response = await acompletion(
+            model=GAP_ADVICE_MODEL,
+            messages=[{
+                "role": "user",
+                "content": GAP_ADVICE_PROMPT.format(
+                    seniority=features["seniority"]["level"],
+                    skills=", ".join(features["skills"][:30]) or "none listed",
+                    gaps=gap_lines
+                )
+            }],
+            temperature=0.4,
+            max_tokens=500
+        )
+        content = response.choices[0].message.content.strip()
+        if content.startswith("```"):
+            content = content.strip("`").removeprefix("json").strip()
+        suggestions = json.loads(content)
+        if len(suggestions) != len(gaps):
+            raise ValueError(f"expected {len(gaps)} suggestion lists, got {len(suggestions)}")
+    except Exception as e:
+        logger.warning(f"LLM gap phrasing failed, using template suggestions: {e}")
+        return gaps
+
+    return [
+        {**gap, "suggestions": [str(s) for s in phrased][:3] or gap["suggestions"]}
+        if isinstance(phrased, list) else gap
+        for gap, phrased in zip(gaps, suggestions)
+    ]
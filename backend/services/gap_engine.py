@@ -0,0 +1,134 @@
+"""
+Skill gap engine
+Ranks a profile's skill gaps against the skill taxonomy with vectorised scoring (no LLM calls)
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .profile_features import normalize_jobs, normalize_skills
+from .skill_taxonomy import SkillTaxonomy, get_skill_taxonomy
+
+# Weight of a skill that only appears in experience text rather than the skills list
+EXPERIENCE_EVIDENCE_WEIGHT = 0.8
+
+# Share of a skill's score earned without any adjacent skills on the profile
+UNIVERSAL_BASE = 0.5
+SPECIALIST_BASE = 0.1
+
+# Score multiplier for skills whose role is already covered by a substitute the profile has
+SUBSTITUTE_DISCOUNT = 0.3
+
+MIN_GAP_SCORE = 0.05
+HIGH_IMPORTANCE_SCORE = 0.45
+MEDIUM_IMPORTANCE_SCORE = 0.25
+
+SENIOR_RANK = 3
+SENIORITY_SENSITIVE_CATEGORIES = ("Leadership & Product", "Architecture")
+
+
+def profile_skill_vector(profile: Dict[str, Any], taxonomy: SkillTaxonomy) -> np.ndarray:
+    """
+    How strongly the profile evidences each taxonomy skill
+
+    Args:
+        profile: profiles_v2 record
+        taxonomy: Skill taxonomy
+
+    Returns:
+        Vector over the taxonomy: 1.0 for listed skills, less for skills only seen in experience
+    """
+    listed = taxonomy.vectorize(normalize_skills(profile.get("skills")))
+    experience = taxonomy.vectorize(
+        (flatten_text(job) for job in normalize_jobs(profile.get("experience"))),
+        weight=EXPERIENCE_EVIDENCE_WEIGHT,
+        free_text=True
+    )
+    return np.maximum(listed, experience)
+
+
+def score_gaps(known: np.ndarray, seniority_rank: int, taxonomy: SkillTaxonomy) -> np.ndarray:
+    """
+    Score every taxonomy skill as a gap for a profile
+
+    A skill scores highly when it is in demand, closely tied to skills the profile
+    already has (or broadly expected of everyone), not yet evidenced and not an
+    alternative to something the profile already covers.
+    """
+    proximity = (taxonomy.adjacency @ known) / np.maximum(taxonomy.degree, 1e-6)
+    base = np.where(taxonomy.universal, UNIVERSAL_BASE, SPECIALIST_BASE)
+    expectation = np.where(
+        np.isin(taxonomy.categories, SENIORITY_SENSITIVE_CATEGORIES),
+        0.4 + 0.2 * min(seniority_rank, SENIOR_RANK),
+        1.0
+    )
+    substituted = np.where(taxonomy.substitutes @ known > 0, SUBSTITUTE_DISCOUNT, 1.0)
+    return taxonomy.demand * expectation * substituted * (base + (1 - base) * proximity) * (1 - known)
+
+
+def rank_profile_gaps(
+    profile: Dict[str, Any],
+    seniority_rank: int,
+    top_k: int = 5,
+    taxonomy: Optional[SkillTaxonomy] = None
+) -> List[Dict[str, Any]]:
+    """
+    Rank the most valuable skill gaps for a profile
+
+    Args:
+        profile: profiles_v2 record
+        seniority_rank: Rank from the profile's seniority features
+        top_k: Maximum number of gaps to return
+        taxonomy: Taxonomy to score against (defaults to the shared one)
+
+    Returns:
+        Gaps ordered by score, each with skill, current_level, required_level,
+        importance, suggestions, category, related_skills and score
+    """
+    taxonomy = taxonomy or get_skill_taxonomy()
+    known = profile_skill_vector(profile, taxonomy)
+    scores = score_gaps(known, seniority_rank, taxonomy)
+
+    candidates = np.flatnonzero(scores >= MIN_GAP_SCORE)
+    ranked = candidates[np.argsort(-scores[candidates], kind="stable")][:top_k]
+    return [_describe_gap(int(row), float(scores[row]), known, seniority_rank, taxonomy) for row in ranked]
+
+
+def _describe_gap(row: int, score: float, known: np.ndarray, seniority_rank: int,
+                  taxonomy: SkillTaxonomy) -> Dict[str, Any]:
+    support = taxonomy.adjacency[row] * known
+    related_rows = [int(r) for r in np.argsort(-support)[:2] if support[r] > 0]
+    related = [taxonomy.names[r] for r in related_rows]
+
+    if known[row] > 0:
+        current_level = "Mentioned in experience"
+    elif related:
+        current_level = f"Adjacent experience ({', '.join(related)})"
+    else:
+        current_level = "No experience yet"
+
+    senior_target = seniority_rank >= SENIOR_RANK and taxonomy.demand[row] >= 0.7
+    importance = ("high" if score >= HIGH_IMPORTANCE_SCORE
+                  else "medium" if score >= MEDIUM_IMPORTANCE_SCORE else "low")
+
+    return {
+        "skill": taxonomy.names[row],
+        "current_level": current_level,
+        "required_level": "Advanced" if senior_target else "Working proficiency",
+        "importance": importance,
+        "suggestions": taxonomy.suggestions_for(row),
+        "category": taxonomy.categories[row],
+        "related_skills": related,
+        "score": round(score, 3)
+    }
+
+
+def flatten_text(value: Any) -> str:
+    """All string values of a nested JSON value joined into one text"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return " ".join(flatten_text(v) for v in value.values())
+    if isinstance(value, list):
+        return " ".join(flatten_text(v) for v in value)
+    return ""
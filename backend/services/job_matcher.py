@@ -0,0 +1,286 @@
+"""
+Job matcher
+Scores profiles against job postings through an inverted index of canonical job skills
+"""
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .cache import TTLCache
+from .gap_engine import flatten_text, profile_skill_vector
+from .job_posting_service import job_posting_version
+from .profile_features import normalize_skills
+from .skill_taxonomy import SkillTaxonomy, get_skill_taxonomy
+
+IMPORTANCE_WEIGHTS = {"critical": 1.0, "important": 0.7, "preferred": 0.4}
+REQUIRED_LEVELS = {
+    "critical": "Strong hands-on experience",
+    "important": "Working proficiency",
+    "preferred": "Familiarity"
+}
+
+# Credit for a requirement covered by an adjacent or substitute skill instead of the skill itself
+ADJACENT_CREDIT = 0.5
+SUBSTITUTE_CREDIT = 0.6
+
+# Share of the match score driven by years of experience when the posting asks for them
+YEARS_WEIGHT = 0.15
+
+MIN_GAP_DEFICIT = 0.1
+HIGH_SEVERITY_DEFICIT = 0.6
+MEDIUM_SEVERITY_DEFICIT = 0.3
+
+_PREFERRED_PATTERN = re.compile(
+    r"\b(preferred|nice[ -]to[ -]have|bonus|plus|desirable|ideally|familiarity)\b", re.IGNORECASE
+)
+_CRITICAL_PATTERN = re.compile(r"\b(required|must|essential|expert|proficien\w*|deep|strong)\b", re.IGNORECASE)
+_YEARS_PATTERN = re.compile(r"\b(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years?|yrs?)\b", re.IGNORECASE)
+_ITEM_SPLIT_PATTERN = re.compile(r"[\n;\u2022\u00b7]+|(?<=\.)\s+")
+
+# (posting id:updated_at, taxonomy version) -> extracted requirements
+_requirements_cache = TTLCache(max_entries=4096, ttl_seconds=24 * 3600)
+
+
+def extract_job_requirements(posting: Dict[str, Any], taxonomy: Optional[SkillTaxonomy] = None) -> Dict[str, Any]:
+    """
+    Normalise a posting's requirements to canonical taxonomy skills
+
+    Args:
+        posting: job_postings_v2 record
+        taxonomy: Taxonomy to normalise against (defaults to the shared one)
+
+    Returns:
+        Dict with ``skills`` (skill row -> importance weight) and ``min_years``
+    """
+    taxonomy = taxonomy or get_skill_taxonomy()
+    cache_key = (job_posting_version(posting), taxonomy.version) if posting.get("id") is not None else None
+    if cache_key:
+        cached = _requirements_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    weights: Dict[int, float] = {}
+
+    def add(rows: Iterable[int], weight: float):
+        for row in rows:
+            weights[row] = max(weights.get(row, 0.0), weight)
+
+    # A skill in the title ("React Native Engineer") is the core of the role
+    add(taxonomy.match(posting.get("title") or "", free_text=True), IMPORTANCE_WEIGHTS["critical"])
+
+    requirements_text = flatten_text(posting.get("requirements"))
+    for item in _ITEM_SPLIT_PATTERN.split(requirements_text):
+        add(taxonomy.match(item, free_text=True), IMPORTANCE_WEIGHTS[_item_importance(item)])
+
+    for keyword in normalize_skills(posting.get("keywords")):
+        add(taxonomy.match(keyword), IMPORTANCE_WEIGHTS["important"])
+
+    add(taxonomy.match(posting.get("job_description") or "", free_text=True), IMPORTANCE_WEIGHTS["preferred"])
+
+    years = [int(value) for value in _YEARS_PATTERN.findall(requirements_text)]
+    requirements = {"skills": weights, "min_years": max(years) if years else None}
+    if cache_key:
+        _requirements_cache.set(cache_key, requirements)
+    return requirements
+
+
+def skill_credit(known: np.ndarray, taxonomy: SkillTaxonomy) -> np.ndarray:
+    """How far each taxonomy skill is covered by a profile, counting adjacent and substitute skills"""
+    adjacent = (taxonomy.adjacency * known).max(axis=1) * ADJACENT_CREDIT
+    substitute = (taxonomy.substitutes * known).max(axis=1) * SUBSTITUTE_CREDIT
+    return np.maximum(known, np.maximum(adjacent, substitute))
+
+
+class JobIndex:
+    """
+    Inverted index from canonical skill to the postings that ask for it
+
+    Built once for a set of postings; scoring a profile only touches the index
+    entries of skills the profile has any credit for.
+    """
+
+    def __init__(self, postings: List[Dict[str, Any]], taxonomy: Optional[SkillTaxonomy] = None):
+        self.taxonomy = taxonomy or get_skill_taxonomy()
+        self.postings = postings
+        self.requirements = [extract_job_requirements(posting, self.taxonomy) for posting in postings]
+
+        entry_postings, entry_skills, entry_weights = [], [], []
+        for position, requirements in enumerate(self.requirements):
+            for row, weight in requirements["skills"].items():
+                entry_postings.append(position)
+                entry_skills.append(row)
+                entry_weights.append(weight)
+
+        entry_skills = np.array(entry_skills, dtype=np.int64)
+        order = np.argsort(entry_skills, kind="stable")
+        self._skills = entry_skills[order]
+        self._postings = np.array(entry_postings, dtype=np.int64)[order]
+        self._weights = np.array(entry_weights, dtype=np.float32)[order]
+        # Entries for skill row r live in [_offsets[r], _offsets[r + 1])
+        self._offsets = np.searchsorted(self._skills, np.arange(len(self.taxonomy) + 1))
+        self._total_weight = np.bincount(self._postings, self._weights, minlength=len(postings))
+        self._min_years = np.array(
+            [requirements["min_years"] or 0 for requirements in self.requirements], dtype=np.float32
+        )
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    def score(self, credit: np.ndarray, total_years: float) -> np.ndarray:
+        """
+        Match scores (0-1) of every posting for a profile
+
+        Args:
+            credit: Per-skill coverage from skill_credit
+            total_years: Profile's total years of experience
+
+        Returns:
+            Array of scores aligned with ``postings``
+        """
+        active = np.flatnonzero(credit)
+        spans = [np.arange(self._offsets[row], self._offsets[row + 1]) for row in active]
+        entries = np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+        covered = np.bincount(
+            self._postings[entries],
+            self._weights[entries] * credit[self._skills[entries]],
+            minlength=len(self.postings)
+        )
+        # A posting with no recognised skills gives no evidence of fit, so it scores 0
+        skill_fit = np.divide(covered, self._total_weight, out=np.zeros(len(self.postings)),
+                              where=self._total_weight > 0)
+
+        asks_years = self._min_years > 0
+        years_fit = np.minimum(1.0, total_years / np.maximum(self._min_years, 1))
+        return np.where(asks_years, (1 - YEARS_WEIGHT) * skill_fit + YEARS_WEIGHT * years_fit, skill_fit)
+
+    def gaps(self, position: int, known: np.ndarray, credit: np.ndarray, total_years: float,
+             top_k: int = 5) -> List[Dict[str, Any]]:
+        """Ranked gaps between a profile and one posting, most severe first"""
+        taxonomy = self.taxonomy
+        requirements = self.requirements[position]
+        ranked = []
+
+        for row, weight in requirements["skills"].items():
+            deficit = weight * (1 - float(credit[row]))
+            if deficit < MIN_GAP_DEFICIT:
+                continue
+            importance = _importance_label(weight)
+            ranked.append((deficit, {
+                "requirement": taxonomy.names[row],
+                "job_importance": importance,
+                "user_level": _user_level(row, known, taxonomy),
+                "required_level": REQUIRED_LEVELS[importance],
+                "gap_severity": _severity(deficit),
+                "suggestions": taxonomy.suggestions_for(row)
+            }))
+
+        min_years = requirements["min_years"]
+        if min_years and total_years < min_years:
+            deficit = min(1.0, (min_years - total_years) / min_years + 0.3)
+            ranked.append((deficit, {
+                "requirement": f"{min_years}+ years experience",
+                "job_importance": "critical",
+                "user_level": f"{total_years} years",
+                "required_level": f"{min_years}+ years",
+                "gap_severity": _severity(deficit),
+                "suggestions": [
+                    "Highlight the scope and impact of your existing roles",
+                    "Emphasise ownership and leadership to offset fewer years"
+                ]
+            }))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return [gap for _, gap in ranked[:top_k]]
+
+    def matched_skills(self, position: int, credit: np.ndarray) -> List[str]:
+        """Posting skills the profile already covers"""
+        return [self.taxonomy.names[row] for row in self.requirements[position]["skills"] if credit[row] >= 0.8]
+
+
+def iter_profile_job_matches(
+    profile: Dict[str, Any],
+    features: Dict[str, Any],
+    postings: List[Dict[str, Any]],
+    top_k_gaps: int = 5,
+    taxonomy: Optional[SkillTaxonomy] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Match one profile against many job postings, best match first
+
+    Every posting is scored in one vectorised pass up front; the per-posting gap
+    details are only built as results are consumed.
+
+    Args:
+        profile: profiles_v2 record
+        features: Features from extract_profile_features
+        postings: job_postings_v2 records
+        top_k_gaps: Maximum gaps reported per posting
+        taxonomy: Taxonomy to match against (defaults to the shared one)
+
+    Yields:
+        One result per posting with job_posting_id, job_title, company,
+        match_score (0-100), matched_skills and gaps
+    """
+    index = JobIndex(postings, taxonomy)
+    known = profile_skill_vector(profile, index.taxonomy)
+    credit = skill_credit(known, index.taxonomy)
+    total_years = features["tenure"]["total_years"] or 0
+    scores = index.score(credit, total_years)
+
+    for position in np.argsort(-scores, kind="stable"):
+        posting = postings[position]
+        yield {
+            "job_posting_id": posting.get("id"),
+            "job_title": posting.get("title"),
+            "company": posting.get("company_name"),
+            "match_score": int(round(float(scores[position]) * 100)),
+            "matched_skills": index.matched_skills(position, credit),
+            "gaps": index.gaps(position, known, credit, total_years, top_k_gaps)
+        }
+
+
+def match_profile_to_jobs(
+    profile: Dict[str, Any],
+    features: Dict[str, Any],
+    postings: List[Dict[str, Any]],
+    top_k_gaps: int = 5,
+    taxonomy: Optional[SkillTaxonomy] = None
+) -> List[Dict[str, Any]]:
+    """Match one profile against many job postings; see iter_profile_job_matches"""
+    return list(iter_profile_job_matches(profile, features, postings, top_k_gaps, taxonomy))
+
+
+def match_profile_to_job(profile: Dict[str, Any], features: Dict[str, Any], posting: Dict[str, Any],
+                         top_k_gaps: int = 5) -> Dict[str, Any]:
+    """Match one profile against a single job posting"""
+    return match_profile_to_jobs(profile, features, [posting], top_k_gaps)[0]
+
+
+def _item_importance(item: str) -> str:
+    if _PREFERRED_PATTERN.search(item):
+        return "preferred"
+    if _CRITICAL_PATTERN.search(item) or _YEARS_PATTERN.search(item):
+        return "critical"
+    return "important"
+
+
+def _importance_label(weight: float) -> str:
+    return next(label for label, value in IMPORTANCE_WEIGHTS.items() if weight >= value)
+
+
+def _severity(deficit: float) -> str:
+    if deficit >= HIGH_SEVERITY_DEFICIT:
+        return "high"
+    return "medium" if deficit >= MEDIUM_SEVERITY_DEFICIT else "low"
+
+
+def _user_level(row: int, known: np.ndarray, taxonomy: SkillTaxonomy) -> str:
+    if known[row] > 0:
+        return "Mentioned in experience"
+    support = np.maximum(taxonomy.adjacency[row], taxonomy.substitutes[row]) * known
+    related = [taxonomy.names[r] for r in np.argsort(-support)[:2] if support[r] > 0]
+    if related:
+        return f"Related experience ({', '.join(related)})"
+    return "No experience"
@@ -0,0 +1,51 @@
+"""
+Job posting loading service
+Shared loaders for a profile's job_postings_v2 rows
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+async def load_job_posting(session, profile_id: int, job_posting_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Load one of the profile's job postings
+
+    Args:
+        session: Database session (a new one is created if None)
+        profile_id: ID of the owning profile
+        job_posting_id: ID of the job posting
+
+    Returns:
+        The job posting record, or None if it does not exist for this profile
+    """
+    # Import here so workflow graphs can be built without a configured database
+    from database import SupabaseSession, get_job_posting_by_id
+
+    if session is None:
+        session = SupabaseSession()
+
+    posting = await get_job_posting_by_id(session, job_posting_id, profile_id)
+    if not posting:
+        logger.info(f"Job posting {job_posting_id} not found for profile {profile_id}")
+    return posting
+
+
+async def load_job_postings(session, profile_id: int) -> List[Dict[str, Any]]:
+    """Load every job posting saved to the profile, newest first"""
+    from database import SupabaseSession, get_job_postings_by_profile_id
+
+    if session is None:
+        session = SupabaseSession()
+
+    return await get_job_postings_by_profile_id(session, profile_id)
+
+
+def job_posting_version(posting: Dict[str, Any]) -> str:
+    """Version tag for a job posting; changes whenever the row is updated"""
+    updated_at = posting.get("updated_at")
+    if isinstance(updated_at, datetime):
+        updated_at = updated_at.isoformat()
+    return f"{posting.get('id')}:{updated_at}"
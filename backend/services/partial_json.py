@@ -0,0 +1,111 @@
+"""
+Partial JSON parsing
+Parses a JSON object while it is still being streamed by an LLM, yielding each
+top-level field and each item of a top-level array as soon as it is complete
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+
+class PartialJSONScanner:
+    """
+    Incrementally parses streamed text for a top-level JSON object.
+
+    Text before the opening brace (such as a markdown fence) is skipped. Each call
+    to feed() scans only the new text and returns the values it completed:
+
+    - {"field": key, "index": i, "value": item} for each item of an array field
+    - {"field": key, "value": value} for each top-level field
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self.completed_fields = 0
+        self._text = ""
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._has_value = False
+        self._value_start = 0
+        self._array_key: Optional[str] = None
+        self._item_start = 0
+        self._item_index = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Parse more streamed text; returns the fields and array items it completed"""
+        events: List[Dict[str, Any]] = []
+        offset = len(self._text)
+        self._text += text
+
+        for position, char in enumerate(text, start=offset):
+            if self.finished:
+                break
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and not self._has_value:
+                        self._key = self._load(self._string_start, position + 1)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._has_value:
+                    self._array_key = self._key
+                    self._item_start = position + 1
+                    self._item_index = 0
+            elif char in "}]":
+                if self._depth == 2 and self._array_key is not None:
+                    self._end_item(position, events)
+                    self._array_key = None
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end_field(position, events)
+                    self.finished = True
+            elif char == ":" and self._depth == 1:
+                self._has_value = True
+                self._value_start = position + 1
+            elif char == "," and self._depth == 1:
+                self._end_field(position, events)
+            elif char == "," and self._depth == 2 and self._array_key is not None:
+                self._end_item(position, events)
+        return events
+
+    def _load(self, start: int, stop: int) -> Any:
+        return json.loads(self._text[start:stop])
+
+    def _end_item(self, position: int, events: List[Dict[str, Any]]) -> None:
+        raw = self._text[self._item_start:position].strip()
+        self._item_start = position + 1
+        if not raw:
+            return
+        try:
+            events.append({"field": self._array_key, "index": self._item_index, "value": json.loads(raw)})
+        except json.JSONDecodeError:
+            pass
+        self._item_index += 1
+
+    def _end_field(self, position: int, events: List[Dict[str, Any]]) -> None:
+        if not self._has_value:
+            return
+        self.completed_fields += 1
+        self._has_value = False
+        try:
+            events.append({"field": self._key, "value": self._load(self._value_start, position)})
+        except json.JSONDecodeError:
+            pass
@@ -0,0 +1,195 @@
+"""
+PDF text extraction
+Runs a pluggable extraction backend in a process pool so parsing large PDFs never
+blocks the event loop
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from io import BytesIO
+from typing import Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+from config import PDF_EXTRACT_BACKEND, PDF_EXTRACT_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Pages per worker task; batches of a large PDF are extracted in parallel
+PDF_EXTRACT_BATCH_PAGES = 8
+
+# Bump when a backend's extraction code changes the text it produces, so cached text is re-extracted
+PDF_EXTRACT_VERSION = 1
+
+# A PDF's bytes, or the path of a spooled upload; workers open paths themselves so
+# large files aren't pickled to every worker
+PdfSource = Union[bytes, str]
+
+_executor: Optional[ProcessPoolExecutor] = None
+_backend: str = PDF_EXTRACT_BACKEND
+
+
+def _open(source: PdfSource) -> BinaryIO:
+    return open(source, "rb") if isinstance(source, str) else BytesIO(source)
+
+
+# ==================== EXTRACTION BACKENDS ====================
+# Each backend extracts pages [start, stop) and also returns the document's page
+# count. Backends run in worker processes, so optional libraries are imported lazily.
+
+def _extract_pypdf2(source: PdfSource, start: int, stop: int) -> Tuple[int, List[str]]:
+    """PyPDF2: pure Python, always installed"""
+    import PyPDF2
+
+    with _open(source) as stream:
+        pages = PyPDF2.PdfReader(stream).pages
+        return len(pages), [pages[i].extract_text() or "" for i in range(start, min(stop, len(pages)))]
+
+
+def _extract_pypdfium2(source: PdfSource, start: int, stop: int) -> Tuple[int, List[str]]:
+    """pypdfium2: PDFium bindings, much faster and keeps reading order on most layouts"""
+    import pypdfium2
+
+    # Takes a path or bytes directly
+    document = pypdfium2.PdfDocument(source)
+    try:
+        texts = []
+        for i in range(start, min(stop, len(document))):
+            page = document[i]
+            text_page = page.get_textpage()
+            texts.append(text_page.get_text_range())
+            text_page.close()
+            page.close()
+        return len(document), texts
+    finally:
+        document.close()
+
+
+def _extract_pdfminer(source: PdfSource, start: int, stop: int) -> Tuple[int, List[str]]:
+    """pdfminer.six: layout analysis, best on multi-column resumes but slowest"""
+    from pdfminer.high_level import extract_pages as pdfminer_pages
+    from pdfminer.layout import LTTextContainer
+    from pdfminer.pdfpage import PDFPage
+
+    with _open(source) as stream:
+        page_count = sum(1 for _ in PDFPage.get_pages(stream))
+        stream.seek(0)
+        texts = [
+            "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+            for layout in pdfminer_pages(stream, page_numbers=range(start, min(stop, page_count)))
+        ]
+    return page_count, texts
+
+
+PDF_EXTRACT_BACKENDS: Dict[str, Callable[[PdfSource, int, int], Tuple[int, List[str]]]] = {
+    "pypdf2": _extract_pypdf2,
+    "pypdfium2": _extract_pypdfium2,
+    "pdfminer": _extract_pdfminer,
+}
+
+# Distribution of each backend's library, whose version is part of the extractor id
+_BACKEND_DISTRIBUTIONS = {"pypdf2": "PyPDF2", "pypdfium2": "pypdfium2", "pdfminer": "pdfminer.six"}
+
+
+@functools.lru_cache(maxsize=None)
+def _library_version(backend: str) -> str:
+    try:
+        return metadata.version(_BACKEND_DISTRIBUTIONS[backend])
+    except metadata.PackageNotFoundError:
+        return "missing"
+
+
+def extractor_id() -> str:
+    """Backend, library version and PDF_EXTRACT_VERSION of the current extractor, e.g. "pypdf2-3.0.1-v1" """
+    return f"{_backend}-{_library_version(_backend)}-v{PDF_EXTRACT_VERSION}"
+
+
+# ==================== PROCESS POOL ====================
+
+def start_pdf_executor(
+    max_workers: int = PDF_EXTRACT_WORKERS,
+    backend: str = PDF_EXTRACT_BACKEND
+) -> ProcessPoolExecutor:
+    """Create the extraction process pool (replacing any existing one) and select its backend"""
+    global _executor, _backend
+    if backend not in PDF_EXTRACT_BACKENDS:
+        raise ValueError(f"Unknown PDF extraction backend: {backend}")
+    shutdown_pdf_executor()
+    _backend = backend
+    # Spawned workers don't inherit the server's threads or open connections
+    _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    logger.info(f"Started PDF extraction pool with {max_workers} workers ({backend})")
+    return _executor
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """The shared extraction process pool, started on first use"""
+    return _executor or start_pdf_executor()
+
+
+def shutdown_pdf_executor():
+    """Stop the extraction process pool"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def extract_page_range(
+    source: PdfSource, start: int, stop: int, backend: str = PDF_EXTRACT_BACKEND
+) -> Tuple[int, List[str]]:
+    """Extract the text of pages [start, stop) and count all pages (runs in a worker process)"""
+    return PDF_EXTRACT_BACKENDS[backend](source, start, stop)
+
+
+def extract_pages(source: PdfSource, backend: str = PDF_EXTRACT_BACKEND) -> List[str]:
+    """Extract the text of every page in the current process"""
+    page_count, texts = extract_page_range(source, 0, PDF_EXTRACT_BATCH_PAGES, backend)
+    if page_count > PDF_EXTRACT_BATCH_PAGES:
+        texts += extract_page_range(source, PDF_EXTRACT_BATCH_PAGES, page_count, backend)[1]
+    return texts
+
+
+async def extract_pdf_pages(
+    source: PdfSource,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None
+) -> List[str]:
+    """
+    Extract the text of every page without blocking the event loop
+
+    The first batch of pages also yields the page count; the remaining batches
+    are then spread across the pool's workers.
+
+    Args:
+        source: The PDF's bytes, or the path of a spooled upload
+        on_progress: Awaited with (pages_done, page_count) as batches of pages finish
+
+    Returns:
+        The text of each page, in order
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_pdf_executor()
+    backend = _backend
+    batch = PDF_EXTRACT_BATCH_PAGES
+
+    page_count, first = await loop.run_in_executor(executor, extract_page_range, source, 0, batch, backend)
+    if on_progress:
+        await on_progress(len(first), page_count)
+
+    async def extract_batch(start: int) -> Tuple[int, List[str]]:
+        _, texts = await loop.run_in_executor(
+            executor, extract_page_range, source, start, start + batch, backend
+        )
+        return start, texts
+
+    pages = {0: first}
+    done = len(first)
+    for finished in asyncio.as_completed([extract_batch(start) for start in range(batch, page_count, batch)]):
+        start, texts = await finished
+        pages[start] = texts
+        done += len(texts)
+        if on_progress:
+            await on_progress(done, page_count)
+
+    return [text for start in sorted(pages) for text in pages[start]]
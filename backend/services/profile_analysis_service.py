@@ -0,0 +1,134 @@
+"""
+Profile analysis service
+Computes profile features and LLM-written insights, cached per profile version
+"""
+import json
+import logging
+from typing import Dict, Any, Optional
+from litellm import acompletion
+
+from .cache import TTLCache
+from .profile_features import extract_profile_features
+from .profile_service import load_profile, profile_version
+
+logger = logging.getLogger(__name__)
+
+INSIGHTS_MODEL = "gemini/gemini-1.5-flash"
+
+INSIGHTS_PROMPT = """You are a career coach analyzing a candidate's profile.
+Using ONLY the facts below, write a concise markdown analysis with three sections:
+**Key Strengths**, **Career Highlights** and **Growth Opportunities** (2-3 bullets each).
+Be encouraging and specific; do not invent employers, skills or numbers.
+
+Profile facts:
+{features}
+"""
+
+# user_id -> analysis; entries are only reused while the profile version matches
+_analysis_cache = TTLCache(max_entries=2048, ttl_seconds=24 * 3600)
+# Template fallbacks used while the LLM is failing; kept briefly so the LLM is retried soon
+_fallback_cache = TTLCache(max_entries=2048, ttl_seconds=300)
+
+
+async def get_profile_analysis(session, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the analysis for a user's profile, recomputing only if the profile changed
+
+    Args:
+        session: Database session
+        user_id: ID of the user
+
+    Returns:
+        Dict with profile_version, features, insights and cached flag,
+        or None if the user has no profile
+    """
+    profile = await load_profile(session, user_id)
+    if not profile:
+        return None
+
+    version = profile_version(profile)
+    for cache in (_analysis_cache, _fallback_cache):
+        cached = cache.get(user_id)
+        if cached and cached["profile_version"] == version:
+            logger.info(f"Profile analysis cache hit for user {user_id}")
+            return {**cached, "cached": True}
+
+    features = extract_profile_features(profile)
+    insights = await generate_profile_insights(features)
+    cache = _analysis_cache
+    if insights is None:
+        insights = render_template_insights(features)
+        cache = _fallback_cache
+
+    analysis = {
+        "profile_version": version,
+        "features": features,
+        "insights": insights
+    }
+    cache.set(user_id, analysis)
+    return {**analysis, "cached": False}
+
+
+async def generate_profile_insights(features: Dict[str, Any]) -> Optional[str]:
+    """Write profile insights with the LLM; None if it is unavailable or returns nothing"""
+    try:
+        response = await acompletion(
+            model=INSIGHTS_MODEL,
+            messages=[{
+                "role": "user",
+                "content": INSIGHTS_PROMPT.format(features=json.dumps(features, indent=2, default=str))
+            }],
+            temperature=0.4,
+            max_tokens=600
+        )
+        content = response.choices[0].message.content
+        if content and content.strip():
+            return content.strip()
+    except Exception as e:
+        logger.warning(f"LLM profile insights failed, using template: {e}")
+
+    return None
+
+
+def render_template_insights(features: Dict[str, Any]) -> str:
+    """Deterministic insights built directly from the features"""
+    tenure = features["tenure"]
+    seniority = features["seniority"]
+    clusters = sorted(features["skill_clusters"].items(), key=lambda item: len(item[1]), reverse=True)
+    top_clusters = [name for name, _ in clusters if name != "Other"][:2]
+
+    strengths = []
+    if tenure["total_years"]:
+        strengths.append(f"- {tenure['total_years']} years of experience across {tenure['roles_count']} role(s)")
+    if top_clusters:
+        strengths.append(f"- Strongest skill areas: {', '.join(top_clusters)}")
+    if features["education"]:
+        strengths.append(f"- {features['education'][0]}")
+    if not strengths:
+        strengths.append("- Add experience and skills to your profile for a fuller analysis")
+
+    highlights = []
+    if tenure["current_title"]:
+        company = f" at {tenure['current_company']}" if tenure["current_company"] else ""
+        highlights.append(f"- Currently {tenure['current_title']}{company}")
+    highlights.append(f"- Profile reads as **{seniority['level']}** level")
+    if tenure["average_years_per_role"]:
+        highlights.append(f"- Average tenure of {tenure['average_years_per_role']} years per role")
+
+    missing_clusters = [name for name in ("Cloud & DevOps", "Leadership & Product", "Data & ML")
+                        if name not in features["skill_clusters"]]
+    growth = [f"- Consider building depth in {name}" for name in missing_clusters[:2]]
+    growth.append("- Quantify achievements in your experience entries to strengthen your profile")
+
+    return "\n".join([
+        "Based on your profile analysis:",
+        "",
+        "**Key Strengths:**",
+        *strengths,
+        "",
+        "**Career Highlights:**",
+        *highlights,
+        "",
+        "**Growth Opportunities:**",
+        *growth
+    ])
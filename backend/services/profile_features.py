@@ -0,0 +1,193 @@
+"""
+Profile feature extraction
+Derives skill clusters, tenure and seniority signals from a profiles_v2 row
+"""
+import re
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+# Skill keyword -> cluster; matched against lower-cased skill names
+SKILL_CLUSTERS = {
+    "Frontend": ["react", "vue", "angular", "javascript", "typescript", "html", "css", "next.js", "svelte", "redux"],
+    "Backend": ["python", "java", "node", "go", "golang", "ruby", "rails", "django", "fastapi", "flask", "spring", "c#", ".net", "php", "rust", "api"],
+    "Data & ML": ["sql", "pandas", "numpy", "machine learning", "ml", "tensorflow", "pytorch", "spark", "data", "statistics", "llm", "nlp"],
+    "Cloud & DevOps": ["aws", "gcp", "azure", "docker", "kubernetes", "terraform", "ci/cd", "linux", "devops", "cloud"],
+    "Mobile": ["ios", "android", "swift", "kotlin", "react native", "flutter"],
+    "Databases": ["postgres", "postgresql", "mysql", "mongodb", "redis", "supabase", "dynamodb", "elasticsearch"],
+    "Leadership & Product": ["leadership", "management", "mentoring", "agile", "scrum", "product", "stakeholder", "communication"]
+}
+
+# Title keyword -> seniority rank (higher is more senior)
+SENIORITY_KEYWORDS = {
+    "intern": 0, "junior": 1, "associate": 1, "engineer": 2, "developer": 2,
+    "senior": 3, "lead": 4, "staff": 4, "principal": 5, "manager": 4,
+    "architect": 5, "head": 6, "director": 6, "vp": 7, "chief": 8, "cto": 8
+}
+
+SENIORITY_LEVELS = ["Intern", "Junior", "Mid-level", "Senior", "Lead", "Principal", "Head", "VP", "Executive"]
+
+_YEAR_PATTERN = re.compile(r"\b(19[5-9]\d|20\d{2})\b")
+_PRESENT_PATTERN = re.compile(r"\b(present|current|now|today)\b", re.IGNORECASE)
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+
+def extract_profile_features(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute derived features for a profile
+
+    Args:
+        profile: profiles_v2 record
+
+    Returns:
+        Dict with skills, skill_clusters, tenure, seniority and education summary
+    """
+    skills = normalize_skills(profile.get("skills"))
+    jobs = normalize_jobs(profile.get("experience"))
+    tenure = _compute_tenure(jobs, profile.get("years_experience"))
+
+    return {
+        "name": profile.get("name"),
+        "skills": skills,
+        "skill_clusters": cluster_skills(skills),
+        "tenure": tenure,
+        "seniority": _seniority_signals(jobs, tenure["total_years"]),
+        "education": _summarize_education(profile.get("education")),
+        "primary_domain": profile.get("primary_domain")
+    }
+
+
+def normalize_skills(skills_field: Any) -> List[str]:
+    """Flatten the skills JSONB (e.g. {"raw_skills": [...]}) into unique skill names"""
+    collected: List[str] = []
+
+    def collect(value: Any):
+        if isinstance(value, str):
+            collected.append(value.strip())
+        elif isinstance(value, dict):
+            name = value.get("name") or value.get("skill")
+            if name:
+                collected.append(str(name).strip())
+            else:
+                for nested in value.values():
+                    collect(nested)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+
+    collect(skills_field)
+
+    seen = set()
+    unique = []
+    for skill in collected:
+        key = skill.lower()
+        if skill and key not in seen:
+            seen.add(key)
+            unique.append(skill)
+    return unique
+
+
+def normalize_jobs(experience_field: Any) -> List[Dict[str, Any]]:
+    """Get the list of job dicts from the experience JSONB (e.g. {"jobs": [...]})"""
+    if isinstance(experience_field, dict):
+        experience_field = experience_field.get("jobs") or experience_field.get("experience") or []
+    if not isinstance(experience_field, list):
+        return []
+    return [job for job in experience_field if isinstance(job, dict)]
+
+
+def cluster_skills(skills: List[str]) -> Dict[str, List[str]]:
+    """Group skills into clusters; unmatched skills go to "Other" """
+    clusters: Dict[str, List[str]] = {}
+    for skill in skills:
+        skill_lower = skill.lower()
+        cluster = next(
+            (name for name, keywords in SKILL_CLUSTERS.items()
+             if any(keyword == skill_lower or keyword in skill_lower.split() or
+                    (len(keyword) > 3 and keyword in skill_lower) for keyword in keywords)),
+            "Other"
+        )
+        clusters.setdefault(cluster, []).append(skill)
+    return clusters
+
+
+def job_year_span(job: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """Best-effort (start_year, end_year) for a job from its date fields"""
+    date_text = " ".join(
+        str(job.get(field)) for field in ("start_date", "end_date", "dates", "duration", "period")
+        if job.get(field)
+    )
+    years = [int(year) for year in _YEAR_PATTERN.findall(date_text)]
+    if not years:
+        return None
+
+    end_year = max(years)
+    if _PRESENT_PATTERN.search(date_text) or (job.get("start_date") and not job.get("end_date") and len(years) == 1):
+        end_year = datetime.now().year
+    return min(years), end_year
+
+
+def _compute_tenure(jobs: List[Dict[str, Any]], stated_years: Optional[int]) -> Dict[str, Any]:
+    spans = [span for span in (job_year_span(job) for job in jobs) if span]
+
+    if spans:
+        # Merge overlapping spans so concurrent roles aren't double counted
+        merged: List[List[int]] = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        total_years = sum(max(end - start, 1) for start, end in merged)
+        average_years = round(sum(max(end - start, 1) for start, end in spans) / len(spans), 1)
+    else:
+        total_years = stated_years or 0
+        average_years = round(total_years / len(jobs), 1) if jobs and total_years else None
+
+    current_job = jobs[0] if jobs else {}
+    return {
+        "total_years": total_years,
+        "roles_count": len(jobs),
+        "average_years_per_role": average_years,
+        "current_title": current_job.get("title") or current_job.get("position"),
+        "current_company": current_job.get("company")
+    }
+
+
+def _seniority_signals(jobs: List[Dict[str, Any]], total_years: int) -> Dict[str, Any]:
+    signals = []
+    title_rank = None
+    for job in jobs:
+        title = str(job.get("title") or job.get("position") or "").lower()
+        for word in _WORD_PATTERN.findall(title):
+            rank = SENIORITY_KEYWORDS.get(word)
+            if rank is not None:
+                signals.append(word)
+                title_rank = rank if title_rank is None else max(title_rank, rank)
+
+    # Years of experience as a fallback / floor for the title signal
+    years_rank = 1 if total_years < 2 else 2 if total_years < 5 else 3 if total_years < 9 else 4
+    rank = max(title_rank if title_rank is not None else years_rank, min(years_rank, 3))
+
+    return {
+        "level": SENIORITY_LEVELS[rank],
+        "rank": rank,
+        "title_signals": sorted(set(signals))
+    }
+
+
+def _summarize_education(education_field: Any) -> List[str]:
+    if isinstance(education_field, dict):
+        education_field = education_field.get("degrees") or []
+    if not isinstance(education_field, list):
+        return []
+
+    summaries = []
+    for entry in education_field:
+        if isinstance(entry, dict):
+            parts = [entry.get("degree"), entry.get("field") or entry.get("major"), entry.get("institution") or entry.get("school")]
+            summary = ", ".join(str(part) for part in parts if part)
+            if summary:
+                summaries.append(summary)
+        elif isinstance(entry, str):
+            summaries.append(entry)
+    return summaries
@@ -0,0 +1,97 @@
+"""
+Profile loading service
+Shared loader for a user's profiles_v2 row used by workflows, functions and endpoints
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+async def load_profile(session, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Load the user's profiles_v2 row
+
+    Args:
+        session: Database session (a new one is created if None)
+        user_id: ID of the user
+
+    Returns:
+        The profile record, or None if the user has no profile
+    """
+    # Import here so workflow graphs can be built without a configured database
+    from database import SupabaseSession, get_profile_by_user_id
+
+    if session is None:
+        session = SupabaseSession()
+
+    profile = await get_profile_by_user_id(session, user_id)
+    if not profile:
+        logger.info(f"No profile found for user {user_id}")
+    return profile
+
+
+def profile_version(profile: Dict[str, Any]) -> str:
+    """Version tag for a profile; changes whenever the row is updated"""
+    updated_at = profile.get("updated_at")
+    if isinstance(updated_at, datetime):
+        updated_at = updated_at.isoformat()
+    return f"{profile.get('id')}:{updated_at}"
+
+
+async def save_parsed_resume(
+    session, parsed_data: Dict[str, Any], filename: Optional[str], user_id: int
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Save a parsed resume as the user's profile, plus a resume row for the dashboard
+
+    Args:
+        session: Database session (a new one is created if None)
+        parsed_data: Profile returned by the resume parser
+        filename: Name of the uploaded file
+        user_id: ID of the user
+
+    Returns:
+        (profile record, resume record)
+    """
+    from database import SupabaseSession, create_profile, create_resume
+
+    if session is None:
+        session = SupabaseSession()
+
+    profile = await create_profile(session, {
+        "name": parsed_data.get("name"),
+        "email": parsed_data.get("email"),
+        "phone": parsed_data.get("phone"),
+        "location": parsed_data.get("location"),
+        "professional_summary": parsed_data.get("summary"),
+        "years_experience": len(parsed_data.get("experience", [])),
+        "skills": {"raw_skills": parsed_data.get("skills", [])},
+        "experience": {"jobs": parsed_data.get("experience", [])},
+        "education": {"degrees": parsed_data.get("education", [])},
+        "languages": {"spoken": parsed_data.get("languages", [])},
+        "source_documents": {"original_resume": filename},
+        "processing_quality": 0.85,  # Default quality score
+        "user_id": user_id,
+        "enhancement_status": "basic",
+        "data_sources": {"sources": ["resume_upload"]}
+    })
+
+    # Also create a resume entry for backward compatibility with dashboard
+    resume = await create_resume(session, {**parsed_resume_data(parsed_data), "user_id": user_id})
+
+    return profile, resume
+
+
+def parsed_resume_data(parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+    """resumes_v2 fields for a parsed resume"""
+    return {
+        "name": parsed_data.get("name"),
+        "email": parsed_data.get("email"),
+        "phone": parsed_data.get("phone"),
+        "professional_summary": parsed_data.get("summary"),
+        "years_experience": len(parsed_data.get("experience", [])),
+        "skills": {"raw_skills": parsed_data.get("skills", [])},
+        "education": {"degrees": parsed_data.get("education", [])}
+    }
@@ -0,0 +1,191 @@
+"""
+Resume batch parsing service
+Parses a folder of uploaded resumes (PDFs, or zip archives of PDFs) with bounded
+concurrency, yielding each file's result as it finishes and saving the parsed
+resumes with bulk inserts
+"""
+import asyncio
+import logging
+import zipfile
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from config import RESUME_BATCH_CONCURRENCY, RESUME_BATCH_MAX_FILES, RESUME_BATCH_MAX_FILE_BYTES
+from .exceptions import NotFoundException, ResumeParseException
+from .profile_service import load_profile, parsed_resume_data
+from .upload_ingest import IngestedUpload, spool_stream
+
+logger = logging.getLogger(__name__)
+
+# Parsed resumes saved per insert
+RESUME_BATCH_INSERT_SIZE = 25
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+
+def is_zip_upload(filename: Optional[str], content_type: Optional[str] = None) -> bool:
+    """Whether an uploaded file is a zip archive"""
+    return content_type in ZIP_CONTENT_TYPES or (filename or "").lower().endswith(".zip")
+
+
+def _check_count(files: List[IngestedUpload]) -> None:
+    if len(files) > RESUME_BATCH_MAX_FILES:
+        raise ResumeParseException(f"A batch can contain at most {RESUME_BATCH_MAX_FILES} resumes")
+
+
+def unpack_uploads(uploads: List[IngestedUpload]) -> List[IngestedUpload]:
+    """
+    The PDFs in a batch, unpacking zip archives (blocking, so run it in a worker thread)
+
+    Archive members are streamed into their own spooled uploads, named
+    "archive.zip/path/file.pdf"; non-PDF members are skipped. The uploads passed
+    in are either returned or closed, so the caller only has to close the result.
+
+    Raises:
+        ResumeParseException: If an archive is invalid or the batch is over its limits
+        UploadTooLargeException: If an archive member is over the size limit
+    """
+    files: List[IngestedUpload] = []
+    try:
+        for upload in uploads:
+            if not is_zip_upload(upload.filename):
+                files.append(upload)
+                _check_count(files)
+                continue
+            try:
+                with upload, upload.open() as stream, zipfile.ZipFile(stream) as archive:
+                    for info in archive.infolist():
+                        name = info.filename
+                        if info.is_dir() or not name.lower().endswith(".pdf") or name.startswith("__MACOSX/"):
+                            continue
+                        # The size limit is enforced while decompressing, so a member can't expand without bound
+                        with archive.open(info) as member:
+                            files.append(spool_stream(
+                                member.read, f"{upload.filename}/{name}", "application/pdf", RESUME_BATCH_MAX_FILE_BYTES
+                            ))
+                        _check_count(files)
+            except zipfile.BadZipFile:
+                raise ResumeParseException(f"{upload.filename} is not a valid zip archive")
+        return files
+    except BaseException:
+        for upload in files + uploads:
+            upload.close()
+        raise
+
+
+async def _parse(upload: IngestedUpload, semaphore: asyncio.Semaphore) -> Tuple[str, Dict[str, Any]]:
+    from resume_parser import parse_resume_pdf
+
+    async with semaphore:
+        try:
+            return upload.filename, await parse_resume_pdf(upload.source, digest=upload.digest)
+        except Exception as e:
+            logger.error(f"Error parsing {upload.filename} in batch: {e}")
+            return upload.filename, {"success": False, "error": str(e)}
+        finally:
+            upload.close()
+
+
+async def _save(session, profile_id: int, parsed: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Bulk-insert parsed resumes; returns the "saved" event"""
+    from database import create_resumes
+
+    resumes = await create_resumes(session, profile_id, [
+        {
+            **parsed_resume_data(profile),
+            "source_documents": {"original_resume": filename},
+            "file_type": "uploaded"
+        }
+        for filename, profile in parsed
+    ])
+    return {
+        "event": "saved",
+        "data": {
+            "resumes": [
+                {"filename": filename, "resume_id": resume["id"]}
+                for (filename, _), resume in zip(parsed, resumes)
+            ]
+        }
+    }
+
+
+async def iter_batch_parse(
+    session,
+    user_id: int,
+    uploads: List[IngestedUpload],
+    concurrency: int = RESUME_BATCH_CONCURRENCY
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Parse a batch of resumes, yielding events as files finish
+
+    Identical files are parsed once. Parsed resumes are saved as resumes of the
+    user's profile, RESUME_BATCH_INSERT_SIZE rows per insert. Every upload is
+    closed by the time the generator finishes. Events:
+
+    - {"event": "duplicate", "data": {"filename", "duplicate_of"}} for a repeated file
+    - {"event": "file", "data": {"filename", "success", "profile" | "error", ...}} per parsed file
+    - {"event": "saved", "data": {"resumes": [{"filename", "resume_id"}]}} after each insert
+    - {"event": "complete", "data": counts} at the end
+
+    Raises:
+        NotFoundException: If the user has no profile (before any event)
+        ResumeParseException: If the batch is invalid (before any event)
+    """
+    try:
+        profile = await load_profile(session, user_id)
+        if not profile:
+            raise NotFoundException(f"No profile found for user {user_id}")
+        files = await asyncio.to_thread(unpack_uploads, uploads)
+    except BaseException:
+        for upload in uploads:
+            upload.close()
+        raise
+    if not files:
+        raise ResumeParseException("No PDF resumes found in the upload")
+
+    first_by_digest: Dict[str, str] = {}
+    unique: List[IngestedUpload] = []
+    duplicates: List[Dict[str, str]] = []
+    for upload in files:
+        if upload.digest in first_by_digest:
+            duplicates.append({"filename": upload.filename, "duplicate_of": first_by_digest[upload.digest]})
+            upload.close()
+        else:
+            first_by_digest[upload.digest] = upload.filename
+            unique.append(upload)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.create_task(_parse(upload, semaphore)) for upload in unique]
+    to_save: List[Tuple[str, Dict[str, Any]]] = []
+    counts = {"files": len(files), "duplicates": len(duplicates), "parsed": 0, "failed": 0, "saved": 0}
+    try:
+        for duplicate in duplicates:
+            yield {"event": "duplicate", "data": duplicate}
+
+        for finished in asyncio.as_completed(tasks):
+            filename, result = await finished
+            if result["success"]:
+                counts["parsed"] += 1
+                to_save.append((filename, result["profile"]))
+                yield {"event": "file", "data": {"filename": filename, "success": True, "profile": result["profile"]}}
+            else:
+                counts["failed"] += 1
+                yield {"event": "file", "data": {"filename": filename, **result}}
+
+            if len(to_save) >= RESUME_BATCH_INSERT_SIZE:
+                saved = await _save(session, profile["id"], to_save)
+                counts["saved"] += len(saved["data"]["resumes"])
+                to_save = []
+                yield saved
+
+        if to_save:
+            saved = await _save(session, profile["id"], to_save)
+            counts["saved"] += len(saved["data"]["resumes"])
+            yield saved
+
+        yield {"event": "complete", "data": counts}
+    finally:
+        # Stop parsing if the client went away; uploads of tasks that never ran are closed here
+        for task in tasks:
+            task.cancel()
+        for upload in unique:
+            upload.close()
@@ -0,0 +1,379 @@
+"""
+Resume generation service
+Builds a tailored resume from a profile and job posting with concurrent per-section LLM calls
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from litellm import acompletion
+
+from config import RESUME_SECTION_CONCURRENCY
+from .cache import TTLCache
+from .exceptions import NotFoundException
+from .gap_engine import flatten_text
+from .job_matcher import extract_job_requirements
+from .job_posting_service import job_posting_version, load_job_posting, load_job_postings
+from .profile_features import normalize_jobs, normalize_skills
+from .profile_service import load_profile, profile_version
+from .skill_taxonomy import get_skill_taxonomy
+
+logger = logging.getLogger(__name__)
+
+RESUME_MODEL = "gemini/gemini-1.5-flash"
+
+# Bump when a section prompt changes so cached sections are regenerated
+SECTION_PROMPT_VERSION = "1"
+
+MAX_BULLETS = 5
+MAX_SKILLS = 20
+
+# section input hash -> generated content
+_section_cache = TTLCache(max_entries=4096, ttl_seconds=7 * 24 * 3600)
+
+SUMMARY_PROMPT = """Write a 2-3 sentence professional summary for a resume targeting the role below.
+Use only facts from the candidate data. Return only the summary.
+
+Target role: {job}
+Candidate: {candidate}
+"""
+
+SKILLS_PROMPT = """Select and order up to {limit} of the candidate's skills for a resume targeting the
+role below, most relevant first. Only use skills from the candidate's list.
+Return ONLY a JSON array of strings.
+
+Target role: {job}
+Candidate skills: {candidate}
+"""
+
+EXPERIENCE_PROMPT = """Rewrite this role as up to {limit} concise, achievement-focused resume bullets
+tailored to the target role. Lead with strong verbs, keep every fact and metric accurate and
+do not invent new ones. Return ONLY a JSON array of strings.
+
+Target role: {job}
+Role: {candidate}
+"""
+
+SECTION_PROMPTS = {"summary": SUMMARY_PROMPT, "skills": SKILLS_PROMPT, "experience": EXPERIENCE_PROMPT}
+
+
+def plan_sections(profile: Dict[str, Any], posting: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Split a resume into independently generated sections, in display order
+
+    Each section only hashes the profile and job data it uses, so editing one
+    role's details regenerates that role's bullets, not the whole resume.
+
+    Returns:
+        Sections with key, kind, input, job, fallback and hash
+    """
+    job = _job_context(posting)
+    jobs = normalize_jobs(profile.get("experience"))
+    skills = normalize_skills(profile.get("skills"))
+
+    sections = [
+        {
+            "key": "summary",
+            "kind": "summary",
+            "input": {
+                "professional_summary": profile.get("professional_summary"),
+                "career_level": profile.get("career_level"),
+                "years_experience": profile.get("years_experience"),
+                "primary_domain": profile.get("primary_domain"),
+                "recent_roles": [_role_title(entry) for entry in jobs[:3]],
+                "skills": skills[:MAX_SKILLS]
+            },
+            "fallback": profile.get("professional_summary") or ""
+        },
+        {
+            "key": "skills",
+            "kind": "skills",
+            "input": skills,
+            "fallback": _rank_skills_for_job(skills, job)[:MAX_SKILLS]
+        }
+    ]
+    for position, entry in enumerate(jobs):
+        sections.append({
+            "key": f"experience:{position}",
+            "kind": "experience",
+            "input": entry,
+            "fallback": _existing_bullets(entry),
+            "role": entry
+        })
+
+    for section in sections:
+        section["job"] = job
+        section["hash"] = section_hash(section["kind"], section["input"], job)
+    return sections
+
+
+def section_hash(kind: str, section_input: Any, job: Dict[str, Any]) -> str:
+    """Content hash of everything a section's output depends on"""
+    payload = json.dumps(
+        {"kind": kind, "input": section_input, "job": job,
+         "prompt": SECTION_PROMPT_VERSION, "model": RESUME_MODEL},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def generate_sections(
+    sections: List[Dict[str, Any]],
+    max_concurrency: int = RESUME_SECTION_CONCURRENCY,
+    on_section: Optional[Callable[[Dict[str, Any], Any, bool], None]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Generate every section concurrently, reusing cached sections
+
+    Args:
+        sections: Sections from plan_sections
+        max_concurrency: Maximum LLM calls in flight
+        on_section: Called with (section, content, cached) in display order, as soon
+            as a section and every section before it are ready
+
+    Returns:
+        Section key -> {"content", "cached"}
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    ready: Dict[int, tuple] = {}
+    next_position = 0
+
+    def flush():
+        nonlocal next_position
+        while next_position in ready:
+            on_section(sections[next_position], *ready.pop(next_position))
+            next_position += 1
+
+    async def run(position: int, section: Dict[str, Any]) -> Dict[str, Any]:
+        content = _section_cache.get(section["hash"])
+        cached = content is not None
+        if not cached:
+            async with semaphore:
+                content = await _generate_section(section)
+        if on_section:
+            ready[position] = (content, cached)
+            flush()
+        return {"content": content, "cached": cached}
+
+    results = await asyncio.gather(*[run(position, section) for position, section in enumerate(sections)])
+    return {section["key"]: result for section, result in zip(sections, results)}
+
+
+async def generate_resume(
+    session,
+    user_id: int,
+    job_posting_id: Optional[int] = None,
+    persist: bool = True,
+    on_section: Optional[Callable[[Dict[str, Any], Any, bool], None]] = None
+) -> Dict[str, Any]:
+    """
+    Generate a resume tailored to one of the user's job postings and save it as a new version
+
+    Args:
+        session: Database session
+        user_id: ID of the user
+        job_posting_id: Job posting to tailor to (defaults to the most recently saved one,
+            or a general resume if the user has none)
+        persist: Save the resume to resumes_v2
+        on_section: Called with (section, content, cached) in display order as sections finish
+
+    Returns:
+        Dict with resume (the resumes_v2 record, or the unsaved data), version,
+        job_posting_id, target_role, markdown and generated/cached section keys
+
+    Raises:
+        NotFoundException: If the user has no profile or the job posting does not exist
+    """
+    profile = await load_profile(session, user_id)
+    if not profile:
+        raise NotFoundException("No profile found for user", "PROFILE_NOT_FOUND")
+
+    if job_posting_id:
+        posting = await load_job_posting(session, profile["id"], job_posting_id)
+        if not posting:
+            raise NotFoundException("Job posting not found", "JOB_POSTING_NOT_FOUND")
+    else:
+        postings = await load_job_postings(session, profile["id"])
+        posting = postings[0] if postings else None
+
+    sections = plan_sections(profile, posting)
+    results = await generate_sections(sections, on_section=on_section)
+    resume_data = build_resume_data(profile, posting, sections, results)
+
+    if persist:
+        from database import SupabaseSession, create_resume
+
+        if session is None:
+            session = SupabaseSession()
+        # The database numbers the version as part of the insert, so concurrent generations can't collide
+        resume_data["version"] = None
+        resume = await create_resume(session, resume_data)
+        resume_data["version"] = resume["version"]
+    else:
+        resume = resume_data
+
+    generated = [key for key, result in results.items() if not result["cached"]]
+    logger.info(
+        f"Generated resume v{resume_data.get('version', '-')} for user {user_id}: "
+        f"{len(generated)} sections generated, {len(results) - len(generated)} cached"
+    )
+    return {
+        "resume": resume,
+        "version": resume_data.get("version"),
+        "job_posting_id": resume_data["job_posting_id"],
+        "target_role": posting.get("title") if posting else None,
+        "markdown": render_resume_markdown(sections, results),
+        "sections": {
+            "generated": generated,
+            "cached": [key for key, result in results.items() if result["cached"]]
+        }
+    }
+
+
+def build_resume_data(profile: Dict[str, Any], posting: Optional[Dict[str, Any]],
+                      sections: List[Dict[str, Any]], results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Assemble a resumes_v2 record from the profile and generated sections"""
+    jobs = [
+        {**section["role"], "achievements": results[section["key"]]["content"]}
+        for section in sections if section["kind"] == "experience"
+    ]
+    return {
+        "profile_id": profile["id"],
+        "job_posting_id": posting.get("id") if posting else None,
+        "name": profile.get("name"),
+        "email": profile.get("email"),
+        "phone": profile.get("phone"),
+        "location": profile.get("location"),
+        "professional_summary": results["summary"]["content"],
+        "career_level": profile.get("career_level"),
+        "years_experience": profile.get("years_experience"),
+        "primary_domain": profile.get("primary_domain"),
+        "seniority_keywords": profile.get("seniority_keywords"),
+        "experience": {"jobs": jobs},
+        "education": profile.get("education"),
+        "skills": {"raw_skills": results["skills"]["content"]},
+        "languages": profile.get("languages"),
+        "source_documents": {
+            "profile_version": profile_version(profile),
+            "job_posting_version": job_posting_version(posting) if posting else None,
+            "section_hashes": {section["key"]: section["hash"] for section in sections}
+        },
+        "file_type": "generated",
+        "customization_notes": (
+            f"Tailored to {posting.get('title')} at {posting.get('company_name')}" if posting else None
+        )
+    }
+
+
+def render_section(section: Dict[str, Any], content: Any) -> str:
+    """Markdown for one generated section"""
+    if section["kind"] == "summary":
+        return f"**PROFESSIONAL SUMMARY**\n{content}\n\n" if content else ""
+    if section["kind"] == "skills":
+        return f"**TECHNICAL SKILLS**\n{', '.join(content)}\n\n" if content else ""
+
+    role = section["role"]
+    heading = "**EXPERIENCE**\n" if section["key"] == "experience:0" else ""
+    header = " | ".join(str(part) for part in (_role_title(role), role.get("company")) if part)
+    dates = role.get("duration") or role.get("dates") or " - ".join(
+        str(role[field]) for field in ("start_date", "end_date") if role.get(field)
+    )
+    lines = [header, str(dates)] if dates else [header]
+    lines.extend(f"• {bullet}" for bullet in content)
+    return heading + "\n".join(lines) + "\n\n"
+
+
+def render_resume_markdown(sections: List[Dict[str, Any]], results: Dict[str, Dict[str, Any]]) -> str:
+    """Markdown for the whole resume (the concatenation of render_section outputs)"""
+    return "".join(render_section(section, results[section["key"]]["content"]) for section in sections)
+
+
+async def _generate_section(section: Dict[str, Any]) -> Any:
+    """Generate one section with the LLM; failures fall back to the profile's own content (uncached)"""
+    prompt = SECTION_PROMPTS[section["kind"]].format(
+        job=json.dumps(section["job"], default=str),
+        candidate=json.dumps(section["input"], default=str),
+        limit=MAX_SKILLS if section["kind"] == "skills" else MAX_BULLETS
+    )
+    try:
+        response = await acompletion(
+            model=RESUME_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.4,
+            max_tokens=600
+        )
+        content = _parse_section(section, response.choices[0].message.content or "")
+    except Exception as e:
+        logger.warning(f"Resume section {section['key']} generation failed, using profile content: {e}")
+        return section["fallback"]
+
+    _section_cache.set(section["hash"], content)
+    return content
+
+
+def _parse_section(section: Dict[str, Any], text: str) -> Any:
+    text = text.strip()
+    if section["kind"] == "summary":
+        if not text:
+            raise ValueError("empty summary")
+        return text
+
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    items = [str(item).strip() for item in json.loads(text) if str(item).strip()]
+
+    if section["kind"] == "skills":
+        # Keep the LLM's order but never let it add skills the candidate doesn't list
+        known = {skill.lower(): skill for skill in section["input"]}
+        items = list(dict.fromkeys(known[item.lower()] for item in items if item.lower() in known))
+        limit = MAX_SKILLS
+    else:
+        limit = MAX_BULLETS
+    if not items:
+        raise ValueError(f"no items in {section['kind']} section")
+    return items[:limit]
+
+
+def _job_context(posting: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The parts of a job posting that shape generated sections"""
+    if not posting:
+        return {}
+    taxonomy = get_skill_taxonomy()
+    weights = extract_job_requirements(posting, taxonomy)["skills"]
+    return {
+        "title": posting.get("title"),
+        "company": posting.get("company_name"),
+        "skills": [taxonomy.names[row] for row in sorted(weights, key=lambda row: -weights[row])],
+        "requirements": flatten_text(posting.get("requirements"))[:1500]
+    }
+
+
+def _rank_skills_for_job(skills: List[str], job: Dict[str, Any]) -> List[str]:
+    """Skills the job asks for first, otherwise in profile order"""
+    wanted = set(job.get("skills") or [])
+    if not wanted:
+        return list(skills)
+    taxonomy = get_skill_taxonomy()
+
+    def asked_for(skill: str) -> bool:
+        row = taxonomy.canonicalize(skill)
+        return row is not None and taxonomy.names[row] in wanted
+
+    return sorted(skills, key=lambda skill: not asked_for(skill))
+
+
+def _existing_bullets(role: Dict[str, Any]) -> List[str]:
+    for field in ("achievements", "responsibilities", "highlights"):
+        value = role.get(field)
+        if isinstance(value, list) and value:
+            return [str(item) for item in value][:MAX_BULLETS]
+    description = role.get("description")
+    if isinstance(description, str) and description.strip():
+        return [line.strip(" -•*") for line in description.splitlines() if line.strip(" -•*")][:MAX_BULLETS]
+    return []
+
+
+def _role_title(role: Dict[str, Any]) -> Optional[str]:
+    return role.get("title") or role.get("position")
@@ -0,0 +1,235 @@
+"""
+Resume parse cache
+Content-addressed store of extracted PDF text and parsed resume JSON, so re-uploads
+of the same file skip PDF extraction and the LLM call
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import (
+    RESUME_PARSE_CACHE, RESUME_PARSE_CACHE_PATH, RESUME_PARSE_CACHE_MAX_ENTRIES, RESUME_PARSE_CACHE_TTL_SECONDS
+)
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# How long a write waits for another worker's write to finish before giving up
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+class SqliteParseCache:
+    """LRU cache with TTL stored in a local SQLite file, shared by every worker on the host"""
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl_seconds: float = 30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets workers read while another writes; writers wait for the lock rather than fail
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS resume_parse_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS resume_parse_cache_used_at ON resume_parse_cache (used_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM resume_parse_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM resume_parse_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE resume_parse_cache SET used_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, then drop expired and least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resume_parse_cache (key, value, stored_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._conn.execute("DELETE FROM resume_parse_cache WHERE stored_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM resume_parse_cache WHERE key IN ("
+                "SELECT key FROM resume_parse_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Remove a value if present"""
+        with self._lock:
+            self._conn.execute("DELETE FROM resume_parse_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every value"""
+        with self._lock:
+            self._conn.execute("DELETE FROM resume_parse_cache")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM resume_parse_cache").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache gauges for health/metrics endpoints"""
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+_cache = None
+_opened = False
+
+
+def open_parse_cache(
+    backend: str = RESUME_PARSE_CACHE,
+    path: str = RESUME_PARSE_CACHE_PATH,
+    max_entries: int = RESUME_PARSE_CACHE_MAX_ENTRIES,
+    ttl_seconds: float = RESUME_PARSE_CACHE_TTL_SECONDS
+):
+    """
+    Open the parse cache for this process (replacing any existing one)
+
+    Args:
+        backend: "sqlite" (local disk, survives restarts), "memory" or "off"
+        path: Database file used by the SQLite backend
+        max_entries: Entries kept before the least recently used are evicted
+        ttl_seconds: Age after which an entry is discarded
+
+    Returns:
+        The cache now used by the resume parsers, or None when disabled
+    """
+    global _cache, _opened
+    close_parse_cache()
+    _opened = True
+
+    if backend == "off":
+        logger.info("Resume parse cache disabled")
+        return None
+
+    try:
+        if backend == "sqlite":
+            _cache = SqliteParseCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+        elif backend == "memory":
+            _cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        else:
+            raise ValueError(f"Unknown resume parse cache backend: {backend}")
+    except Exception as e:
+        logger.error(f"❌ Failed to open {backend} resume parse cache, using in-memory cache: {e}")
+        _cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    logger.info(f"✅ Resume parse cache ready ({backend})")
+    return _cache
+
+
+def get_parse_cache():
+    """The shared parse cache, opened with the environment defaults on first use"""
+    return _cache if _opened else open_parse_cache()
+
+
+def close_parse_cache() -> None:
+    """Close the parse cache, if open"""
+    global _cache, _opened
+    if isinstance(_cache, SqliteParseCache):
+        _cache.close()
+    _cache = None
+    _opened = False
+
+
+def pdf_digest(pdf_bytes: bytes) -> str:
+    """SHA-256 of the uploaded file, the content address for every cache entry"""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """pdf_digest of a file on disk, read in chunks"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def prompt_version(prompt: str) -> str:
+    """Short hash of a parser prompt, so editing the prompt invalidates parsed results"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def _text_key(digest: str, extractor: str) -> str:
+    return f"text:{digest}:{extractor}"
+
+
+def _profile_key(digest: str, model_name: str, version: str) -> str:
+    return f"profile:{digest}:{model_name}:{version}"
+
+
+async def _get(key: str) -> Optional[Any]:
+    cache = get_parse_cache()
+    if cache is None:
+        return None
+    try:
+        return await asyncio.to_thread(cache.get, key)
+    except Exception as e:
+        logger.warning(f"Resume parse cache read failed: {e}")
+        return None
+
+
+async def _set(key: str, value: Any) -> None:
+    cache = get_parse_cache()
+    if cache is None:
+        return
+    try:
+        await asyncio.to_thread(cache.set, key, value)
+    except Exception as e:
+        logger.warning(f"Resume parse cache write failed: {e}")
+
+
+async def get_cached_text(digest: str, extractor: str) -> Optional[str]:
+    """Extracted text for a file, if it was extracted before by this extractor (see pdf_extraction.extractor_id)"""
+    return await _get(_text_key(digest, extractor))
+
+
+async def set_cached_text(digest: str, extractor: str, text: str) -> None:
+    """Remember the text an extractor produced for a file"""
+    await _set(_text_key(digest, extractor), text)
+
+
+async def get_cached_profile(digest: str, model_name: str, version: str) -> Optional[Dict]:
+    """Parsed resume JSON for a file, if it was parsed before by this model and prompt version"""
+    return await _get(_profile_key(digest, model_name, version))
+
+
+async def set_cached_profile(digest: str, model_name: str, version: str, profile: Dict) -> None:
+    """Remember a validated parse result"""
+    await _set(_profile_key(digest, model_name, version), profile)
@@ -0,0 +1,368 @@
+"""
+Resume parse jobs
+Background queue that parses uploaded resumes on a bounded pool of worker tasks.
+Each job's state is persisted in the resume_parse_jobs table so clients can poll,
+subscribe to or cancel a job instead of holding a request open for the whole parse.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import database
+from config import RESUME_PARSE_QUEUE_SIZE, RESUME_PARSE_WORKERS
+
+from .exceptions import NotFoundException, ServiceUnavailableException
+from .upload_ingest import IngestedUpload
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+# Progress is written to the job row at most this often (step changes are always written)
+PROGRESS_PERSIST_SECONDS = 1.0
+
+# How often a subscriber re-reads a job that is running in another server process
+JOB_POLL_SECONDS = 1.0
+
+SHUTDOWN_ERROR = "Server shut down before the resume was parsed, please upload it again"
+
+# Job row columns returned by the API
+JOB_FIELDS = (
+    "id", "status", "filename", "step", "progress", "message", "result", "error",
+    "created_at", "updated_at", "started_at", "finished_at"
+)
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def job_view(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The public, JSON-serialisable fields of a job row"""
+    view = {}
+    for field in JOB_FIELDS:
+        value = record.get(field)
+        view[field] = value.isoformat() if isinstance(value, datetime) else value
+    return view
+
+
+def terminal_event(job: Dict[str, Any]) -> Dict[str, Any]:
+    """The last event sent for a finished job, matching /parse-resume-stream's final events"""
+    if job["status"] == SUCCEEDED:
+        return {"event": "complete", "data": job["result"]}
+    if job["status"] == CANCELLED:
+        return {"event": "cancelled", "data": job["result"] or {"success": False, "error": job["error"]}}
+    return {"event": "error", "data": job["result"] or {"success": False, "error": job["error"]}}
+
+
+class _Job:
+    """A job accepted by this process, with the upload it parses and its live subscribers"""
+
+    def __init__(self, record: Dict[str, Any], user_id: int, upload: IngestedUpload):
+        self.id = record["id"]
+        self.user_id = user_id
+        self.upload = upload
+        self.record = record
+        self.task: Optional[asyncio.Task] = None
+        self.fields: List[Dict[str, Any]] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.persisted_at = 0.0
+
+    @property
+    def status(self) -> str:
+        return self.record["status"]
+
+
+class ResumeParseJobQueue:
+    """
+    Runs resume parse jobs on a fixed number of worker tasks
+
+    Submitted uploads wait (spooled to disk unless small) until a worker is free;
+    submissions beyond max_queued waiting jobs are rejected so bursts can't
+    exhaust memory or disk. Job rows
+    are the source of truth for status, so jobs accepted by another server process
+    can still be polled and subscribed to (by re-reading the row).
+    """
+
+    def __init__(self, workers: int = RESUME_PARSE_WORKERS, max_queued: int = RESUME_PARSE_QUEUE_SIZE):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._jobs: Dict[str, _Job] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._stopping = False
+        # Workers write job rows and save results after the submitting request has finished
+        self._session = database.SupabaseSession()
+
+    def start(self) -> None:
+        """Start the worker tasks (needs a running event loop)"""
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers; unfinished jobs are marked failed since their uploads are lost"""
+        self._stopping = True
+        running = [job.task for job in self._jobs.values() if job.task]
+        for task in self._worker_tasks + running:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, *running, return_exceptions=True)
+        self._worker_tasks = []
+
+        for job in list(self._jobs.values()):
+            await self._finish(job, FAILED, {"success": False, "error": SHUTDOWN_ERROR})
+
+    def queued_count(self) -> int:
+        """Jobs accepted but not yet picked up by a worker"""
+        return sum(1 for job in self._jobs.values() if job.status == QUEUED)
+
+    async def submit(self, session, user_id: int, upload: IngestedUpload) -> Dict[str, Any]:
+        """
+        Queue a resume for parsing; the job takes ownership of the upload and closes it
+
+        Returns:
+            The new job row
+
+        Raises:
+            ServiceUnavailableException: If the queue is full
+        """
+        if self._stopping or self.queued_count() >= self.max_queued:
+            upload.close()
+            raise ServiceUnavailableException("Too many resumes are being parsed, please try again shortly")
+
+        job_id = str(uuid.uuid4())
+        # Registered before the insert so concurrent submissions count towards the limit
+        job = _Job({"id": job_id, "status": QUEUED}, user_id, upload)
+        self._jobs[job_id] = job
+        try:
+            record = await asyncio.to_thread(
+                database.create_resume_parse_job, session, {"id": job_id, "user_id": user_id, "filename": upload.filename}
+            )
+        except Exception:
+            del self._jobs[job_id]
+            upload.close()
+            raise
+
+        job.record = job_view(record)
+        self._queue.put_nowait(job_id)
+        logger.info(f"Queued resume parse job {job_id} ({self.queued_count()} waiting)")
+        return job.record
+
+    async def get(self, session, job_id: str, user_id: int) -> Dict[str, Any]:
+        """
+        The current state of a job
+
+        Raises:
+            NotFoundException: If the user has no job with this ID
+        """
+        job = self._jobs.get(job_id)
+        if job is not None and job.user_id == user_id:
+            return dict(job.record)
+        return job_view(await self._load(session, job_id, user_id))
+
+    async def cancel(self, session, job_id: str, user_id: int) -> Dict[str, Any]:
+        """
+        Cancel a queued or running job; finished jobs are returned unchanged
+
+        Raises:
+            NotFoundException: If the user has no job with this ID
+            ServiceUnavailableException: If the job is running in another server process
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            record = job_view(await self._load(session, job_id, user_id))
+            if record["status"] in FINISHED_STATUSES:
+                return record
+            raise ServiceUnavailableException("Resume parse job is running on another server, please try again")
+
+        if job.task is not None:
+            # The job records its own cancellation
+            job.task.cancel()
+            await asyncio.wait({job.task})
+        elif job.status == QUEUED:
+            await self._finish(job, CANCELLED, {"success": False, "error": "Resume parse job cancelled"})
+        return dict(job.record)
+
+    async def subscribe(self, session, job_id: str, user_id: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Events for a job: its current status, the fields parsed so far, then live
+        progress and field events up to a final complete, error or cancelled event
+
+        Raises:
+            NotFoundException: If the user has no job with this ID (before any event)
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            async for event in self._poll(session, await self._load(session, job_id, user_id), user_id):
+                yield event
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        job.subscribers.append(queue)
+        try:
+            yield {"event": "status", "data": dict(job.record)}
+            for field in list(job.fields):
+                yield {"event": "field", "data": field}
+            if job.status in FINISHED_STATUSES:
+                yield terminal_event(job.record)
+                return
+            while True:
+                event = await queue.get()
+                yield event
+                if event["event"] in ("complete", "error", "cancelled"):
+                    return
+        finally:
+            job.subscribers.remove(queue)
+
+    async def _poll(self, session, record: Dict[str, Any], user_id: int) -> AsyncIterator[Dict[str, Any]]:
+        """Follow a job this process isn't running by re-reading its row"""
+        record = job_view(record)
+        yield {"event": "status", "data": record}
+        while record["status"] not in FINISHED_STATUSES:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            latest = job_view(await self._load(session, record["id"], user_id))
+            if latest["updated_at"] != record["updated_at"]:
+                yield {"event": "status", "data": latest}
+            record = latest
+        yield terminal_event(record)
+
+    async def _load(self, session, job_id: str, user_id: int) -> Dict[str, Any]:
+        record = await asyncio.to_thread(database.get_resume_parse_job, session, job_id, user_id)
+        if record is None:
+            raise NotFoundException("Resume parse job not found")
+        return record
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                # Cancelled while waiting
+                continue
+            job.task = asyncio.create_task(self._run(job))
+            # wait() rather than await, so cancelling the job doesn't stop the worker
+            await asyncio.wait({job.task})
+
+    async def _run(self, job: _Job) -> None:
+        # Import here so the queue can be built without loading the parser graph
+        from models import ProfileRead, ResumeRead
+        from resume_parser import parse_resume_pdf
+        from .profile_service import save_parsed_resume
+
+        async def on_progress(progress_data):
+            await self._update(job, step=progress_data.get("step"), progress=progress_data.get("progress"),
+                               message=progress_data.get("message"))
+            self._publish(job, {"event": "progress", "data": progress_data})
+
+        async def on_field(field_data):
+            job.fields.append(field_data)
+            self._publish(job, {"event": "field", "data": field_data})
+
+        try:
+            await self._update(job, persist=True, status=RUNNING, started_at=_now())
+            self._publish(job, {"event": "status", "data": dict(job.record)})
+
+            result = await parse_resume_pdf(
+                job.upload.source, progress_callback=on_progress, field_callback=on_field, digest=job.upload.digest
+            )
+            if not result["success"]:
+                await self._finish(job, FAILED, {
+                    "success": False,
+                    "error": result["error"],
+                    "partial_profile": result.get("partial_profile")
+                })
+                return
+
+            profile, resume = await save_parsed_resume(self._session, result["profile"], job.record["filename"], job.user_id)
+            await self._finish(job, SUCCEEDED, {
+                "success": True,
+                "profile": ProfileRead.model_validate(profile).model_dump(mode="json"),
+                "resume": ResumeRead.model_validate(resume).model_dump(mode="json"),
+                "message": "Resume parsed and saved successfully"
+            })
+        except asyncio.CancelledError:
+            if job.status in FINISHED_STATUSES:
+                raise
+            if self._stopping:
+                await self._finish(job, FAILED, {"success": False, "error": SHUTDOWN_ERROR})
+            else:
+                await self._finish(job, CANCELLED, {"success": False, "error": "Resume parse job cancelled"})
+            raise
+        except Exception as e:
+            logger.error(f"Resume parse job {job.id} failed: {e}")
+            await self._finish(job, FAILED, {"success": False, "error": str(e)})
+
+    async def _update(self, job: _Job, persist: bool = False, **changes) -> None:
+        """Apply changes to a job; written to its row on status changes, new steps, or once per interval"""
+        new_step = changes.get("step", job.record.get("step")) != job.record.get("step")
+        job.record.update(changes)
+        now = time.monotonic()
+        if persist or new_step or now - job.persisted_at >= PROGRESS_PERSIST_SECONDS:
+            job.persisted_at = now
+            record = await asyncio.to_thread(database.update_resume_parse_job, self._session, job.id, {
+                field: job.record.get(field)
+                for field in ("status", "step", "progress", "message", "result", "error", "started_at", "finished_at")
+            })
+            if record:
+                job.record["updated_at"] = job_view(record)["updated_at"]
+
+    async def _finish(self, job: _Job, status: str, result: Dict[str, Any]) -> None:
+        """Record a job's outcome, tell its subscribers and release the upload"""
+        try:
+            await self._update(
+                job, persist=True, status=status, result=result,
+                error=None if result.get("success") else result.get("error"), finished_at=_now()
+            )
+        finally:
+            # Even if the row couldn't be written, subscribers get the outcome and the upload is released
+            self._publish(job, terminal_event(job.record))
+            self._jobs.pop(job.id, None)
+            job.upload.close()
+        logger.info(f"Resume parse job {job.id} {status}")
+
+    def _publish(self, job: _Job, event: Dict[str, Any]) -> None:
+        for queue in job.subscribers:
+            queue.put_nowait(event)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue gauges for health/metrics endpoints"""
+        return {
+            "workers": self.workers,
+            "queued": self.queued_count(),
+            "running": sum(1 for job in self._jobs.values() if job.status == RUNNING),
+            "max_queued": self.max_queued
+        }
+
+
+_jobs: Optional[ResumeParseJobQueue] = None
+
+
+def start_resume_parse_jobs(
+    workers: int = RESUME_PARSE_WORKERS,
+    max_queued: int = RESUME_PARSE_QUEUE_SIZE
+) -> ResumeParseJobQueue:
+    """Create and start the resume parse job queue (needs a running event loop)"""
+    global _jobs
+    _jobs = ResumeParseJobQueue(workers=workers, max_queued=max_queued)
+    _jobs.start()
+    logger.info(f"Started resume parse job queue with {workers} workers")
+    return _jobs
+
+
+def get_resume_parse_jobs() -> ResumeParseJobQueue:
+    """The shared resume parse job queue, started on first use"""
+    return _jobs or start_resume_parse_jobs()
+
+
+async def stop_resume_parse_jobs() -> None:
+    """Stop the resume parse job queue, if started"""
+    global _jobs
+    if _jobs is not None:
+        await _jobs.stop()
+        _jobs = None
@@ -3,6 +3,7 @@ Resume parsing service
 Handles business logic for resume parsing using Dify API
 """
 import logging
+from contextlib import aclosing
 from typing import Dict, Any, AsyncGenerator
 import httpx
 
@@ -12,7 +13,7 @@ from .exceptions import ServiceUnavailableException, ResumeParseException, Exter
 
 logger = logging.getLogger(__name__)
 
-async def parse_resume_from_url(file_url: str) -> AsyncGenerator[str, None]:
+async def parse_resume_from_url(file_url: str) -> AsyncGenerator[bytes, None]:
     """
     Parse resume from file URL using Dify API (streaming mode)
     
@@ -20,7 +21,8 @@ async def parse_resume_from_url(file_url: str) -> AsyncGenerator[str, None]:
         file_url: URL of the resume file to parse
         
     Yields:
-        Streaming response chunks from Dify API
+        Raw SSE bytes from Dify API, passed through untouched (closing the
+        generator closes the Dify request)
         
     Raises:
         ServiceUnavailableException: If Dify client is not configured
@@ -85,8 +87,9 @@ async def parse_resume_from_url(file_url: str) -> AsyncGenerator[str, None]:
         # Send streaming request to Dify API
         logger.info(f"Sending streaming parse request to Dify API for: {file_url}")
         
-        async for chunk in dify_client.send_chat_message_stream(chat_request):
-            yield chunk
+        async with aclosing(dify_client.send_chat_message_stream(chat_request)) as chunks:
+            async for chunk in chunks:
+                yield chunk
             
         logger.info(f"Streaming resume parsing completed for: {file_url}")
         
@@ -0,0 +1,152 @@
+"""
+Resume sections
+Fast local pre-pass over extracted resume text: segments it at section headings
+and pulls out contact fields with compiled regexes before the LLM step
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Headings are matched against this vocabulary only; an all-caps line such as a
+# candidate's name ("JANE DOE") is not a heading
+SECTION_HEADING_PATTERN = re.compile(
+    r"^(professional |work |employment |research |teaching |technical |core |key |relevant |academic |"
+    r"volunteer |additional |career )?"
+    r"(summary|profile|objective|experience|employment|history|education|skills|qualifications|projects|"
+    r"publications|certifications|awards|honors|achievements|grants|presentations|languages|training|"
+    r"courses|coursework|volunteering|leadership|references|interests|hobbies|activities)"
+    r"( and [a-z ]+)?:?$",
+    re.IGNORECASE
+)
+
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_PATTERN = re.compile(r"(?<![\w])\+?\d?[\s.-]?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}(?![\w])")
+URL_PATTERN = re.compile(r"^(https?://)?(www\.)?[\w-]+(\.[\w-]+)+(/\S*)?$", re.IGNORECASE)
+LOCATION_PATTERN = re.compile(r"^[A-Z][A-Za-z .'-]+,\s*([A-Z]{2}|[A-Z][A-Za-z .'-]+)$")
+NAME_PATTERN = re.compile(r"^[A-Z][A-Za-z.'-]+(\s+[A-Z][A-Za-z.'-]*){1,3}$")
+
+# Separators used between contact details on one line ("email | phone | City, ST")
+CONTACT_SEPARATOR_PATTERN = re.compile(r"\s*[|•·;]\s*|\s{3,}")
+
+# Sections the parser prompt doesn't ask for; they are not sent to the LLM
+SKIPPED_SECTIONS = {"references", "interests", "hobbies"}
+
+# Lines before the first heading scanned for contact details
+HEADER_SCAN_LINES = 8
+
+
+def is_section_heading(line: str) -> bool:
+    """Whether a line looks like a resume/CV section heading"""
+    line = line.strip()
+    if not 3 <= len(line) <= 40:
+        return False
+    return bool(SECTION_HEADING_PATTERN.match(line))
+
+
+def segment_sections(text: str) -> List[Tuple[Optional[str], List[str]]]:
+    """
+    Split resume text into (heading, lines) sections
+
+    The first section holds the lines before any heading, with a heading of None.
+    A section's lines start with its heading line.
+    """
+    sections: List[Tuple[Optional[str], List[str]]] = [(None, [])]
+    for line in text.splitlines():
+        if is_section_heading(line):
+            heading = line.strip().rstrip(":")
+            if sections[-1][1]:
+                sections.append((heading, []))
+            else:
+                sections[-1] = (heading, [])
+        sections[-1][1].append(line)
+    return sections
+
+
+def _contact_token(token: str, contact: Dict[str, str]) -> bool:
+    """Record a contact detail token; returns False if the token is something else"""
+    if EMAIL_PATTERN.fullmatch(token):
+        contact.setdefault("email", token)
+    elif PHONE_PATTERN.fullmatch(token):
+        contact.setdefault("phone", token)
+    elif LOCATION_PATTERN.match(token):
+        contact.setdefault("location", token)
+    elif not URL_PATTERN.match(token):
+        return False
+    return True
+
+
+def preextract_resume(text: str) -> Tuple[Dict[str, str], str]:
+    """
+    Extract contact fields locally and reduce the text the LLM has to read
+
+    Returns:
+        (contact fields found: any of name, email, phone, location,
+         text for the LLM without contact-only lines and skipped sections)
+    """
+    contact: Dict[str, str] = {}
+    kept: List[str] = []
+
+    for heading, lines in segment_sections(text):
+        if heading and heading.split()[-1].lower() in SKIPPED_SECTIONS:
+            continue
+        if heading is not None:
+            kept.extend(lines)
+            continue
+
+        # Header block: drop lines made only of contact details
+        for position, line in enumerate(lines):
+            stripped = line.strip()
+            if position < HEADER_SCAN_LINES and stripped:
+                if not contact and NAME_PATTERN.match(stripped):
+                    # The name line stays in the text so the LLM can confirm it
+                    contact["name"] = stripped
+                    kept.append(line)
+                    continue
+                tokens = [token for token in CONTACT_SEPARATOR_PATTERN.split(stripped) if token]
+                found: Dict[str, str] = {}
+                if tokens and all(_contact_token(token, found) for token in tokens):
+                    for field, value in found.items():
+                        contact.setdefault(field, value)
+                    # A line that is only "City, Word" could be something else, so keep it
+                    if set(found) != {"location"}:
+                        continue
+            kept.append(line)
+
+    return contact, "\n".join(kept).strip()
+
+
+def find_contact_in_text(text: str, contact: Dict[str, str]) -> Dict[str, str]:
+    """
+    Search the whole text for an email and phone missing from the header block
+
+    A match in prose may belong to someone else (a referee, a previous employer)
+    or be a number that only looks like a phone, so these are fallbacks for
+    when the LLM finds nothing rather than values that override it.
+    """
+    found: Dict[str, str] = {}
+    for field, pattern in (("email", EMAIL_PATTERN), ("phone", PHONE_PATTERN)):
+        if field not in contact:
+            match = pattern.search(text)
+            if match:
+                found[field] = match.group(0).strip()
+    return found
+
+
+def merge_contact_fields(profile: Dict, contact: Dict[str, str], fallback: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Combine the LLM's profile with locally extracted contact fields
+
+    Email and phone from the header block are copied verbatim from the text, so
+    those local values win; the LLM's name and location win when it found them.
+    Fallback values (see find_contact_in_text) only fill fields the LLM left empty.
+    """
+    merged = dict(profile)
+    for field in ("email", "phone"):
+        if contact.get(field):
+            merged[field] = contact[field]
+    for field in ("name", "location"):
+        if not merged.get(field) and contact.get(field):
+            merged[field] = contact[field]
+    for field, value in (fallback or {}).items():
+        if not merged.get(field):
+            merged[field] = value
+    return merged
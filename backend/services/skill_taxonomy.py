@@ -0,0 +1,136 @@
+"""
+Skill taxonomy
+Canonical skills, aliases and a skill co-occurrence matrix loaded once from skill_taxonomy.json
+"""
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+TAXONOMY_PATH = Path(__file__).with_name("skill_taxonomy.json")
+
+_TOKEN_PATTERN = re.compile(r"\.?[a-z0-9#+][a-z0-9#+./-]*")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lower-case word tokens that keep skill punctuation (c#, node.js, ci/cd)"""
+    return [token.rstrip("./-") for token in _TOKEN_PATTERN.findall(text.lower())]
+
+
+class SkillTaxonomy:
+    """
+    Versioned skill taxonomy
+
+    Skills are addressed by their row in ``adjacency``; ``adjacency[i, j]`` is how
+    often skill j is expected alongside skill i (0-1, symmetric). Substitute groups
+    mark skills that are alternatives rather than complements.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.version: str = data["version"]
+        skills = data["skills"]
+
+        self.ids: List[str] = [skill["id"] for skill in skills]
+        self.names: List[str] = [skill["name"] for skill in skills]
+        self.categories: List[str] = [skill["category"] for skill in skills]
+        self.index: Dict[str, int] = {skill_id: i for i, skill_id in enumerate(self.ids)}
+
+        category_info = data["categories"]
+        self.demand = np.array([skill["demand"] for skill in skills], dtype=np.float32)
+        self.universal = np.array([category_info[c]["universal"] for c in self.categories], dtype=bool)
+        self.category_suggestions: Dict[str, List[str]] = {
+            name: info["suggestions"] for name, info in category_info.items()
+        }
+
+        size = len(skills)
+        self.adjacency = np.zeros((size, size), dtype=np.float32)
+        for first, second, weight in data["cooccurrence"]:
+            i, j = self.index[first], self.index[second]
+            self.adjacency[i, j] = self.adjacency[j, i] = weight
+        self.degree = self.adjacency.sum(axis=1)
+
+        # substitutes[i, j] = 1 when skills i and j fill the same role (e.g. AWS/GCP)
+        self.substitutes = np.zeros((size, size), dtype=np.float32)
+        for group in data.get("substitutes", []):
+            rows = [self.index[skill_id] for skill_id in group]
+            self.substitutes[np.ix_(rows, rows)] = 1.0
+        np.fill_diagonal(self.substitutes, 0.0)
+
+        # Alias phrase (space-joined tokens) -> skill row
+        self._aliases: Dict[str, int] = {}
+        for i, skill in enumerate(skills):
+            for phrase in [skill["id"], skill["name"], *skill.get("aliases", [])]:
+                self._aliases.setdefault(" ".join(_tokenize(phrase)), i)
+        self._max_phrase_tokens = max(len(phrase.split()) for phrase in self._aliases)
+        # Aliases that are also ordinary words ("go", "spring") only count in skill lists
+        self._ambiguous = {" ".join(_tokenize(phrase)) for phrase in data.get("ambiguous_aliases", [])}
+
+    @classmethod
+    def from_file(cls, path: Path = TAXONOMY_PATH) -> "SkillTaxonomy":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def canonicalize(self, skill: str) -> Optional[int]:
+        """Row of a skill name or alias, or None if it is not in the taxonomy"""
+        return self._aliases.get(" ".join(_tokenize(skill)))
+
+    def match(self, text: str, free_text: bool = False) -> List[int]:
+        """
+        Find every taxonomy skill mentioned in a text
+
+        Args:
+            text: Skill name, job title or description
+            free_text: Ignore aliases that are also ordinary words (for prose)
+
+        Returns:
+            Unique skill rows in order of first mention
+        """
+        tokens = []
+        for token in _tokenize(text):
+            # "node.js/react" style tokens are split unless the whole token is an alias
+            if "/" in token and token not in self._aliases:
+                tokens.extend(part for part in token.split("/") if part)
+            else:
+                tokens.append(token)
+
+        found: List[int] = []
+        position = 0
+        while position < len(tokens):
+            # Longest phrase first so "react native" wins over "react"
+            for length in range(min(self._max_phrase_tokens, len(tokens) - position), 0, -1):
+                phrase = " ".join(tokens[position:position + length])
+                row = self._aliases.get(phrase)
+                if row is not None and not (free_text and phrase in self._ambiguous):
+                    if row not in found:
+                        found.append(row)
+                    position += length
+                    break
+            else:
+                position += 1
+        return found
+
+    def vectorize(self, texts: Iterable[str], weight: float = 1.0, free_text: bool = False) -> np.ndarray:
+        """Indicator vector over the taxonomy for the skills mentioned in ``texts``"""
+        vector = np.zeros(len(self), dtype=np.float32)
+        for text in texts:
+            rows = self.match(text, free_text=free_text)
+            if rows:
+                vector[rows] = weight
+        return vector
+
+    def suggestions_for(self, row: int) -> List[str]:
+        """Actionable suggestions for closing a gap in the given skill"""
+        templates = self.category_suggestions.get(self.categories[row], [])
+        return [template.format(skill=self.names[row]) for template in templates]
+
+
+@lru_cache(maxsize=1)
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """The shared taxonomy, parsed on first use"""
+    return SkillTaxonomy.from_file()
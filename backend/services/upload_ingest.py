@@ -0,0 +1,189 @@
+"""
+Upload ingestion
+Reads uploaded files chunk by chunk: the size limit is enforced as bytes arrive,
+the content is hashed incrementally, and anything but small files is spooled to a
+temp file, so memory per upload stays roughly constant under concurrency
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from typing import BinaryIO, Callable, List, Optional, Union
+
+from config import UPLOAD_SPOOL_MEMORY_BYTES
+
+from .exceptions import UploadTooLargeException
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 256 * 1024
+
+
+class IngestedUpload:
+    """A fully received upload, held in memory if small and in a temp file otherwise"""
+
+    def __init__(
+        self,
+        filename: Optional[str],
+        content_type: Optional[str],
+        size: int,
+        digest: str,
+        data: Optional[bytes] = None,
+        path: Optional[str] = None
+    ):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.digest = digest
+        self.data = data
+        self.path = path
+
+    @classmethod
+    def from_bytes(cls, filename: Optional[str], data: bytes, content_type: Optional[str] = None) -> "IngestedUpload":
+        """Wrap content that is already in memory"""
+        return cls(filename, content_type, len(data), hashlib.sha256(data).hexdigest(), data=data)
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """The content for the PDF extractor: the bytes, or the temp file's path"""
+        return self.data if self.data is not None else self.path
+
+    def open(self) -> BinaryIO:
+        """A new read handle positioned at the start of the content"""
+        return io.BytesIO(self.data) if self.data is not None else open(self.path, "rb")
+
+    def close(self) -> None:
+        """Release the content (removes the temp file); safe to call more than once"""
+        self.data = None
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "IngestedUpload":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class UploadSpool:
+    """Collects an upload's chunks, moving them to a temp file once past the in-memory threshold"""
+
+    def __init__(self, filename: Optional[str], content_type: Optional[str] = None, max_bytes: int = UPLOAD_MAX_BYTES):
+        self.filename = filename
+        self.content_type = content_type
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._chunks: List[bytes] = []
+        self._file: Optional[BinaryIO] = None
+        self._path: Optional[str] = None
+
+    def will_spill(self, chunk_size: int) -> bool:
+        """Whether writing a chunk of this size touches the disk"""
+        return self._file is not None or self.size + chunk_size > UPLOAD_SPOOL_MEMORY_BYTES
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Add the next chunk
+
+        Raises:
+            UploadTooLargeException: As soon as the upload passes max_bytes
+        """
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.discard()
+            raise UploadTooLargeException(
+                f"{self.filename or 'File'} is too large. Maximum size is {self.max_bytes // (1024 * 1024)}MB",
+                error_code="FILE_TOO_LARGE"
+            )
+        self._hash.update(chunk)
+
+        if self._file is None and self.size > UPLOAD_SPOOL_MEMORY_BYTES:
+            fd, self._path = tempfile.mkstemp(prefix="upload-", suffix=os.path.splitext(self.filename or "")[1])
+            self._file = os.fdopen(fd, "wb")
+            for pending in self._chunks:
+                self._file.write(pending)
+            self._chunks = []
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._chunks.append(chunk)
+
+    def finish(self) -> IngestedUpload:
+        """The received upload"""
+        digest = self._hash.hexdigest()
+        if self._file is None:
+            return IngestedUpload(self.filename, self.content_type, self.size, digest, data=b"".join(self._chunks))
+        self._file.close()
+        return IngestedUpload(self.filename, self.content_type, self.size, digest, path=self._path)
+
+    def discard(self) -> None:
+        """Drop whatever was received"""
+        self._chunks = []
+        if self._file is not None:
+            self._file.close()
+            os.unlink(self._path)
+            self._file = None
+
+
+def spool_stream(
+    read: Callable[[int], bytes],
+    filename: Optional[str],
+    content_type: Optional[str] = None,
+    max_bytes: int = UPLOAD_MAX_BYTES
+) -> IngestedUpload:
+    """Ingest from a blocking read function (e.g. a zip archive member); run it in a worker thread"""
+    spool = UploadSpool(filename, content_type, max_bytes)
+    try:
+        while True:
+            chunk = read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                return spool.finish()
+            spool.write(chunk)
+    except BaseException:
+        spool.discard()
+        raise
+
+
+async def ingest_upload(upload, max_bytes: int = UPLOAD_MAX_BYTES) -> IngestedUpload:
+    """
+    Receive a FastAPI UploadFile in chunks
+
+    Args:
+        upload: The uploaded file
+        max_bytes: Size limit, enforced while reading
+
+    Returns:
+        The upload; close() it when done
+
+    Raises:
+        UploadTooLargeException: If the file is larger than max_bytes
+    """
+    # Reject early when the client declared the size
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLargeException(
+            f"{upload.filename or 'File'} is too large. Maximum size is {max_bytes // (1024 * 1024)}MB",
+            error_code="FILE_TOO_LARGE"
+        )
+
+    spool = UploadSpool(upload.filename, upload.content_type, max_bytes)
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            if spool.will_spill(len(chunk)):
+                await asyncio.to_thread(spool.write, chunk)
+            else:
+                spool.write(chunk)
+        return spool.finish()
+    except BaseException:
+        spool.discard()
+        raise
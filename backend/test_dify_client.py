@@ -0,0 +1,107 @@
+"""
+Tests for the Dify client, against the benchmark's fake Dify server
+"""
+import time
+import pytest
+import pytest_asyncio
+
+from clients.dify_client import DifyChatRequest, DifyClient
+from scripts.benchmark_dify_client import FakeDify
+
+
+@pytest_asyncio.fixture
+async def dify():
+    server = await FakeDify().start()
+    client = DifyClient(api_key="test", base_url=server.base_url, http2=False)
+    yield server, client
+    await client.aclose()
+    await server.stop()
+
+
+def chat_request(response_mode):
+    return DifyChatRequest(query="Parse this resume", response_mode=response_mode, user="test")
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_one_pooled_connection(dify):
+    server, client = dify
+
+    for _ in range(3):
+        assert "Benchmark Candidate" in (await client.send_chat_message(chat_request("blocking")))["answer"]
+    chunks = [chunk async for chunk in client.send_chat_message_stream(chat_request("streaming"))]
+
+    assert b"message_end" in b"".join(chunks)
+    assert server.requests == 4
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_closed_client_reconnects_on_next_use(dify):
+    server, client = dify
+    await client.send_chat_message(chat_request("blocking"))
+
+    await client.aclose()
+    await client.send_chat_message(chat_request("blocking"))
+
+    assert server.connections == 2
+
+
+RESUME_TEXT = "张伟 — 高级软件工程师，精通 Python 与分布式系统"
+
+
+@pytest.fixture
+def resume_parse(monkeypatch):
+    """Points /resume-parse at a fake Dify server"""
+    from services import resume_parse_service
+
+    def connect(server):
+        client = DifyClient(api_key="test", base_url=server.base_url, http2=False)
+        monkeypatch.setattr(resume_parse_service, "get_dify_resume_parser_client", lambda: client)
+        return client
+    return connect
+
+
+@pytest.mark.asyncio
+async def test_sse_proxy_forwards_raw_bytes_split_inside_characters(resume_parse):
+    from services.resume_parse_service import parse_resume_from_url
+
+    server = await FakeDify(events=[{"event": "message", "answer": RESUME_TEXT}], chunk_bytes=7).start()
+    client = resume_parse(server)
+
+    chunks = [chunk async for chunk in parse_resume_from_url("https://files.example.com/resume.pdf")]
+
+    assert all(isinstance(chunk, bytes) for chunk in chunks)
+    assert RESUME_TEXT in b"".join(chunks).decode("utf-8")
+    # Some chunks end partway through a character, which per-chunk decoding can't handle
+    with pytest.raises(UnicodeDecodeError):
+        for chunk in chunks:
+            chunk.decode("utf-8")
+    await client.aclose()
+    await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_closes_the_dify_stream(resume_parse):
+    from controllers.resume_controller import ResumeParseRequest, parse_resume_endpoint
+
+    server = await FakeDify(chunk_bytes=8, event_latency=0.2).start()
+    client = resume_parse(server)
+    response = await parse_resume_endpoint(ResumeParseRequest(file_url="https://files.example.com/resume.pdf"))
+    sent = []
+
+    async def send(message):
+        if message["type"] == "http.response.body" and sent:
+            raise OSError("client disconnected")
+        if message["type"] == "http.response.body":
+            sent.append(message["body"])
+
+    started = time.perf_counter()
+    with pytest.raises(OSError):
+        await response.stream_response(send)
+
+    # The proxy stopped at the disconnect instead of draining the rest of the stream
+    assert time.perf_counter() - started < 0.5
+    assert response.body_iterator.ag_frame is None
+    assert sent and isinstance(sent[0], bytes)
+    await client.aclose()
+    await server.stop()
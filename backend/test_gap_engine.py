@@ -0,0 +1,165 @@
+"""
+Tests for the skill taxonomy, gap engine and job matcher
+"""
+import time
+import pytest
+
+from services import gap_analysis_service
+from services.gap_engine import rank_profile_gaps
+from services.job_matcher import (
+    extract_job_requirements, iter_profile_job_matches, match_profile_to_job, match_profile_to_jobs
+)
+from services.profile_features import extract_profile_features
+from services.skill_taxonomy import get_skill_taxonomy
+
+PROFILE = {
+    "skills": {"raw_skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "React"]},
+    "experience": {"jobs": [{"title": "Software Engineer", "start_date": "2019", "end_date": "2022"}]}
+}
+
+JOB_POSTING = {
+    "id": 7,
+    "title": "Senior Full Stack Engineer",
+    "company_name": "TechCorp Inc",
+    "requirements": "5+ years of experience\nStrong React Native development\nBackend API design\n"
+                    "Cloud infrastructure (AWS)\nKubernetes is a plus",
+    "keywords": ["TypeScript"],
+    "job_description": "We go fast and ship a mobile app every week."
+}
+
+
+def test_taxonomy_matches_aliases_and_phrases():
+    """Aliases resolve to canonical skills and longer phrases win"""
+    taxonomy = get_skill_taxonomy()
+    names = [taxonomy.names[row] for row in taxonomy.match("Node.js/React Native, k8s and AWS (EC2, S3)")]
+    assert names == ["Node.js", "React Native", "Kubernetes", "AWS"]
+    assert taxonomy.canonicalize("golang") == taxonomy.index["go"]
+    assert taxonomy.canonicalize("underwater basket weaving") is None
+
+
+def test_gaps_exclude_known_skills_and_substitutes():
+    """Listed or experienced skills and alternatives to them are not ranked as top gaps"""
+    profile = {
+        "skills": {"raw_skills": ["Python", "FastAPI", "PostgreSQL", "Docker"]},
+        "experience": {"jobs": [{"title": "Engineer", "description": "Shipped services on AWS Lambda"}]}
+    }
+    gaps = rank_profile_gaps(profile, seniority_rank=3, top_k=5)
+    skills = [gap["skill"] for gap in gaps]
+
+    assert len(gaps) == 5
+    assert not {"Python", "FastAPI", "PostgreSQL", "Docker", "AWS"} & set(skills)
+    assert not {"Django", "Flask", "MySQL", "Google Cloud"} & set(skills)
+    assert [gap["score"] for gap in gaps] == sorted((gap["score"] for gap in gaps), reverse=True)
+    assert all(gap["suggestions"] and gap["importance"] in ("high", "medium", "low") for gap in gaps)
+
+
+def test_seniority_raises_leadership_and_architecture_gaps():
+    """Senior profiles are pushed harder towards leadership and system design"""
+    profile = {"skills": ["Python", "Django", "PostgreSQL"]}
+    junior = [gap["skill"] for gap in rank_profile_gaps(profile, seniority_rank=1, top_k=20)]
+    senior = [gap["skill"] for gap in rank_profile_gaps(profile, seniority_rank=4, top_k=20)]
+    assert senior.index("System Design") < junior.index("System Design")
+    assert senior.index("Technical Leadership") < junior.index("Technical Leadership")
+
+
+def test_ranking_is_fast_and_deterministic():
+    """Ranking needs no network calls and stays in single-digit milliseconds"""
+    profile = {"skills": ["React", "TypeScript", "CSS", "Jest"]}
+    first = rank_profile_gaps(profile, seniority_rank=2)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        assert rank_profile_gaps(profile, seniority_rank=2) == first
+    assert (time.perf_counter() - start) / 100 < 0.01
+
+
+def test_job_requirements_are_normalised_with_importance():
+    """Requirement lines map to canonical skills weighted by how strongly they are asked for"""
+    taxonomy = get_skill_taxonomy()
+    requirements = extract_job_requirements(JOB_POSTING)
+    skills = {taxonomy.names[row]: weight for row, weight in requirements["skills"].items()}
+
+    assert skills["React Native"] == 1.0
+    assert skills["AWS"] == 0.7
+    assert skills["Kubernetes"] == 0.4
+    assert skills["TypeScript"] == 0.7
+    assert "Go" not in skills  # "we go fast" is prose, not a skill
+    assert requirements["min_years"] == 5
+
+
+def test_job_match_reports_ranked_gaps_and_score():
+    """Missing critical requirements rank first; skills the profile has are matched"""
+    match = match_profile_to_job(PROFILE, extract_profile_features(PROFILE), JOB_POSTING)
+    requirements = [gap["requirement"] for gap in match["gaps"]]
+
+    assert match["job_posting_id"] == 7
+    assert 0 < match["match_score"] < 100
+    assert requirements[0] in ("React Native", "5+ years experience")
+    assert "React" not in requirements
+    assert {"requirement", "job_importance", "user_level", "required_level",
+            "gap_severity", "suggestions"} <= set(match["gaps"][0])
+
+
+def test_postings_without_recognised_skills_rank_last():
+    """A posting the taxonomy can't read has no evidence of fit, so it isn't a 100% match"""
+    vague = {"id": 8, "title": "Rockstar", "requirements": "Passion and a can-do attitude"}
+    results = match_profile_to_jobs(PROFILE, extract_profile_features(PROFILE), [vague, JOB_POSTING])
+
+    assert [result["job_posting_id"] for result in results] == [7, 8]
+    assert results[-1]["match_score"] == 0
+
+
+def test_bulk_matching_ranks_a_thousand_postings_quickly():
+    """One profile against 1,000 postings ranks the best fits first in well under a second"""
+    backend = {"title": "Backend Engineer", "requirements": "Python, FastAPI and PostgreSQL\nDocker"}
+    mobile = {"title": "iOS Engineer", "requirements": "Swift and SwiftUI required\nKotlin is a plus"}
+    postings = [
+        {**(backend if i % 2 else mobile), "id": i, "company_name": f"Company {i}"} for i in range(1000)
+    ]
+    features = extract_profile_features(PROFILE)
+
+    start = time.perf_counter()
+    results = match_profile_to_jobs(PROFILE, features, postings, top_k_gaps=3)
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 1000
+    assert all(result["job_title"] == "Backend Engineer" for result in results[:500])
+    assert results[0]["match_score"] > results[-1]["match_score"]
+    assert elapsed < 1.0
+
+
+@pytest.mark.asyncio
+async def test_job_rankings_are_sorted_and_cached_per_posting_version(monkeypatch):
+    """Only new or edited postings are re-scored, and results stay ordered by fit"""
+    profile = {**PROFILE, "id": 1, "updated_at": "2025-01-01"}
+    postings = [
+        {"id": 1, "updated_at": "v1", "title": "iOS Engineer", "requirements": "Swift required"},
+        {"id": 2, "updated_at": "v1", "title": "Backend Engineer", "requirements": "Python and PostgreSQL"},
+    ]
+    scored = []
+
+    async def load_profile(session, user_id):
+        return profile
+
+    async def load_job_postings(session, profile_id):
+        return postings
+
+    def counting_matches(profile, features, misses, top_k_gaps):
+        scored.extend(posting["id"] for posting in misses)
+        return iter_profile_job_matches(profile, features, misses, top_k_gaps)
+
+    monkeypatch.setattr(gap_analysis_service, "load_profile", load_profile)
+    monkeypatch.setattr(gap_analysis_service, "load_job_postings", load_job_postings)
+    monkeypatch.setattr(gap_analysis_service, "iter_profile_job_matches", counting_matches)
+    gap_analysis_service._job_match_cache.clear()
+
+    first = await gap_analysis_service.rank_job_postings(None, user_id=1)
+    assert [r["job_posting_id"] for r in first["rankings"]] == [2, 1]
+
+    postings.append({"id": 3, "updated_at": "v1", "title": "Python Developer", "requirements": "Python"})
+    postings[0] = {**postings[0], "updated_at": "v2", "requirements": "Python and FastAPI"}
+    second = await gap_analysis_service.rank_job_postings(None, user_id=1)
+
+    assert sorted(scored[2:]) == [1, 3]
+    scores = [r["match_score"] for r in second["rankings"]]
+    assert second["count"] == 3 and scores == sorted(scores, reverse=True)
@@ -0,0 +1,107 @@
+"""
+Tests for profile feature extraction and the cached profile analysis
+"""
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+
+from services import profile_analysis_service
+from services.profile_features import cluster_skills, extract_profile_features, normalize_skills
+
+PROFILE = {
+    "id": 1,
+    "updated_at": "2025-01-01",
+    "name": "Ada",
+    "skills": {"raw_skills": ["Python", "python", "React", {"name": "Kubernetes"}, "Pottery"]},
+    "experience": {"jobs": [
+        {"title": "Senior Engineer", "company": "Acme", "start_date": "2020", "end_date": "Present"},
+        {"title": "Engineer", "company": "Initech", "start_date": "2016", "end_date": "2021"}
+    ]},
+    "education": [{"degree": "BSc", "field": "Computer Science", "institution": "MIT"}]
+}
+
+
+def test_features_merge_overlapping_roles_and_read_seniority():
+    features = extract_profile_features(PROFILE)
+
+    assert features["skills"] == ["Python", "React", "Kubernetes", "Pottery"]
+    # 2016 to now as one span, not 5 + (now - 2020) years
+    assert features["tenure"]["total_years"] == datetime.now().year - 2016
+    assert features["tenure"]["roles_count"] == 2
+    assert features["tenure"]["current_title"] == "Senior Engineer"
+    assert features["seniority"]["level"] == "Senior"
+    assert features["seniority"]["title_signals"] == ["engineer", "senior"]
+    assert features["education"] == ["BSc, Computer Science, MIT"]
+
+
+def test_skills_are_flattened_and_clustered():
+    skills = normalize_skills({"languages": ["Go", {"skill": "Rust"}], "other": "SQL"})
+
+    assert skills == ["Go", "Rust", "SQL"]
+    assert cluster_skills(skills + ["Pottery"]) == {
+        "Backend": ["Go", "Rust"], "Data & ML": ["SQL"], "Other": ["Pottery"]
+    }
+
+
+def test_profiles_without_dates_fall_back_to_stated_years():
+    features = extract_profile_features({"years_experience": 1, "experience": {"jobs": [{"title": "Intern"}]}})
+
+    assert features["tenure"]["total_years"] == 1
+    # Under two years lifts an intern title to at least Junior
+    assert features["seniority"]["level"] == "Junior"
+    assert extract_profile_features({})["tenure"]["total_years"] == 0
+
+
+@pytest.fixture
+def analysis(monkeypatch):
+    """Analysis service with a fake profile loader and LLM"""
+    profile = dict(PROFILE)
+    llm = SimpleNamespace(calls=0, fail=False)
+
+    async def load_profile(session, user_id):
+        return profile
+
+    async def acompletion(**kwargs):
+        llm.calls += 1
+        if llm.fail:
+            raise RuntimeError("LLM unavailable")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="**Key Strengths:** LLM"))])
+
+    monkeypatch.setattr(profile_analysis_service, "load_profile", load_profile)
+    monkeypatch.setattr(profile_analysis_service, "acompletion", acompletion)
+    monkeypatch.setattr(profile_analysis_service, "_analysis_cache", profile_analysis_service.TTLCache())
+    monkeypatch.setattr(profile_analysis_service, "_fallback_cache", profile_analysis_service.TTLCache())
+    return SimpleNamespace(profile=profile, llm=llm)
+
+
+@pytest.mark.asyncio
+async def test_analysis_is_cached_until_the_profile_changes(analysis):
+    first = await profile_analysis_service.get_profile_analysis(None, 1)
+    second = await profile_analysis_service.get_profile_analysis(None, 1)
+
+    assert first["insights"] == "**Key Strengths:** LLM"
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert analysis.llm.calls == 1
+
+    analysis.profile["updated_at"] = "2025-02-01"
+    assert (await profile_analysis_service.get_profile_analysis(None, 1))["cached"] is False
+    assert analysis.llm.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_template_fallback_is_not_kept_once_the_llm_recovers(analysis, monkeypatch):
+    analysis.llm.fail = True
+    fallback = await profile_analysis_service.get_profile_analysis(None, 1)
+
+    assert fallback["insights"].startswith("Based on your profile analysis:")
+    assert "Senior" in fallback["insights"]
+    assert len(profile_analysis_service._analysis_cache) == 0
+    # Fallbacks are reused only briefly, then the LLM is tried again
+    assert (await profile_analysis_service.get_profile_analysis(None, 1))["cached"] is True
+    monkeypatch.setattr(profile_analysis_service._fallback_cache, "ttl_seconds", -1)
+
+    analysis.llm.fail = False
+    recovered = await profile_analysis_service.get_profile_analysis(None, 1)
+    assert recovered["insights"] == "**Key Strengths:** LLM"
+    assert recovered["cached"] is False
+    assert analysis.llm.calls == 2
@@ -0,0 +1,114 @@
+"""
+Tests for batch resume parsing
+"""
+import asyncio
+import io
+import zipfile
+from datetime import datetime
+import pytest
+
+import database
+import resume_parser
+from services import NotFoundException, ResumeParseException, UploadTooLargeException, resume_batch_service
+from services.resume_batch_service import iter_batch_parse, unpack_uploads
+from services.upload_ingest import IngestedUpload
+
+
+def zip_of(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in entries.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def uploads_of(*files):
+    return [IngestedUpload.from_bytes(name, content) for name, content in files]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Profile lookup and bulk resume inserts, recording each insert"""
+    inserts = []
+
+    async def get_profile_by_user_id(session, user_id):
+        return {"id": 3, "user_id": user_id} if user_id == 7 else None
+
+    async def create_resumes(session, profile_id, resumes_data):
+        inserts.append([resume["source_documents"]["original_resume"] for resume in resumes_data])
+        return [{**resume, "id": len(inserts) * 100 + i, "profile_id": profile_id, "created_at": datetime.now()}
+                for i, resume in enumerate(resumes_data)]
+
+    monkeypatch.setattr(database, "get_profile_by_user_id", get_profile_by_user_id)
+    monkeypatch.setattr(database, "create_resumes", create_resumes)
+    return inserts
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    """Parser stand-in that fails on b"bad" and tracks how many parses overlap"""
+    stats = {"in_flight": 0, "max_in_flight": 0, "parsed": []}
+
+    async def parse_resume_pdf(pdf_bytes, progress_callback=None, field_callback=None, digest=None):
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        stats["parsed"].append(pdf_bytes)
+        await asyncio.sleep(0.01)
+        stats["in_flight"] -= 1
+        if pdf_bytes == b"bad":
+            return {"success": False, "error": "Missing required fields: name", "partial_profile": {}}
+        return {"success": True, "profile": {"name": pdf_bytes.decode(), "skills": []}}
+
+    monkeypatch.setattr(resume_parser, "parse_resume_pdf", parse_resume_pdf)
+    return stats
+
+
+def test_unpack_uploads_expands_zips_and_hashes_files():
+    archive = zip_of({"cvs/b.pdf": b"b", "cvs/notes.txt": b"x", "__MACOSX/cvs/._b.pdf": b"y"})
+
+    files = unpack_uploads(uploads_of(("a.pdf", b"a"), ("folder.zip", archive)))
+
+    assert [(upload.filename, upload.open().read()) for upload in files] == [("a.pdf", b"a"), ("folder.zip/cvs/b.pdf", b"b")]
+    assert files[0].digest != files[1].digest
+
+
+def test_unpack_uploads_enforces_limits(monkeypatch):
+    monkeypatch.setattr(resume_batch_service, "RESUME_BATCH_MAX_FILES", 2)
+    with pytest.raises(ResumeParseException):
+        unpack_uploads(uploads_of(("folder.zip", zip_of({"1.pdf": b"1", "2.pdf": b"2", "3.pdf": b"3"}))))
+
+    monkeypatch.setattr(resume_batch_service, "RESUME_BATCH_MAX_FILE_BYTES", 4)
+    with pytest.raises(UploadTooLargeException):
+        unpack_uploads(uploads_of(("folder.zip", zip_of({"big.pdf": b"12345"}))))
+    with pytest.raises(ResumeParseException):
+        unpack_uploads(uploads_of(("broken.zip", b"not a zip")))
+
+
+@pytest.mark.asyncio
+async def test_batch_dedupes_streams_and_bulk_inserts(db, parser, monkeypatch):
+    monkeypatch.setattr(resume_batch_service, "RESUME_BATCH_INSERT_SIZE", 2)
+    uploads = uploads_of(("a.pdf", b"a"), ("b.pdf", b"b"), ("copy-of-a.pdf", b"a"), ("c.pdf", b"c"), ("bad.pdf", b"bad"))
+
+    events = [event async for event in iter_batch_parse(None, 7, uploads, concurrency=2)]
+
+    kinds = [event["event"] for event in events]
+    assert kinds[0] == "duplicate" and kinds[-1] == "complete"
+    assert events[0]["data"] == {"filename": "copy-of-a.pdf", "duplicate_of": "a.pdf"}
+    assert kinds.count("file") == 4
+    assert sorted(parser["parsed"]) == [b"a", b"b", b"bad", b"c"]
+    assert parser["max_in_flight"] == 2
+
+    failed = [event["data"] for event in events if event["event"] == "file" and not event["data"]["success"]]
+    assert failed == [{"filename": "bad.pdf", "success": False, "error": "Missing required fields: name", "partial_profile": {}}]
+
+    # Three parsed resumes saved in two inserts
+    assert [len(batch) for batch in db] == [2, 1]
+    assert sorted(name for batch in db for name in batch) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert events[-1]["data"] == {"files": 5, "duplicates": 1, "parsed": 3, "failed": 1, "saved": 3}
+
+
+@pytest.mark.asyncio
+async def test_batch_needs_a_profile(db, parser):
+    with pytest.raises(NotFoundException):
+        await anext(iter_batch_parse(None, 8, uploads_of(("a.pdf", b"a"))))
+    assert parser["parsed"] == []
@@ -0,0 +1,189 @@
+"""
+Tests for the resume generation pipeline
+"""
+import asyncio
+import copy
+import json
+import time
+from types import SimpleNamespace
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+import database
+from services import resume_generation_service
+from services.resume_generation_service import generate_resume, generate_sections, plan_sections
+from workflows import checkpointing
+from workflows import BaseWorkflow, ResumeGenerationWorkflow, WorkflowSessionStore
+
+PROFILE = {
+    "id": 7,
+    "name": "Ada Lovelace",
+    "updated_at": "2025-01-01T00:00:00",
+    "professional_summary": "Backend engineer building data platforms",
+    "skills": {"raw_skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "React"]},
+    "experience": {"jobs": [
+        {"title": f"Engineer {i}", "company": f"Company {i}", "duration": f"201{i}-201{i + 1}",
+         "achievements": [f"Shipped project {i}"]}
+        for i in range(6)
+    ]}
+}
+
+POSTING = {
+    "id": 11,
+    "updated_at": "2025-02-01T00:00:00",
+    "title": "Senior Backend Engineer",
+    "company_name": "Initech",
+    "requirements": "Strong Python and PostgreSQL. Docker preferred."
+}
+
+
+class FakeLLM:
+    """acompletion stand-in that tracks concurrency and answers per section kind"""
+
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("rate limited")
+            prompt = kwargs["messages"][0]["content"]
+            if prompt.startswith("Write a 2-3 sentence"):
+                content = "Backend engineer focused on Python services."
+            elif prompt.startswith("Select and order"):
+                content = json.dumps(["PostgreSQL", "Python", "Kubernetes"])
+            else:
+                content = "```json\n" + json.dumps(["Built things", "Improved things"]) + "\n```"
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch):
+    monkeypatch.setattr(resume_generation_service, "_section_cache",
+                        resume_generation_service.TTLCache(max_entries=100, ttl_seconds=60))
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeLLM()
+    monkeypatch.setattr(resume_generation_service, "acompletion", fake)
+    return fake
+
+
+@pytest.fixture
+def saved_resumes(monkeypatch):
+    """Serve fixed rows and record resumes_v2 inserts instead of using the database"""
+    saved = []
+
+    async def load_profile(session, user_id):
+        return PROFILE
+
+    async def load_job_postings(session, profile_id):
+        return [POSTING]
+
+    async def create_resume(session, resume_data):
+        # Like the resumes_v2 insert trigger: a NULL version gets the next one for the posting
+        version = resume_data["version"] or 1 + max(
+            (row["version"] for row in saved if row["job_posting_id"] == resume_data["job_posting_id"]), default=0
+        )
+        row = {**resume_data, "version": version, "id": len(saved) + 1,
+               "created_at": "2025-03-01T00:00:00", "updated_at": "2025-03-01T00:00:00"}
+        saved.append(row)
+        return row
+
+    monkeypatch.setattr(resume_generation_service, "load_profile", load_profile)
+    monkeypatch.setattr(resume_generation_service, "load_job_postings", load_job_postings)
+    monkeypatch.setattr(database, "create_resume", create_resume)
+    return saved
+
+
+@pytest.mark.asyncio
+async def test_sections_run_concurrently_with_bounded_parallelism(llm):
+    sections = plan_sections(PROFILE, POSTING)
+    assert [section["key"] for section in sections][:3] == ["summary", "skills", "experience:0"]
+
+    start = time.perf_counter()
+    results = await generate_sections(sections, max_concurrency=3)
+    elapsed = time.perf_counter() - start
+
+    assert llm.calls == len(sections) == 8
+    assert llm.max_in_flight == 3
+    # 8 calls of 50ms, 3 at a time: ~3 rounds instead of 8 sequential calls
+    assert elapsed < 0.3
+    # Skills are limited to ones the candidate actually lists
+    assert results["skills"]["content"] == ["PostgreSQL", "Python"]
+    assert results["experience:0"]["content"] == ["Built things", "Improved things"]
+
+
+@pytest.mark.asyncio
+async def test_regenerating_after_an_edit_only_recomputes_changed_sections(llm):
+    await generate_sections(plan_sections(PROFILE, POSTING))
+    first_calls = llm.calls
+
+    cached = await generate_sections(plan_sections(PROFILE, POSTING))
+    assert llm.calls == first_calls
+    assert all(result["cached"] for result in cached.values())
+
+    edited = copy.deepcopy(PROFILE)
+    edited["experience"]["jobs"][2]["achievements"].append("Cut latency by 30%")
+    results = await generate_sections(plan_sections(edited, POSTING))
+    assert llm.calls == first_calls + 1
+    assert [key for key, result in results.items() if not result["cached"]] == ["experience:2"]
+
+
+@pytest.mark.asyncio
+async def test_failed_sections_fall_back_and_are_not_cached(monkeypatch):
+    failing = FakeLLM(delay=0, fail=True)
+    monkeypatch.setattr(resume_generation_service, "acompletion", failing)
+
+    results = await generate_sections(plan_sections(PROFILE, POSTING))
+    assert results["summary"]["content"] == PROFILE["professional_summary"]
+    assert results["experience:1"]["content"] == ["Shipped project 1"]
+    # Skills the job asks for come first in the fallback ordering
+    assert results["skills"]["content"][:3] == ["Python", "PostgreSQL", "Docker"]
+
+    await generate_sections(plan_sections(PROFILE, POSTING))
+    assert failing.calls == 16
+
+
+@pytest.mark.asyncio
+async def test_generate_resume_saves_new_versions(llm, saved_resumes):
+    first = await generate_resume(None, user_id=1)
+    second = await generate_resume(None, user_id=1)
+
+    assert [row["version"] for row in saved_resumes] == [1, 2]
+    assert (first["version"], second["version"]) == (1, 2)
+    assert first["job_posting_id"] == second["job_posting_id"] == POSTING["id"]
+    assert second["sections"]["generated"] == []
+    resume = second["resume"]
+    assert resume["profile_id"] == PROFILE["id"]
+    assert resume["source_documents"]["section_hashes"].keys() == first["resume"]["source_documents"]["section_hashes"].keys()
+    assert "**PROFESSIONAL SUMMARY**" in second["markdown"]
+
+
+@pytest.mark.asyncio
+async def test_workflow_streams_sections_in_order(llm, saved_resumes, monkeypatch):
+    monkeypatch.setattr(checkpointing, "_checkpointer", InMemorySaver())
+    monkeypatch.setattr(BaseWorkflow, "_checkpointed_workflows", {})
+    BaseWorkflow._session_store = WorkflowSessionStore()
+    try:
+        events = [event async for event in ResumeGenerationWorkflow().stream_message("Generate my resume", 301)]
+    finally:
+        BaseWorkflow._session_store = None
+
+    result = events[-1]["result"]
+    streamed = "".join(event["content"] for event in events if event["type"] == "token")
+    assert streamed == result["response"]
+    assert streamed.index("PROFESSIONAL SUMMARY") < streamed.index("TECHNICAL SKILLS") < streamed.index("Engineer 5")
+    assert result["metadata"]["version"] == 1
+    assert result["metadata"]["target_role"] == POSTING["title"]
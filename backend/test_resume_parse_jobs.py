@@ -0,0 +1,219 @@
+"""
+Tests for the background resume parse job queue
+"""
+import asyncio
+import time
+from datetime import datetime
+import pytest
+
+import database
+import resume_parser
+from services import NotFoundException, ServiceUnavailableException
+from services.resume_parse_jobs import ResumeParseJobQueue
+from services.upload_ingest import IngestedUpload
+
+
+PARSED_PROFILE = {"name": "Benchmark Candidate", "skills": ["Python"], "email": "bench@example.com"}
+
+
+@pytest.fixture
+def job_rows(monkeypatch):
+    """In-memory resume_parse_jobs table, plus profile/resume inserts"""
+    rows = {}
+
+    def create_resume_parse_job(session, job_data):
+        rows[job_data["id"]] = {
+            **job_data, "status": "queued", "progress": 0,
+            "created_at": datetime.now(), "updated_at": datetime.now()
+        }
+        return dict(rows[job_data["id"]])
+
+    def get_resume_parse_job(session, job_id, user_id):
+        row = rows.get(job_id)
+        return dict(row) if row and row["user_id"] == user_id else None
+
+    def update_resume_parse_job(session, job_id, job_data):
+        rows[job_id].update(job_data, updated_at=datetime.now())
+        return dict(rows[job_id])
+
+    async def create_profile(session, profile_data):
+        return {**profile_data, "id": 1, "created_at": datetime.now(), "updated_at": datetime.now()}
+
+    async def create_resume(session, resume_data):
+        return {**resume_data, "id": 1, "profile_id": 1, "created_at": datetime.now(), "updated_at": datetime.now()}
+
+    for fake in (create_resume_parse_job, get_resume_parse_job, update_resume_parse_job, create_profile, create_resume):
+        monkeypatch.setattr(database, fake.__name__, fake)
+    return rows
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    """Parser stand-in that runs until released; records the uploads it parsed"""
+    release = asyncio.Event()
+    parsed = []
+
+    async def parse_resume_pdf(pdf, progress_callback=None, field_callback=None, digest=None):
+        parsed.append(pdf)
+        await progress_callback({"step": "parse", "progress": 30, "message": "Analyzing resume content..."})
+        await field_callback({"field": "name", "value": PARSED_PROFILE["name"]})
+        await release.wait()
+        return {"success": True, "profile": PARSED_PROFILE}
+
+    monkeypatch.setattr(resume_parser, "parse_resume_pdf", parse_resume_pdf)
+    return release, parsed
+
+
+async def wait_for_status(jobs, job_id, status):
+    for _ in range(200):
+        job = await jobs.get(None, job_id, user_id=7)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job never reached {status}: {job}")
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_before_the_parse_finishes(job_rows, parser):
+    release, _ = parser
+    jobs = ResumeParseJobQueue(workers=1, max_queued=5)
+    jobs.start()
+
+    job = await jobs.submit(None, 7, IngestedUpload.from_bytes("resume.pdf", b"%PDF"))
+    assert job["status"] == "queued"
+    await wait_for_status(jobs, job["id"], "running")
+
+    release.set()
+    job = await wait_for_status(jobs, job["id"], "succeeded")
+    assert job["result"]["profile"]["name"] == "Benchmark Candidate"
+    assert job_rows[job["id"]]["status"] == "succeeded"
+    assert job_rows[job["id"]]["step"] == "parse"
+    await jobs.stop()
+
+
+@pytest.mark.asyncio
+async def test_subscribers_get_replayed_fields_and_the_final_event(job_rows, parser):
+    release, _ = parser
+    jobs = ResumeParseJobQueue(workers=1, max_queued=5)
+    jobs.start()
+    job = await jobs.submit(None, 7, IngestedUpload.from_bytes("resume.pdf", b"%PDF"))
+    await wait_for_status(jobs, job["id"], "running")
+    await asyncio.sleep(0.01)
+
+    # A late subscriber still sees the field parsed before it connected
+    events = jobs.subscribe(None, job["id"], 7)
+    seen = [await anext(events), await anext(events)]
+    release.set()
+    seen += [event async for event in events]
+
+    assert [event["event"] for event in seen] == ["status", "field", "complete"]
+    assert seen[1]["data"] == {"field": "name", "value": "Benchmark Candidate"}
+    assert seen[-1]["data"]["success"] is True
+
+    # Once finished, the job is served from its row
+    replay = [event async for event in jobs.subscribe(None, job["id"], 7)]
+    assert [event["event"] for event in replay] == ["status", "complete"]
+    await jobs.stop()
+
+
+@pytest.mark.asyncio
+async def test_queue_is_bounded(job_rows, parser):
+    release, _ = parser
+    jobs = ResumeParseJobQueue(workers=1, max_queued=1)
+    jobs.start()
+
+    first = await jobs.submit(None, 7, IngestedUpload.from_bytes("a.pdf", b"a"))
+    await wait_for_status(jobs, first["id"], "running")
+    await jobs.submit(None, 7, IngestedUpload.from_bytes("b.pdf", b"b"))
+    with pytest.raises(ServiceUnavailableException):
+        await jobs.submit(None, 7, IngestedUpload.from_bytes("c.pdf", b"c"))
+
+    release.set()
+    await jobs.stop()
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_and_queued_jobs(job_rows, parser):
+    release, parsed = parser
+    jobs = ResumeParseJobQueue(workers=1, max_queued=5)
+    jobs.start()
+
+    running = await jobs.submit(None, 7, IngestedUpload.from_bytes("a.pdf", b"a"))
+    queued = await jobs.submit(None, 7, IngestedUpload.from_bytes("b.pdf", b"b"))
+    await wait_for_status(jobs, running["id"], "running")
+
+    assert (await jobs.cancel(None, queued["id"], 7))["status"] == "cancelled"
+    assert (await jobs.cancel(None, running["id"], 7))["status"] == "cancelled"
+    assert job_rows[running["id"]]["status"] == "cancelled"
+
+    # The worker survives the cancellation and the cancelled upload is never parsed
+    third = await jobs.submit(None, 7, IngestedUpload.from_bytes("c.pdf", b"c"))
+    release.set()
+    await wait_for_status(jobs, third["id"], "succeeded")
+    assert parsed == [b"a", b"c"]
+    await jobs.stop()
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_scoped_to_their_user(job_rows, parser):
+    jobs = ResumeParseJobQueue(workers=1, max_queued=5)
+    jobs.start()
+    job = await jobs.submit(None, 7, IngestedUpload.from_bytes("a.pdf", b"a"))
+
+    with pytest.raises(NotFoundException):
+        await jobs.get(None, job["id"], 8)
+    with pytest.raises(NotFoundException):
+        await jobs.cancel(None, job["id"], 8)
+    await jobs.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_unfinished_jobs(job_rows, parser):
+    jobs = ResumeParseJobQueue(workers=1, max_queued=5)
+    jobs.start()
+    running = await jobs.submit(None, 7, IngestedUpload.from_bytes("a.pdf", b"a"))
+    queued = await jobs.submit(None, 7, IngestedUpload.from_bytes("b.pdf", b"b"))
+    await wait_for_status(jobs, running["id"], "running")
+
+    await jobs.stop()
+
+    assert job_rows[running["id"]]["status"] == "failed"
+    assert job_rows[queued["id"]]["status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_job_writes_run_off_the_event_loop_and_shutdown_mid_write_still_finishes(job_rows, parser, monkeypatch):
+    release, _ = parser
+    update_resume_parse_job = database.update_resume_parse_job
+    writing = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow_update(session, job_id, job_data):
+        # The Supabase client is synchronous, so a slow write blocks whichever thread runs it
+        if job_data["status"] == "succeeded":
+            loop.call_soon_threadsafe(writing.set)
+            time.sleep(0.3)
+        return update_resume_parse_job(session, job_id, job_data)
+
+    monkeypatch.setattr(database, "update_resume_parse_job", slow_update)
+    jobs = ResumeParseJobQueue(workers=1, max_queued=5)
+    jobs.start()
+    upload = IngestedUpload.from_bytes("resume.pdf", b"%PDF")
+    closed = []
+    monkeypatch.setattr(upload, "close", lambda: closed.append(True))
+    job = await jobs.submit(None, 7, upload)
+    await wait_for_status(jobs, job["id"], "running")
+    events = jobs.subscribe(None, job["id"], 7)
+    assert (await anext(events))["event"] == "status"
+
+    release.set()
+    await writing.wait()
+    # The loop gets to run while the write is still blocking its thread
+    assert job["id"] in jobs._jobs
+
+    # Stopping mid-write still reports the outcome and releases the upload
+    await jobs.stop()
+    seen = [event async for event in events]
+    assert seen[-1]["event"] == "complete" and seen[-1]["data"]["success"] is True
+    assert job["id"] not in jobs._jobs
+    assert closed
@@ -0,0 +1,428 @@
+"""
+Tests for the resume parser
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+
+import resume_parser
+from scripts.benchmark_resume_parser import build_resume_pdf
+from services import pdf_extraction, resume_parse_cache
+from services.partial_json import PartialJSONScanner
+from services.resume_sections import find_contact_in_text, merge_contact_fields, preextract_resume, segment_sections
+
+
+# What the stand-in LLM returns, plus the contact fields the local pre-pass finds
+PARSED_PROFILE = {
+    "name": "Benchmark Candidate", "skills": ["Python"],
+    "email": "bench@example.com", "phone": "(555) 010-0000"
+}
+
+
+@pytest.fixture(autouse=True)
+def extraction_pool():
+    pdf_extraction.start_pdf_executor(1)
+    yield
+    pdf_extraction.shutdown_pdf_executor()
+
+
+@pytest.fixture(autouse=True)
+def parse_cache():
+    cache = resume_parse_cache.open_parse_cache("memory")
+    yield cache
+    resume_parse_cache.close_parse_cache()
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Async LLM stand-in that records the resume text it was given"""
+    prompts = []
+
+    async def acompletion(**kwargs):
+        prompts.append(kwargs["messages"][0]["content"])
+        await asyncio.sleep(0.05)
+        content = "```json\n" + json.dumps({"name": "Benchmark Candidate", "skills": ["Python"]}) + "\n```"
+        assert kwargs["stream"] is True
+
+        async def stream():
+            for i in range(0, len(content), 7):
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + 7]))])
+        return stream()
+
+    monkeypatch.setattr(resume_parser, "acompletion", acompletion)
+    return prompts
+
+
+@pytest.mark.asyncio
+async def test_parse_resume_pdf_extracts_in_pool(llm):
+    result = await resume_parser.parse_resume_pdf(build_resume_pdf(pages=2))
+
+    assert result == {"success": True, "profile": PARSED_PROFILE}
+    assert "page 2" in llm[0]
+
+
+@pytest.mark.asyncio
+async def test_parser_graph_is_compiled_once(llm, monkeypatch):
+    def recompile():
+        raise AssertionError("parser graph rebuilt per request")
+
+    monkeypatch.setattr(resume_parser, "create_resume_parser_dag", recompile)
+    result = await resume_parser.parse_resume_pdf(build_resume_pdf(pages=1))
+
+    assert result["success"] is True
+
+
+@pytest.mark.asyncio
+async def test_concurrent_parses_do_not_block_the_event_loop(llm):
+    pdfs = [build_resume_pdf(pages=40) for _ in range(3)]
+    lags = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - start)
+
+    probe_task = asyncio.create_task(probe())
+    results = await asyncio.gather(*[resume_parser.parse_resume_pdf(pdf) for pdf in pdfs])
+    done.set()
+    await probe_task
+
+    assert all(result["success"] for result in results)
+    assert max(lags) < 0.1
+
+
+@pytest.mark.asyncio
+async def test_invalid_pdf_reports_extraction_error(llm):
+    result = await resume_parser.parse_resume_pdf(b"not a pdf")
+
+    assert result["success"] is False
+    assert result["error"].startswith("PDF extraction failed")
+    assert llm == []
+
+
+@pytest.mark.asyncio
+async def test_reupload_is_served_from_cache(llm, monkeypatch):
+    pdf = build_resume_pdf(pages=2)
+    first = await resume_parser.parse_resume_pdf(pdf)
+
+    async def no_extraction(pdf_bytes):
+        raise AssertionError("cached upload was extracted again")
+
+    monkeypatch.setattr(resume_parser, "extract_pdf_pages", no_extraction)
+    second = await resume_parser.parse_resume_pdf(pdf)
+
+    assert second == first
+    assert len(llm) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_is_keyed_by_model_and_reuses_extracted_text(llm, monkeypatch):
+    pdf = build_resume_pdf(pages=2)
+    await resume_parser.parse_resume_pdf(pdf)
+
+    async def no_extraction(pdf_bytes):
+        raise AssertionError("cached text was extracted again")
+
+    monkeypatch.setattr(resume_parser, "extract_pdf_pages", no_extraction)
+    result = await resume_parser.parse_resume_pdf(pdf, model_name="gemini/gemini-1.5-pro")
+
+    assert result["success"] is True
+    assert len(llm) == 2
+    assert "page 2" in llm[1]
+
+
+@pytest.mark.asyncio
+async def test_extracted_text_is_cached_per_extraction_backend(llm, monkeypatch):
+    pdf = build_resume_pdf(pages=1)
+    await resume_parser.parse_resume_pdf(pdf)
+    extracted = []
+
+    async def extract_pdf_pages(source, on_progress=None):
+        extracted.append(pdf_extraction.extractor_id())
+        return ["Text from another backend"]
+
+    monkeypatch.setattr(resume_parser, "extract_pdf_pages", extract_pdf_pages)
+    pdf_extraction.start_pdf_executor(1, backend="pdfminer")
+    await resume_parser.parse_resume_pdf(pdf, model_name="gemini/gemini-1.5-pro")
+
+    assert len(extracted) == 1 and extracted[0].startswith("pdfminer-")
+    assert "Text from another backend" in llm[1]
+
+
+@pytest.mark.asyncio
+async def test_failed_parses_are_not_cached(llm):
+    await resume_parser.parse_resume_pdf(b"not a pdf")
+    result = await resume_parser.parse_resume_pdf(b"not a pdf")
+
+    assert result["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_parser_emits_cache_hit(llm):
+    pdf = build_resume_pdf(pages=2)
+    await resume_parser.parse_resume_pdf(pdf)
+    events = []
+
+    async def progress_callback(event):
+        events.append(event)
+
+    result = await resume_parser.parse_resume_pdf(pdf, progress_callback=progress_callback)
+
+    assert result["success"] is True
+    assert [event["step"] for event in events] == ["cache"]
+    assert events[0]["cache_hit"] is True
+    assert len(llm) == 1
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    cache = resume_parse_cache.SqliteParseCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.set("a", {"name": "A"})
+    cache.set("b", {"name": "B"})
+    time.sleep(0.01)
+    cache.get("a")
+    cache.set("c", {"name": "C"})
+
+    assert cache.get("a") == {"name": "A"}
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    cache.close()
+
+
+def test_sqlite_cache_expires_entries(tmp_path):
+    cache = resume_parse_cache.SqliteParseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=0)
+    cache.set("a", "text")
+    time.sleep(0.01)
+
+    assert cache.get("a") is None
+    cache.close()
+
+
+def test_sqlite_cache_waits_for_another_workers_write(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = resume_parse_cache.SqliteParseCache(path)
+    second = resume_parse_cache.SqliteParseCache(path)
+
+    # Another worker holds the write lock for a moment
+    writer = sqlite3.connect(path, check_same_thread=False)
+    writer.execute("BEGIN IMMEDIATE")
+    release = threading.Timer(0.2, writer.commit)
+    release.start()
+    first.set("a", "text")
+    release.join()
+
+    assert second.get("a") == "text"
+    assert first._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    for cache in (first, second):
+        cache.close()
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_parser_reports_real_progress(llm):
+    events = []
+
+    async def progress_callback(event):
+        events.append(event)
+
+    result = await resume_parser.parse_resume_pdf(build_resume_pdf(pages=20), progress_callback=progress_callback)
+
+    assert result["success"] is True
+    pages = [event["pages_done"] for event in events if "pages_done" in event]
+    assert pages[-1] == 20 and pages == sorted(pages)
+    chunks = [event["chunks_parsed"] for event in events if "chunks_parsed" in event]
+    assert len(chunks) > 1 and chunks == list(range(1, len(chunks) + 1))
+    progress = [event["progress"] for event in events]
+    assert progress == sorted(progress) and progress[-1] == 100
+
+
+def test_partial_json_scanner_yields_fields_and_items_as_they_complete():
+    scanner = PartialJSONScanner()
+    text = '```json\n{"name": "A, B", "skills": ["x", {"y": 1}], "note": "}"}\n```'
+
+    events = [event for char in text for event in scanner.feed(char)]
+
+    assert events == [
+        {"field": "name", "value": "A, B"},
+        {"field": "skills", "index": 0, "value": "x"},
+        {"field": "skills", "index": 1, "value": {"y": 1}},
+        {"field": "skills", "value": ["x", {"y": 1}]},
+        {"field": "note", "value": "}"},
+    ]
+    assert scanner.completed_fields == 3
+    assert scanner.finished
+
+
+@pytest.mark.asyncio
+async def test_parser_emits_parsed_fields(llm):
+    fields = []
+    progress = []
+
+    async def field_callback(event):
+        fields.append(event)
+
+    async def progress_callback(event):
+        progress.append(event)
+
+    result = await resume_parser.parse_resume_pdf(
+        build_resume_pdf(pages=1), progress_callback=progress_callback, field_callback=field_callback
+    )
+
+    assert result["success"] is True
+    assert [event["fields_parsed"] for event in progress if "fields_parsed" in event] == [1, 2]
+    # Email and phone only appear in the body text, so they fill in after the LLM's fields
+    assert fields == [
+        {"field": "name", "value": "Benchmark Candidate"},
+        {"field": "skills", "index": 0, "value": "Python"},
+        {"field": "skills", "value": ["Python"]},
+        {"field": "email", "value": "bench@example.com"},
+        {"field": "phone", "value": "(555) 010-0000"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_long_resume_is_parsed_in_chunks(llm):
+    result = await resume_parser.parse_resume_pdf(build_resume_pdf(pages=12))
+
+    assert result == {"success": True, "profile": PARSED_PROFILE}
+    assert len(llm) > 1
+    assert all(f"of {len(llm)} of a long resume" in prompt for prompt in llm)
+    assert all(len(prompt) < resume_parser.RESUME_CHUNK_CHARS + len(resume_parser.RESUME_CHUNK_PROMPT) for prompt in llm)
+
+
+@pytest.mark.asyncio
+async def test_a_malformed_chunk_does_not_fail_a_long_resume(llm, monkeypatch):
+    parse_valid_chunk = resume_parser.acompletion
+    calls = []
+
+    async def acompletion(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            async def stream():
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content='{"name": "Bench'))])
+            return stream()
+        return await parse_valid_chunk(**kwargs)
+
+    monkeypatch.setattr(resume_parser, "acompletion", acompletion)
+    result = await resume_parser.parse_resume_pdf(build_resume_pdf(pages=12))
+
+    assert result == {"success": True, "profile": PARSED_PROFILE}
+    assert len(calls) == len(llm) + 1
+
+
+def test_split_resume_text_breaks_at_section_headings():
+    experience = "EXPERIENCE\n" + "\n".join(["Built things"] * 18)
+    education = "EDUCATION\n" + "\n".join(["BS Computer Science"] * 5)
+    text = "Jane Doe\n" + experience + "\n" + education
+
+    assert resume_parser.split_resume_text(text, max_chars=300) == ["Jane Doe\n" + experience, education]
+
+
+def test_split_resume_text_splits_long_sections_between_lines():
+    text = "Jane Doe\nEXPERIENCE\n" + "\n".join(["Built things"] * 60)
+
+    chunks = resume_parser.split_resume_text(text, max_chars=300)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert "\n".join(chunks) == text
+
+
+def test_merge_chunk_profiles_deduplicates_in_chunk_order():
+    merged = resume_parser.merge_chunk_profiles([
+        {"name": "Jane Doe", "email": None, "skills": ["Python"],
+         "experience": [{"company": "Acme", "title": "Engineer", "start_date": "2019"}]},
+        {"name": None, "email": "jane@example.com", "skills": ["python", "Go"],
+         "experience": [{"company": "ACME ", "title": "Engineer", "start_date": "2019", "location": "NY"},
+                        {"company": "Globex", "title": "Intern"}]},
+    ])
+
+    assert merged == {
+        "name": "Jane Doe",
+        "email": "jane@example.com",
+        "skills": ["Python", "Go"],
+        "experience": [
+            {"company": "Acme", "title": "Engineer", "start_date": "2019", "location": "NY"},
+            {"company": "Globex", "title": "Intern"},
+        ],
+    }
+
+
+@pytest.mark.parametrize("backend", ["pypdf2", "pypdfium2", "pdfminer"])
+def test_extraction_backends_read_every_page(backend, tmp_path):
+    if backend != "pypdf2":
+        pytest.importorskip({"pypdfium2": "pypdfium2", "pdfminer": "pdfminer"}[backend])
+    pdf = build_resume_pdf(pages=10)
+
+    pages = pdf_extraction.extract_pages(pdf, backend=backend)
+
+    assert len(pages) == 10
+    assert "page 10" in pages[9]
+
+    # Spooled uploads are read from their temp file
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(pdf)
+    assert pdf_extraction.extract_pages(str(path), backend=backend) == pages
+
+
+def test_unknown_extraction_backend_is_rejected():
+    with pytest.raises(ValueError):
+        pdf_extraction.start_pdf_executor(1, backend="ocr")
+
+
+def test_preextract_resume_finds_contact_fields_and_trims_text():
+    text = "\n".join([
+        "Jane Doe",
+        "jane.doe@example.com | (555) 010-0199 | linkedin.com/in/janedoe",
+        "Boston, MA",
+        "EXPERIENCE",
+        "Northwind Labs - Research Scientist (2020 - Present)",
+        "References",
+        "Available on request",
+    ])
+
+    contact, llm_text = preextract_resume(text)
+
+    assert contact == {
+        "name": "Jane Doe", "email": "jane.doe@example.com",
+        "phone": "(555) 010-0199", "location": "Boston, MA"
+    }
+    assert llm_text == "Jane Doe\nBoston, MA\nEXPERIENCE\nNorthwind Labs - Research Scientist (2020 - Present)"
+
+
+def test_all_caps_names_are_not_section_headings():
+    text = "JANE DOE\nSENIOR DATA ENGINEER\njane@example.com\nTECHNICAL SKILLS\nPython\nWORK EXPERIENCE\nAcme"
+
+    headings = [heading for heading, _ in segment_sections(text)]
+    contact, _ = preextract_resume(text)
+
+    assert headings == [None, "TECHNICAL SKILLS", "WORK EXPERIENCE"]
+    assert contact["email"] == "jane@example.com"
+
+
+def test_phone_found_in_prose_only_fills_a_missing_llm_phone():
+    text = "Jane Doe\njane@example.com\nEXPERIENCE\nCalled the support line at 555-010-0123 daily"
+    contact, _ = preextract_resume(text)
+    fallback = find_contact_in_text(text, contact)
+
+    assert "phone" not in contact
+    assert fallback == {"phone": "555-010-0123"}
+    assert merge_contact_fields({"phone": "+1 617 555 0100"}, contact, fallback)["phone"] == "+1 617 555 0100"
+    assert merge_contact_fields({"phone": None}, contact, fallback)["phone"] == "555-010-0123"
+
+
+@pytest.mark.asyncio
+async def test_contact_fields_survive_an_llm_outage(monkeypatch):
+    async def acompletion(**kwargs):
+        raise RuntimeError("service unavailable")
+
+    monkeypatch.setattr(resume_parser, "acompletion", acompletion)
+    result = await resume_parser.parse_resume_pdf(build_resume_pdf(pages=1))
+
+    assert result["success"] is False
+    assert result["partial_profile"] == {"email": "bench@example.com", "phone": "(555) 010-0000"}
@@ -0,0 +1,174 @@
+"""
+Tests for the S3 client and direct uploads, against moto's in-memory S3
+"""
+import io
+import threading
+from types import SimpleNamespace
+import pytest
+
+moto = pytest.importorskip("moto")
+import boto3
+
+from clients.s3_client import MB, S3Client
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    with moto.mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="resumes")
+        client = S3Client(
+            "test", "test", bucket_name="resumes",
+            multipart_threshold=5 * MB, multipart_chunk_size=5 * MB, multipart_concurrency=2
+        )
+        yield client
+        client.close()
+
+
+def stored(client, key):
+    return client.s3_client.get_object(Bucket="resumes", Key=key)["Body"].read()
+
+
+@pytest.mark.asyncio
+async def test_small_upload_is_a_single_put(s3):
+    result = await s3.upload_file(b"%PDF-small", "resume.pdf")
+
+    assert result["success"] is True
+    assert result["multipart"] is False
+    assert result["file_size"] == 10
+    assert result["content_type"] == "application/pdf"
+    assert stored(s3, result["s3_key"]) == b"%PDF-small"
+
+    info = await s3.get_file_info(result["s3_key"])
+    assert info["file_size"] == 10
+    await s3.delete_file(result["s3_key"])
+    with pytest.raises(Exception):
+        await s3.get_file_info(result["s3_key"])
+
+
+@pytest.mark.asyncio
+async def test_large_upload_is_sent_in_parts_off_the_event_loop(s3, monkeypatch):
+    threads = []
+    upload_fileobj = s3.s3_client.upload_fileobj
+
+    def recording_upload(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return upload_fileobj(*args, **kwargs)
+
+    monkeypatch.setattr(s3.s3_client, "upload_fileobj", recording_upload)
+    content = b"%PDF-" + b"x" * (11 * MB)
+
+    result = await s3.upload_file(io.BytesIO(content), "big.pdf", file_size=len(content))
+
+    assert result["multipart"] is True
+    assert result["throughput_mbps"] > 0
+    assert stored(s3, result["s3_key"]) == content
+    # Multipart objects have an ETag of the form "<hash>-<parts>"
+    assert (await s3.get_file_info(result["s3_key"]))["etag"].strip('"').endswith("-3")
+    assert threads[0].startswith("s3")
+
+
+def test_file_urls_use_the_custom_endpoint_when_set():
+    aws = S3Client("test", "test", region="eu-west-1", bucket_name="resumes")
+    minio = S3Client("test", "test", bucket_name="resumes", endpoint_url="http://minio:9000/")
+
+    assert aws.file_url("uploads/a.pdf") == "https://resumes.s3.eu-west-1.amazonaws.com/uploads/a.pdf"
+    assert minio.file_url("uploads/a.pdf") == "http://minio:9000/resumes/uploads/a.pdf"
+    for client in (aws, minio):
+        client.close()
+
+
+@pytest.fixture
+def upload_api(s3, monkeypatch):
+    from controllers import upload_controller
+
+    monkeypatch.setattr(upload_controller, "get_s3_client", lambda: s3)
+    return upload_controller
+
+
+USER = SimpleNamespace(id=7)
+
+
+def post_upload(presigned, content):
+    """Upload the way a browser would: a form POST straight to the bucket"""
+    requests = pytest.importorskip("requests")
+    return requests.post(presigned["url"], data=presigned["fields"], files={"file": ("resume.pdf", content)})
+
+
+@pytest.mark.asyncio
+async def test_presigned_post_uploads_straight_to_the_bucket(upload_api):
+    presigned = await upload_api.create_upload_url_endpoint(upload_api.UploadPresignRequest(filename="resume.pdf"), USER)
+
+    assert presigned["s3_key"].startswith("uploads/7/") and presigned["s3_key"].endswith(".pdf")
+    assert presigned["fields"]["key"] == presigned["s3_key"]
+    assert presigned["fields"]["Content-Type"] == "application/pdf"
+    assert presigned["max_file_size"] == upload_api.UPLOAD_MAX_BYTES
+
+    assert post_upload(presigned, b"%PDF-direct").status_code in (200, 204)
+
+    result = await upload_api.complete_upload_endpoint(upload_api.UploadCompleteRequest(s3_key=presigned["s3_key"]), USER)
+    assert result["file_url"] == presigned["file_url"]
+    assert result["file_size"] == len(b"%PDF-direct")
+    assert result["content_type"] == "application/pdf"
+
+
+@pytest.mark.asyncio
+async def test_complete_rejects_missing_foreign_empty_and_oversized_uploads(upload_api, s3, monkeypatch):
+    async def complete(s3_key):
+        return await upload_api.complete_upload_endpoint(upload_api.UploadCompleteRequest(s3_key=s3_key), USER)
+
+    assert (await complete("uploads/7/nothing.pdf")).status_code == 404
+    assert (await complete("private/report.pdf")).status_code == 400
+
+    # Another user's uploads can't be confirmed (or deleted)
+    s3.s3_client.put_object(Bucket="resumes", Key="uploads/8/theirs.pdf", Body=b"12345")
+    assert (await complete("uploads/8/theirs.pdf")).status_code == 400
+    assert s3.s3_client.list_objects_v2(Bucket="resumes", Prefix="uploads/8/theirs.pdf")["KeyCount"] == 1
+
+    too_big = await upload_api.create_upload_url_endpoint(
+        upload_api.UploadPresignRequest(filename="resume.pdf", file_size=upload_api.UPLOAD_MAX_BYTES + 1), USER
+    )
+    assert too_big.status_code == 413
+
+    s3.s3_client.put_object(Bucket="resumes", Key="uploads/7/empty.pdf", Body=b"")
+    empty = await complete("uploads/7/empty.pdf")
+    assert empty.status_code == 400
+    assert b"EMPTY_FILE" in empty.body
+
+    # An object over the limit is removed when the upload is completed
+    monkeypatch.setattr(upload_api, "UPLOAD_MAX_BYTES", 4)
+    s3.s3_client.put_object(Bucket="resumes", Key="uploads/7/big.pdf", Body=b"12345")
+    oversized = await complete("uploads/7/big.pdf")
+    assert oversized.status_code == 413
+    assert "Contents" not in s3.s3_client.list_objects_v2(Bucket="resumes", Prefix="uploads/7/big.pdf")
+
+
+@pytest.mark.asyncio
+async def test_probe_reports_readiness_and_reconnects(s3, monkeypatch):
+    import clients
+
+    created = []
+
+    def create_s3_client():
+        created.append(S3Client("test", "test", bucket_name="resumes"))
+        return created[-1]
+
+    monkeypatch.setattr(clients, "_create_s3_client", create_s3_client)
+    monkeypatch.setattr(clients, "s3_client", None)
+    monkeypatch.setattr(clients, "_status", {})
+    # Nothing is created or probed until first use
+    assert created == []
+    assert clients.get_client_status()["s3"]["ready"] is False
+
+    s3.s3_client.delete_bucket(Bucket="resumes")
+    status = await clients.probe_s3(timeout=5)
+    assert status["ready"] is False and "does not exist" in status["error"]
+    # The failed client is dropped, so the next probe starts from a fresh one
+    assert clients.s3_client is None
+
+    s3.s3_client.create_bucket(Bucket="resumes")
+    assert (await clients.probe_s3(timeout=5))["ready"] is True
+    assert len(created) == 2
+    assert clients.get_s3_client() is created[1]
+    assert clients.get_client_status()["s3"]["ready"] is True
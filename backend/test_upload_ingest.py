@@ -0,0 +1,65 @@
+"""
+Tests for chunked upload ingestion
+"""
+import hashlib
+import io
+import os
+import pytest
+
+from services import UploadTooLargeException, upload_ingest
+from services.upload_ingest import ingest_upload
+
+
+class FakeUpload:
+    """Minimal UploadFile: chunked async reads of in-memory content"""
+
+    def __init__(self, filename, content, size=None):
+        self.filename = filename
+        self.content_type = "application/pdf"
+        self.size = size
+        self.reads = 0
+        self._stream = io.BytesIO(content)
+
+    async def read(self, size=-1):
+        self.reads += 1
+        return self._stream.read(size)
+
+
+@pytest.mark.asyncio
+async def test_small_uploads_stay_in_memory():
+    upload = await ingest_upload(FakeUpload("a.pdf", b"%PDF-small"))
+
+    assert upload.source == b"%PDF-small"
+    assert upload.size == 10
+    assert upload.digest == hashlib.sha256(b"%PDF-small").hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_large_uploads_are_spooled_to_a_temp_file(monkeypatch):
+    monkeypatch.setattr(upload_ingest, "UPLOAD_SPOOL_MEMORY_BYTES", 8)
+    monkeypatch.setattr(upload_ingest, "UPLOAD_CHUNK_BYTES", 4)
+    content = b"%PDF-" + b"x" * 30
+
+    with await ingest_upload(FakeUpload("big.pdf", content)) as upload:
+        path = upload.source
+        assert isinstance(path, str) and path.endswith(".pdf")
+        with upload.open() as stream:
+            assert stream.read() == content
+        assert upload.digest == hashlib.sha256(content).hexdigest()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_size_limit_is_enforced_while_reading(monkeypatch):
+    monkeypatch.setattr(upload_ingest, "UPLOAD_CHUNK_BYTES", 4)
+    fake = FakeUpload("big.pdf", b"x" * 100)
+
+    with pytest.raises(UploadTooLargeException):
+        await ingest_upload(fake, max_bytes=10)
+    # Stops at the chunk that passes the limit instead of reading the whole body
+    assert fake.reads == 3
+
+    declared = FakeUpload("big.pdf", b"x" * 100, size=100)
+    with pytest.raises(UploadTooLargeException):
+        await ingest_upload(declared, max_bytes=10)
+    assert declared.reads == 0
@@ -0,0 +1,134 @@
+"""
+Stress tests for concurrent workflow turns
+"""
+import asyncio
+import time
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+from services import gap_analysis_service
+from workflows import checkpointing
+from workflows import BaseWorkflow, GapProfileWorkflow, WorkflowSessionStore
+
+PROFILE = {
+    "id": 1,
+    "updated_at": "2025-01-01T00:00:00",
+    "skills": {"raw_skills": ["Python", "FastAPI", "PostgreSQL"]},
+    "experience": {"jobs": [{"title": "Software Engineer", "company": "Acme"}]}
+}
+
+
+class SlowGapProfileWorkflow(GapProfileWorkflow):
+    """Gap workflow whose nodes yield to the event loop, widening any race window"""
+
+    async def _identify_gaps(self, state, config):
+        await asyncio.sleep(0.2)
+        return await super()._identify_gaps(state, config)
+
+    async def _show_next_gap(self, state):
+        await asyncio.sleep(0.05)
+        return await super()._show_next_gap(state)
+
+
+@pytest.fixture(autouse=True)
+def session_store(monkeypatch):
+    """Use a fresh session store and checkpointer without loading app config"""
+    monkeypatch.setattr(checkpointing, "_checkpointer", InMemorySaver())
+    monkeypatch.setattr(BaseWorkflow, "_checkpointed_workflows", {})
+    BaseWorkflow._session_store = WorkflowSessionStore()
+    yield BaseWorkflow._session_store
+    BaseWorkflow._session_store = None
+
+
+@pytest.fixture(autouse=True)
+def profile(monkeypatch):
+    """Serve a fixed profile instead of querying the database"""
+    async def load_profile(session, user_id):
+        return PROFILE
+    monkeypatch.setattr(gap_analysis_service, "load_profile", load_profile)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_turns_for_same_user_are_serialised():
+    """Concurrent replies from one user must each advance the workflow exactly once"""
+    workflow = SlowGapProfileWorkflow()
+    user_id = 101
+
+    first = await workflow.process_message("What skills am I missing?", user_id)
+    assert first["metadata"]["gap_number"] == 1
+
+    results = await asyncio.gather(*[
+        workflow.process_message(f"My plan #{i}", user_id) for i in range(3)
+    ])
+
+    # Two more gap prompts, then the answer to the final gap completes the analysis
+    prompts = sorted(r["metadata"]["gap_number"] for r in results if not r["workflow_complete"])
+    assert prompts == [2, 3]
+    assert [r["workflow_complete"] for r in results].count(True) == 1
+
+    state = BaseWorkflow.get_session_store().get(user_id, workflow.get_workflow_name())
+    assert state["workflow_complete"] is True
+    assert state["current_gap_index"] == state["total_gaps"]
+    actions = [m["metadata"]["action"] for m in state["messages"] if m["role"] == "assistant"]
+    assert actions[-3:] == ["final_gap_acknowledgment", "analysis_complete", "next_steps_prompt"]
+    # One message to start plus one answer per gap, with no extra turn
+    user_messages = [m for m in state["messages"] if m["role"] == "user"]
+    assert len(user_messages) == 4
+
+
+@pytest.mark.asyncio
+async def test_different_users_run_in_parallel():
+    """Turns for different users must not wait on each other"""
+    workflow = SlowGapProfileWorkflow()
+    user_ids = list(range(200, 220))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        workflow.process_message("What skills am I missing?", user_id) for user_id in user_ids
+    ])
+    elapsed = time.perf_counter() - start
+
+    assert all(r["metadata"]["gap_number"] == 1 for r in results)
+    # 20 serial runs would take >= 4s; parallel runs finish in roughly one node delay
+    assert elapsed < 1.0
+
+
+@pytest.mark.asyncio
+async def test_clearing_sessions_deletes_checkpoints_missing_from_the_store():
+    """A paused thread the session store has evicted is cleared from the checkpointer too"""
+    workflow = GapProfileWorkflow()
+    user_id = 301
+    await workflow.process_message("What skills am I missing?", user_id)
+
+    # The store evicts the session but the checkpoint stays
+    BaseWorkflow.get_session_store().delete(user_id, workflow.get_workflow_name())
+    assert await BaseWorkflow.clear_user_sessions(user_id) == [workflow.get_workflow_name()]
+
+    # The next message starts a new analysis instead of resuming the stale one
+    result = await workflow.process_message("Let's look at my gaps again", user_id)
+    assert result["metadata"]["action"] == "gap_resolution_prompt"
+    assert result["metadata"]["gap_number"] == 1
+
+
+@pytest.mark.asyncio
+async def test_clearing_sessions_only_touches_threads_the_user_has(monkeypatch):
+    """Clearing a user with no other workflows makes no checkpointer calls"""
+    workflow = GapProfileWorkflow()
+    user_id = 302
+    await workflow.process_message("What skills am I missing?", user_id)
+
+    checkpointer = workflow.graph.checkpointer
+    calls = []
+    monkeypatch.setattr(checkpointer, "adelete_thread", lambda thread_id: calls.append(thread_id))
+    monkeypatch.setattr(checkpointer, "aget_tuple", lambda config: calls.append(config))
+
+    assert await BaseWorkflow.clear_user_sessions(user_id, keep=workflow.get_workflow_name()) == []
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_a_checkpointer_that_cannot_be_opened_fails_instead_of_falling_back():
+    """A misconfigured backend must stop startup rather than silently keep state in memory"""
+    with pytest.raises(ValueError):
+        await checkpointing.open_checkpointer("postgres", postgres_url="")
+    assert checkpointing.get_checkpointer_backend() == "memory"
@@ -0,0 +1,78 @@
+"""
+Tests for the workflow session store
+"""
+import pytest
+
+from workflows import session_store
+from workflows.session_store import WorkflowSessionStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the store"""
+    now = [1000.0]
+    monkeypatch.setattr(session_store.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_idle_sessions_expire_after_the_ttl(clock):
+    store = WorkflowSessionStore(ttl_seconds=60)
+    store.put(1, "gap_analysis_profile", {"messages": []})
+    store.put(2, "gap_analysis_profile", {"messages": []})
+
+    clock[0] += 50
+    # Reading a session refreshes its idle timer
+    assert store.get(1, "gap_analysis_profile") is not None
+
+    clock[0] += 20
+    assert store.get(2, "gap_analysis_profile") is None
+    assert store.get(1, "gap_analysis_profile") is not None
+    assert store.user_workflows(2) == []
+
+    clock[0] += 61
+    assert store.get_stats()["live_sessions"] == 0
+    assert store.session_bytes == 0
+
+
+def test_least_recently_used_session_is_evicted_first(clock):
+    store = WorkflowSessionStore(max_sessions=2)
+    store.put(1, "a", {})
+    clock[0] += 1
+    store.put(2, "a", {})
+    clock[0] += 1
+    store.get(1, "a")
+
+    clock[0] += 1
+    store.put(3, "a", {})
+
+    assert store.get(2, "a") is None
+    assert store.get(1, "a") is not None
+    assert store.get(3, "a") is not None
+    assert store.session_count == 2
+
+
+def test_clear_user_keeps_the_named_workflow(clock):
+    store = WorkflowSessionStore()
+    store.put(1, "gap_analysis_profile", {})
+    store.put(1, "gap_analysis_job", {})
+    store.put(1, "resume_generation", {})
+    store.put(2, "gap_analysis_job", {})
+
+    cleared = store.clear_user(1, keep="resume_generation")
+
+    assert sorted(cleared) == ["gap_analysis_job", "gap_analysis_profile"]
+    assert store.user_workflows(1) == ["resume_generation"]
+    assert store.get(2, "gap_analysis_job") is not None
+    assert store.clear_user(3) == []
+
+
+def test_only_the_latest_messages_are_kept(clock):
+    store = WorkflowSessionStore(max_messages=3)
+    messages = [{"role": "user", "content": str(i)} for i in range(5)]
+
+    store.put(1, "gap_analysis_profile", {"messages": messages})
+    small = store.session_bytes
+
+    assert [m["content"] for m in store.get(1, "gap_analysis_profile")["messages"]] == ["2", "3", "4"]
+    store.put(1, "gap_analysis_profile", {"messages": messages[:1]})
+    assert store.session_bytes < small
@@ -0,0 +1,117 @@
+"""
+Tests for streaming workflow output
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+import chat
+from workflows import BaseWorkflow, GenerateReachoutWorkflow, WorkflowSessionStore
+from workflows import base_workflow, checkpointing
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def fake_llm(tokens, fail_after=None, delay=0.0):
+    """acompletion stand-in that streams the given tokens, optionally failing part way"""
+    async def acompletion(**kwargs):
+        assert kwargs["stream"] is True
+
+        async def stream():
+            for i, token in enumerate(tokens):
+                if fail_after is not None and i == fail_after:
+                    raise RuntimeError("connection dropped")
+                if delay:
+                    await asyncio.sleep(delay)
+                yield _chunk(token)
+        return stream()
+    return acompletion
+
+
+@pytest.fixture(autouse=True)
+def session_store(monkeypatch):
+    """Use a fresh session store and checkpointer without loading app config"""
+    monkeypatch.setattr(checkpointing, "_checkpointer", InMemorySaver())
+    monkeypatch.setattr(BaseWorkflow, "_checkpointed_workflows", {})
+    BaseWorkflow._session_store = WorkflowSessionStore()
+    yield BaseWorkflow._session_store
+    BaseWorkflow._session_store = None
+
+
+async def _collect(workflow, message, user_id):
+    return [event async for event in workflow.stream_message(message, user_id)]
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_steps_and_tokens_matching_result(monkeypatch):
+    tokens = ["Subject: Hello\n\n", "Hi [Name],", " let's connect.", "\n\n[Your name]"]
+    monkeypatch.setattr(base_workflow, "acompletion", fake_llm(tokens))
+
+    events = await _collect(GenerateReachoutWorkflow(), "Help me network with a recruiter", 201)
+
+    steps = [event["node"] for event in events if event["type"] == "step"]
+    assert steps == ["analyze_context", "generate_message"]
+    assert events[-1]["type"] == "result"
+
+    result = events[-1]["result"]
+    streamed = "".join(event["content"] for event in events if event["type"] == "token")
+    assert streamed == result["response"]
+    assert result["metadata"]["message"] == "".join(tokens).strip()
+    assert result["workflow_complete"] is True
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_to_template_after_partial_failure(monkeypatch):
+    monkeypatch.setattr(base_workflow, "acompletion", fake_llm(["Subject: Hel", "lo"], fail_after=1))
+
+    events = await _collect(GenerateReachoutWorkflow(), "Can you ask for a referral?", 202)
+
+    types = [event["type"] for event in events]
+    assert "reset" in types
+    after_reset = events[types.index("reset") + 1:]
+    streamed = "".join(event["content"] for event in after_reset if event["type"] == "token")
+    result = events[-1]["result"]
+    assert streamed == result["response"]
+    assert "Referral Request" in result["metadata"]["message"]
+
+
+@pytest.mark.asyncio
+async def test_process_message_matches_streamed_result(monkeypatch):
+    monkeypatch.setattr(base_workflow, "acompletion", fake_llm(["Subject: Hi\n\nHello [Name]"]))
+
+    streamed = (await _collect(GenerateReachoutWorkflow(), "Write a networking note", 203))[-1]["result"]
+    invoked = await GenerateReachoutWorkflow().process_message("Write a networking note", 204)
+    assert invoked == streamed
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_delivers_first_token_before_generation_finishes(monkeypatch):
+    """The first content delta must not wait for the whole message to be generated"""
+    monkeypatch.setattr(base_workflow, "acompletion", fake_llm([f"word{i} " for i in range(20)], delay=0.05))
+
+    async def route(request, session, current_user):
+        return "GENERATE_REACHOUT"
+    monkeypatch.setattr(chat, "_resolve_route", route)
+    monkeypatch.setattr(chat, "GEMINI_API_KEY", "test")
+
+    request = chat.ChatCompletionRequest(messages=[{"role": "user", "content": "Draft a reachout"}], stream=True)
+    start = time.perf_counter()
+    first_content_at = None
+    content = []
+    final = None
+    async for chunk in chat.create_chat_completion_stream(request, current_user=SimpleNamespace(id=205)):
+        delta = chunk["choices"][0]["delta"]
+        if delta.get("content"):
+            first_content_at = first_content_at or time.perf_counter() - start
+            content.append(delta["content"])
+        if chunk["choices"][0]["finish_reason"] == "stop":
+            final = chunk
+    elapsed = time.perf_counter() - start
+
+    assert first_content_at < 0.3 < elapsed
+    assert final["workflow_metadata"]["workflow_name"] == "generate_reachout"
+    assert "word19" in "".join(content)
@@ -3,6 +3,7 @@ Workflow modules for the unified chat architecture
 """
 from .chat_router import ChatRouter
 from .base_workflow import BaseWorkflow, BaseWorkflowState
+from .session_store import WorkflowSessionStore
 from .profile_analysis_workflow import ProfileAnalysisWorkflow
 from .gap_profile_workflow import GapProfileWorkflow
 from .gap_job_workflow import JobGapWorkflow
@@ -14,6 +15,7 @@ __all__ = [
     'ChatRouter', 
     'BaseWorkflow', 
     'BaseWorkflowState',
+    'WorkflowSessionStore',
     'ProfileAnalysisWorkflow',
     'GapProfileWorkflow',
     'JobGapWorkflow',
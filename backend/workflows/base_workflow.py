@@ -2,11 +2,21 @@
 Base Workflow Class for LangGraph Workflows
 Provides common interface and functionality for all chat workflows
 """
+import asyncio
 import logging
+import weakref
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Any, List, Optional, Set, Tuple
 from typing_extensions import TypedDict
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
+from langgraph.types import Command, interrupt
+from litellm import acompletion
+from config import WORKFLOW_SESSION_TTL_SECONDS, WORKFLOW_SESSION_MAX_SESSIONS, WORKFLOW_SESSION_MAX_MESSAGES
+from .checkpointing import get_checkpointer
+from .session_store import WorkflowSessionStore
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +34,26 @@ class BaseWorkflowState(TypedDict):
 class BaseWorkflow(ABC):
     """Base class for all chat workflows"""
     
-    # Class-level session storage shared across all instances
-    _global_workflow_sessions = {}
+    # Class-level session store shared across all instances (created lazily)
+    _session_store: Optional[WorkflowSessionStore] = None
     
+    # Names of the workflows each user has a checkpoint thread for, so clearing a
+    # user's sessions only deletes threads that exist
+    _checkpointed_workflows: Dict[int, Set[str]] = {}
+    
+    # Compiled graphs shared across instances: workflow class -> (checkpointer, graph)
+    _compiled_graphs: Dict[type, Tuple[Any, Any]] = {}
+    
+    # One lock per user so concurrent turns can't read and advance the same state;
+    # weak values free a user's lock once no turn holds or awaits it
+    _user_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+    
+    # Response returned when the user escapes mid-workflow (None disables escape handling)
+    ESCAPE_RESPONSE: Optional[str] = None
+
+    # Model used by nodes that generate text with _stream_llm
+    LLM_MODEL = "gemini/gemini-1.5-flash"
+
     # Escape phrases that allow users to break out of workflows
     ESCAPE_PHRASES = [
         "start over", "new conversation", "exit", "stop workflow", 
@@ -34,9 +61,80 @@ class BaseWorkflow(ABC):
         "different question", "cancel", "quit", "break out"
     ]
     
-    def __init__(self):
-        self.graph = None
-        self._build_graph()
+    @property
+    def graph(self):
+        """
+        Compiled workflow graph backed by the shared checkpointer.
+        
+        Graphs are compiled once per workflow class and only recompiled if the
+        checkpointer is swapped (e.g. when the app lifespan opens the durable one).
+        """
+        checkpointer = get_checkpointer()
+        cached = BaseWorkflow._compiled_graphs.get(type(self))
+        if cached and cached[0] is checkpointer:
+            return cached[1]
+        
+        graph = self._build_graph().compile(checkpointer=checkpointer)
+        BaseWorkflow._compiled_graphs[type(self)] = (checkpointer, graph)
+        return graph
+    
+    @classmethod
+    def get_session_store(cls) -> WorkflowSessionStore:
+        """Get the shared workflow session store, creating it on first use"""
+        if BaseWorkflow._session_store is None:
+            BaseWorkflow._session_store = WorkflowSessionStore(
+                ttl_seconds=WORKFLOW_SESSION_TTL_SECONDS,
+                max_sessions=WORKFLOW_SESSION_MAX_SESSIONS,
+                max_messages=WORKFLOW_SESSION_MAX_MESSAGES
+            )
+        return BaseWorkflow._session_store
+    
+    @classmethod
+    async def clear_user_sessions(cls, user_id: int, keep: Optional[str] = None) -> List[str]:
+        """
+        Clear all workflow sessions for a user, optionally keeping one workflow's session
+        
+        Checkpoint threads are deleted from the per-user index rather than the session
+        store, which may have evicted a paused thread. Threads written before a
+        restart are indexed again when the user next reaches that workflow.
+        
+        Returns:
+            Names of the workflows that had a session
+        """
+        cleared = set(cls.get_session_store().clear_user(user_id, keep=keep))
+        for workflow_name in BaseWorkflow._checkpointed_workflows.get(user_id, set()) - {keep}:
+            await cls._delete_thread(user_id, workflow_name)
+            cleared.add(workflow_name)
+        return sorted(cleared)
+    
+    @classmethod
+    async def _delete_thread(cls, user_id: int, workflow_name: str):
+        """Delete a user's checkpoint thread for a workflow and drop it from the index"""
+        workflows = BaseWorkflow._checkpointed_workflows.get(user_id)
+        if workflows is not None:
+            workflows.discard(workflow_name)
+            if not workflows:
+                del BaseWorkflow._checkpointed_workflows[user_id]
+        await get_checkpointer().adelete_thread(cls._thread_id(user_id, workflow_name))
+    
+    @staticmethod
+    def _index_thread(user_id: int, workflow_name: str):
+        """Record that a user has a checkpoint thread for a workflow"""
+        BaseWorkflow._checkpointed_workflows.setdefault(user_id, set()).add(workflow_name)
+    
+    @classmethod
+    def _get_user_lock(cls, user_id: int) -> asyncio.Lock:
+        """Get the lock that serialises a user's workflow turns"""
+        lock = BaseWorkflow._user_locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            BaseWorkflow._user_locks[user_id] = lock
+        return lock
+    
+    @staticmethod
+    def _thread_id(user_id: int, workflow_name: str) -> str:
+        """Checkpointer thread ID for a user's run of a workflow"""
+        return f"user_{user_id}_{workflow_name}"
     
     def _should_break_session(self, user_message: str) -> bool:
         """Check if user wants to break out of current workflow"""
@@ -44,8 +142,8 @@ class BaseWorkflow(ABC):
         return any(phrase in message_lower for phrase in self.ESCAPE_PHRASES)
     
     @abstractmethod
-    def _build_graph(self):
-        """Build the LangGraph workflow - must be implemented by subclasses"""
+    def _build_graph(self) -> StateGraph:
+        """Build the (uncompiled) LangGraph workflow - must be implemented by subclasses"""
         pass
     
     @abstractmethod
@@ -68,6 +166,8 @@ class BaseWorkflow(ABC):
         """
         Process a message through this workflow
         
+        Turns are serialised per user; different users run in parallel.
+        
         Args:
             user_message: The user's message
             user_id: ID of the user
@@ -77,31 +177,211 @@ class BaseWorkflow(ABC):
         Returns:
             Workflow result with response and metadata
         """
-        session_key = f"user_{user_id}_{self.get_workflow_name()}"
+        async with self._get_user_lock(user_id):
+            return await self._process_turn(user_message, user_id, session, context)
+    
+    async def stream_message(
+        self, 
+        user_message: str, 
+        user_id: int, 
+        session=None, 
+        context: Dict = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a message through this workflow, streaming progress as it runs
         
-        # Check for existing workflow state in global storage
-        existing_state = BaseWorkflow._global_workflow_sessions.get(session_key)
+        The user's lock is held until the stream is exhausted or closed.
         
-        if existing_state and not existing_state.get("workflow_complete"):
-            # Continue existing workflow
-            existing_state["messages"].append({"role": "user", "content": user_message})
-            state = existing_state
-        else:
-            # Start new workflow
-            state = self._create_initial_state(user_message, user_id, session, context)
-            
-        # Store state in global storage
-        BaseWorkflow._global_workflow_sessions[session_key] = state
+        Yields:
+            {"type": "step", "node": ...} when a node finishes,
+            {"type": "token", "content": ...} for each chunk of generated text,
+            {"type": "reset"} when streamed text was discarded and is about to be replaced,
+            and finally {"type": "result", "result": ...} with the same result as process_message
+        """
+        async with self._get_user_lock(user_id):
+            async for event in self._run_turn(user_message, user_id, session, context):
+                yield event
+    
+    async def _process_turn(
+        self, 
+        user_message: str, 
+        user_id: int, 
+        session=None, 
+        context: Dict = None
+    ) -> Dict[str, Any]:
+        """Run a single turn - callers must hold the user's lock"""
+        result = None
+        async for event in self._run_turn(user_message, user_id, session, context):
+            if event["type"] == "result":
+                result = event["result"]
+        return result
+    
+    async def _run_turn(
+        self, 
+        user_message: str, 
+        user_id: int, 
+        session=None, 
+        context: Dict = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run a single turn as a stream of events - callers must hold the user's lock"""
+        store = self.get_session_store()
+        workflow_name = self.get_workflow_name()
+        config: RunnableConfig = {
+            "configurable": {
+                "thread_id": self._thread_id(user_id, workflow_name),
+                # Not persisted: checkpoint metadata only keeps primitive values
+                "db_session": session
+            }
+        }
+        
+        # Check for escape phrases FIRST
+        if self.ESCAPE_RESPONSE and self._should_break_session(user_message):
+            logger.info(f"User {user_id} triggered escape phrase in {workflow_name}")
+            store.delete(user_id, workflow_name)
+            await self._delete_thread(user_id, workflow_name)
+            yield {"type": "result", "result": {
+                "response": self.ESCAPE_RESPONSE,
+                "workflow_name": workflow_name,
+                "workflow_complete": True,
+                "metadata": {"action": "workflow_escaped"}
+            }}
+            return
         
         try:
-            # Run through workflow
-            result = await self.graph.ainvoke(state)
-            BaseWorkflow._global_workflow_sessions[session_key] = result
-            return self._format_result(result)
+            awaiting_input, has_thread = await self._get_thread_status(user_id, config)
+            
+            if awaiting_input:
+                # Continue existing workflow from its interrupt
+                graph_input = Command(resume=user_message)
+            else:
+                # Start new workflow on a clean thread
+                if has_thread:
+                    await self._delete_thread(user_id, workflow_name)
+                graph_input = self._create_initial_state(user_message, user_id, session, context)
+            
+            result = None
+            self._index_thread(user_id, workflow_name)
+            async for mode, chunk in self.graph.astream(
+                graph_input, config, stream_mode=["updates", "custom", "values"]
+            ):
+                if mode == "values":
+                    result = chunk
+                elif mode == "custom":
+                    yield chunk
+                else:
+                    for node in chunk:
+                        if node != "__interrupt__":
+                            yield {"type": "step", "node": node}
+            
+            store.put(user_id, workflow_name, result)
+            formatted = self._format_result(result)
         except Exception as e:
-            logger.error(f"Workflow {self.get_workflow_name()} failed: {e}")
-            return self._create_error_response(str(e))
+            logger.error(f"Workflow {workflow_name} failed: {e}")
+            formatted = self._create_error_response(str(e))
+        yield {"type": "result", "result": formatted}
     
+    async def _get_thread_status(self, user_id: int, config: RunnableConfig) -> Tuple[bool, bool]:
+        """
+        Determine whether the user's thread is paused waiting for input
+        
+        The session store answers from memory on the hot path; after a restart or
+        eviction the checkpointer is consulted so interrupted runs still resume.
+        
+        Returns:
+            (awaiting_input, has_thread)
+        """
+        store = self.get_session_store()
+        existing_state = store.get(user_id, self.get_workflow_name())
+        if existing_state is not None:
+            return not existing_state.get("workflow_complete"), True
+        
+        snapshot = await self.graph.aget_state(config)
+        if not snapshot.values:
+            return False, False
+        self._index_thread(user_id, self.get_workflow_name())
+        
+        if snapshot.next and snapshot.created_at:
+            created_at = datetime.fromisoformat(snapshot.created_at)
+            idle_seconds = (datetime.now(timezone.utc) - created_at).total_seconds()
+            if idle_seconds <= store.ttl_seconds:
+                return True, True
+        
+        return False, True
+    
+    @staticmethod
+    def _get_db_session(config: RunnableConfig):
+        """Database session passed to the current run, if any"""
+        return config.get("configurable", {}).get("db_session")
+    
+    async def _await_user_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Pause the graph until the user replies, then record their message"""
+        user_message = interrupt({"current_step": state.get("current_step")})
+        state["messages"].append({"role": "user", "content": user_message})
+        return state
+
+    @staticmethod
+    def _emit_text(text: str):
+        """Stream fixed text (headers, tips) to the caller as it becomes part of the response"""
+        get_stream_writer()({"type": "token", "content": text})
+
+    async def _stream_llm(
+        self,
+        prompt: str,
+        fallback: str,
+        prefix: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> str:
+        """
+        Generate text with the LLM, streaming tokens to the caller as they arrive
+
+        Args:
+            prompt: User prompt (the workflow's system prompt is prepended)
+            fallback: Text to use if the LLM fails or returns nothing
+            prefix: Fixed text streamed before the generated text
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+
+        Returns:
+            The generated text, or the fallback
+        """
+        write = get_stream_writer()
+        if prefix:
+            write({"type": "token", "content": prefix})
+
+        tokens: List[str] = []
+        try:
+            response = await acompletion(
+                model=self.LLM_MODEL,
+                messages=[
+                    {"role": "system", "content": self.get_system_prompt()},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            async for chunk in response:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    tokens.append(token)
+                    write({"type": "token", "content": token})
+
+            # Returned unstripped so the response matches what was streamed
+            text = "".join(tokens)
+            if text.strip():
+                return text
+        except Exception as e:
+            logger.warning(f"LLM generation failed in {self.get_workflow_name()}, using template: {e}")
+
+        if tokens:
+            # Tell the client to drop the partial text before the fallback replaces it
+            write({"type": "reset"})
+            if prefix:
+                write({"type": "token", "content": prefix})
+        write({"type": "token", "content": fallback})
+        return fallback
+
     def _create_initial_state(
         self, 
         user_message: str, 
@@ -113,7 +393,7 @@ class BaseWorkflow(ABC):
         return {
             "messages": [{"role": "user", "content": user_message}],
             "user_id": user_id,
-            "session_data": {"session": session, "context": context},
+            "session_data": {"context": context},
             "workflow_complete": False,
             "current_step": "start"
         }
@@ -164,8 +444,8 @@ class BaseWorkflow(ABC):
             "error": error
         }
     
-    def clear_session(self, user_id: int):
+    async def clear_session(self, user_id: int):
         """Clear workflow session for a user"""
-        session_key = f"user_{user_id}_{self.get_workflow_name()}"
-        if session_key in BaseWorkflow._global_workflow_sessions:
-            del BaseWorkflow._global_workflow_sessions[session_key]
\ No newline at end of file
+        workflow_name = self.get_workflow_name()
+        self.get_session_store().delete(user_id, workflow_name)
+        await self._delete_thread(user_id, workflow_name)
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Workflow Checkpointing
+Provides the LangGraph checkpointer that persists workflow state between turns
+"""
+import logging
+from contextlib import AsyncExitStack
+from typing import Optional
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+logger = logging.getLogger(__name__)
+
+# Active checkpointer shared by all workflow graphs
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_exit_stack: Optional[AsyncExitStack] = None
+# Backend of the active checkpointer, reported by /health
+_backend: str = "memory"
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """
+    Get the active checkpointer.
+
+    Falls back to an in-memory saver until open_checkpointer() has been awaited
+    (e.g. in scripts and tests that never run the app lifespan).
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        _checkpointer = InMemorySaver()
+    return _checkpointer
+
+
+def get_checkpointer_backend() -> str:
+    """Backend of the active checkpointer ("sqlite", "postgres" or "memory")"""
+    return _backend
+
+
+async def open_checkpointer(backend: str, sqlite_path: str = "", postgres_url: str = "") -> BaseCheckpointSaver:
+    """
+    Open the durable checkpointer for this deployment
+
+    Args:
+        backend: "sqlite" (local development), "postgres" (production) or "memory"
+        sqlite_path: Database file used by the SQLite saver
+        postgres_url: Connection string used by the Postgres saver
+
+    Returns:
+        The checkpointer now used by all workflow graphs
+
+    Raises:
+        Exception: If the backend can't be opened; there is no fallback, so a
+            misconfigured deployment fails at startup instead of losing state
+    """
+    global _checkpointer, _exit_stack, _backend
+
+    await close_checkpointer()
+    stack = AsyncExitStack()
+
+    try:
+        if backend == "sqlite":
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+            saver = await stack.enter_async_context(AsyncSqliteSaver.from_conn_string(sqlite_path))
+        elif backend == "postgres":
+            if not postgres_url:
+                raise ValueError("WORKFLOW_CHECKPOINT_POSTGRES_URL must be set for the postgres checkpointer")
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+            saver = await stack.enter_async_context(AsyncPostgresSaver.from_conn_string(postgres_url))
+        elif backend == "memory":
+            saver = InMemorySaver()
+        else:
+            raise ValueError(f"Unknown workflow checkpointer backend: {backend}")
+
+        if hasattr(saver, "setup"):
+            await saver.setup()
+
+    except Exception as e:
+        await stack.aclose()
+        logger.error(f"❌ Failed to open {backend} workflow checkpointer: {e}")
+        raise
+
+    _checkpointer = saver
+    _exit_stack = stack
+    _backend = backend
+    logger.info(f"✅ Workflow checkpointer ready ({backend})")
+    return saver
+
+
+async def close_checkpointer() -> None:
+    """Close the durable checkpointer's connections, if any"""
+    global _checkpointer, _exit_stack, _backend
+    if _exit_stack is not None:
+        await _exit_stack.aclose()
+        _exit_stack = None
+        _checkpointer = None
+        _backend = "memory"
@@ -4,7 +4,10 @@ Analyzes user's skill gaps against a specific job posting
 """
 import logging
 from typing import Dict, Any, List, Optional
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
+from services import NotFoundException
+from services.gap_analysis_service import get_job_gaps
 from .base_workflow import BaseWorkflow, BaseWorkflowState
 
 logger = logging.getLogger(__name__)
@@ -15,6 +18,7 @@ class JobGapState(BaseWorkflowState):
     job_posting_id: Optional[int]
     job_title: str
     company: str
+    match_score: int
     identified_gaps: List[Dict[str, Any]]
     current_gap_index: int  # 0-based index of gap currently being shown  
     total_gaps: int
@@ -23,6 +27,11 @@ class JobGapState(BaseWorkflowState):
 class JobGapWorkflow(BaseWorkflow):
     """Workflow for analyzing gaps against a specific job posting"""
     
+    ESCAPE_RESPONSE = "✅ **Job gap analysis stopped!** I've cleared the workflow. What would you like to do next?"
+    
+    # Number of gaps walked through per analysis
+    MAX_GAPS = 3
+    
     def get_workflow_name(self) -> str:
         return "gap_analysis_job"
     
@@ -30,34 +39,51 @@ class JobGapWorkflow(BaseWorkflow):
         return """You are a career coach analyzing how well a candidate matches a job.
         Identify gaps between their profile and job requirements, and suggest improvements."""
     
-    def _build_graph(self):
+    def _build_graph(self) -> StateGraph:
         """Build the job gap analysis workflow graph"""
         workflow = StateGraph(JobGapState)
         
         # Add nodes
         workflow.add_node("analyze_job_requirements", self._analyze_job_requirements)
+        workflow.add_node("await_response", self._await_user_response)
         workflow.add_node("resolve_gaps", self._resolve_gaps)
         workflow.add_node("complete_analysis", self._complete_analysis)
         
         # Set entry point
         workflow.set_entry_point("analyze_job_requirements")
         
-        # Add edges with conditional progression
-        workflow.add_edge("analyze_job_requirements", "resolve_gaps")
+        # Each gap prompt pauses for the user's plan before moving on
+        workflow.add_conditional_edges(
+            "analyze_job_requirements",
+            self._route_after_analysis,
+            {
+                "await_response": "await_response",
+                "end": END
+            }
+        )
         
         # Conditional edge: continue resolving gaps or complete
         workflow.add_conditional_edges(
-            "resolve_gaps",
+            "await_response",
             self._should_continue_resolving,
             {
-                "continue": END,  # Stay in resolve_gaps state, wait for user
+                "continue": "resolve_gaps",
                 "complete": "complete_analysis"  # All gaps resolved
             }
         )
         
+        # Answering the last gap completes the analysis in the same turn
+        workflow.add_conditional_edges(
+            "resolve_gaps",
+            self._route_after_resolve,
+            {
+                "await_response": "await_response",
+                "complete": "complete_analysis"
+            }
+        )
         workflow.add_edge("complete_analysis", END)
         
-        self.graph = workflow.compile()
+        return workflow
     
     def _create_initial_state(self, user_message: str, user_id: int, session=None, context: Dict = None) -> Dict[str, Any]:
         """Create initial state with job gap analysis specific fields"""
@@ -66,135 +92,49 @@ class JobGapWorkflow(BaseWorkflow):
             "job_posting_id": context.get("job_posting_id") if context else None,
             "job_title": "",
             "company": "",
+            "match_score": 0,
             "identified_gaps": [],
             "current_gap_index": 0,
             "total_gaps": 0
         })
         return state
     
-    async def process_message(self, user_message: str, user_id: int, session=None, context: Dict = None):
-        """Override to control workflow entry point based on session state"""
-        session_key = f"user_{user_id}_{self.get_workflow_name()}"
-        
-        # Check for escape phrases FIRST
-        if self._should_break_session(user_message):
-            logger.info(f"User {user_id} triggered escape phrase in gap_job_workflow")
-            # Clear this workflow's session
-            if session_key in self._global_workflow_sessions:
-                del self._global_workflow_sessions[session_key]
-            # Return escape message
-            return {
-                "response": "✅ **Job gap analysis stopped!** I've cleared the workflow. What would you like to do next?",
-                "workflow_name": self.get_workflow_name(),
-                "workflow_complete": True,
-                "metadata": {"action": "workflow_escaped"}
-            }
-        
-        # Check for existing workflow state
-        existing_state = self._global_workflow_sessions.get(session_key)
-        
-        if existing_state and not existing_state.get("workflow_complete"):
-            # Continue existing workflow - add user message
-            existing_state["messages"].append({"role": "user", "content": user_message})
-            
-            # Determine which node to run based on progress
-            if existing_state["current_gap_index"] >= existing_state["total_gaps"]:
-                # All gaps addressed - run completion
-                start_node = "complete_analysis"
-            else:
-                # More gaps to show - run gap handler
-                start_node = "resolve_gaps"
-                
-            # Create graph with appropriate entry point
-            self.graph = self._create_graph_with_entry_point(start_node)
-            state = existing_state
-        else:
-            # Start new workflow - clear old session if it exists
-            if existing_state:
-                logger.info(f"Clearing completed workflow session for user {user_id}")
-                del self._global_workflow_sessions[session_key]
-                
-            state = self._create_initial_state(user_message, user_id, session, context)
-            # Use analyze_job_requirements as entry point for new workflows
-            self.graph = self._create_graph_with_entry_point("analyze_job_requirements")
-            
-        # Store state and run workflow
-        self._global_workflow_sessions[session_key] = state
-        
-        try:
-            result = await self.graph.ainvoke(state)
-            self._global_workflow_sessions[session_key] = result
-            return self._format_result(result)
-        except Exception as e:
-            logger.error(f"Workflow {self.get_workflow_name()} failed: {e}")
-            return self._create_error_response(str(e))
-            
-    def _create_graph_with_entry_point(self, entry_node: str):
-        """Create a graph with specified entry point"""
-        workflow = StateGraph(JobGapState)
-        
-        # Add all nodes
-        workflow.add_node("analyze_job_requirements", self._analyze_job_requirements)
-        workflow.add_node("resolve_gaps", self._resolve_gaps)
-        workflow.add_node("complete_analysis", self._complete_analysis)
-        
-        # Set dynamic entry point
-        workflow.set_entry_point(entry_node)
-        
-        # Each node ends immediately to pause for user input
-        workflow.add_edge("analyze_job_requirements", END)
-        workflow.add_edge("resolve_gaps", END)  
-        workflow.add_edge("complete_analysis", END)
-        
-        return workflow.compile()
+    def _route_after_analysis(self, state: JobGapState) -> str:
+        """Finish straight away when the job can't be analyzed or has no gaps"""
+        return "end" if state["workflow_complete"] else "await_response"
     
-    async def _analyze_job_requirements(self, state: JobGapState) -> JobGapState:
+    async def _analyze_job_requirements(self, state: JobGapState, config: RunnableConfig) -> JobGapState:
         """Analyze job requirements and identify gaps"""
         logger.info(f"Analyzing job gaps for user {state['user_id']}, job {state['job_posting_id']}")
         
-        # Fake job data for demo
-        job_data = {
-            "title": "Senior Full Stack Engineer",
-            "company": "TechCorp Inc",
-            "requirements": [
-                "React Native development",
-                "Backend API design", 
-                "Cloud infrastructure (AWS)",
-                "Team leadership",
-                "Agile methodology"
-            ]
-        }
+        try:
+            match = await get_job_gaps(
+                self._get_db_session(config), state["user_id"], state["job_posting_id"], top_k=self.MAX_GAPS
+            )
+        except NotFoundException as e:
+            if e.error_code == "PROFILE_NOT_FOUND":
+                response = """I couldn't find a profile for you yet.
+
+Upload your resume and I'll build your profile, then ask me again to compare it against a job."""
+            else:
+                response = """I couldn't find that job posting.
+
+Save the job posting you're interested in first, then ask me again to analyze your gaps for it."""
+            return self._finish_early(state, response)
         
-        state["job_title"] = job_data["title"]
-        state["company"] = job_data["company"]
+        state["job_posting_id"] = match["job_posting_id"]
+        state["job_title"] = match["job_title"]
+        state["company"] = match["company"]
+        state["match_score"] = match["match_score"]
+        state["identified_gaps"] = match["gaps"]
         
-        # Hardcoded job-specific gaps for demo
-        state["identified_gaps"] = [
-            {
-                "requirement": "React Native Development",
-                "job_importance": "critical",
-                "user_level": "No experience",
-                "required_level": "3+ years", 
-                "gap_severity": "high",
-                "suggestions": ["Complete React Native bootcamp", "Build 2-3 mobile apps", "Contribute to RN open source"]
-            },
-            {
-                "requirement": "AWS Cloud Infrastructure", 
-                "job_importance": "important",
-                "user_level": "Basic",
-                "required_level": "Intermediate",
-                "gap_severity": "medium",
-                "suggestions": ["Get AWS Solutions Architect certification", "Deploy production apps on AWS"]
-            },
-            {
-                "requirement": "Team Leadership",
-                "job_importance": "preferred", 
-                "user_level": "Individual contributor",
-                "required_level": "Led 3+ person teams",
-                "gap_severity": "low",
-                "suggestions": ["Lead a cross-functional project", "Mentor junior developers"]
-            }
-        ]
+        if not match["gaps"]:
+            response = f"""🎯 **Job Gap Analysis: {state['job_title']}**
+**Company:** {state['company']}
+**Match score:** {state['match_score']}%
+
+Great news - your profile covers every requirement I found for this role. You're ready to apply!"""
+            return self._finish_early(state, response)
         
         state["total_gaps"] = len(state["identified_gaps"])
         
@@ -206,6 +146,7 @@ class JobGapWorkflow(BaseWorkflow):
         
         response = f"""🎯 **Job Gap Analysis: {state['job_title']}**
 **Company:** {state['company']}
+**Match score:** {state['match_score']}%
 
 I've analyzed your profile against this job and found **{state['total_gaps']} gaps** to address:
 
@@ -226,6 +167,7 @@ Let's tackle the most critical gap first:
             "metadata": {
                 "action": "gap_resolution_prompt",
                 "job_title": state["job_title"],
+                "match_score": state["match_score"],
                 "total_gaps": state["total_gaps"],
                 "gap_number": 1
             }
@@ -235,6 +177,22 @@ Let's tackle the most critical gap first:
         
         return state
     
+    def _finish_early(self, state: JobGapState, response: str) -> JobGapState:
+        """End the analysis with a single message when there are no gaps to walk through"""
+        state["messages"].append({
+            "role": "assistant",
+            "content": response,
+            "metadata": {
+                "action": "analysis_complete",
+                "workflow_complete": True,
+                "job_title": state["job_title"],
+                "total_gaps": 0
+            }
+        })
+        state["workflow_complete"] = True
+        state["current_step"] = "complete"
+        return state
+    
     async def _resolve_gaps(self, state: JobGapState) -> JobGapState:
         """Handle job gap resolution process - shows next gap to resolve"""
         
@@ -300,7 +258,13 @@ Excellent work! You've addressed all job requirements."""
         if state["current_gap_index"] >= state["total_gaps"]:
             return "complete"
         else:
-            return "continue"  # Stay in resolve_gaps, wait for user input
+            return "continue"  # Show the next gap
+    
+    def _route_after_resolve(self, state: JobGapState) -> str:
+        """Wait for the plan for the gap just shown, or complete after the final gap"""
+        if state["current_gap_index"] >= state["total_gaps"]:
+            return "complete"
+        return "await_response"
     
     async def _complete_analysis(self, state: JobGapState) -> JobGapState:
         """Complete the job gap analysis"""
@@ -4,7 +4,9 @@ Analyzes user's general skill gaps and career development areas
 """
 import logging
 from typing import Dict, Any, List
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
+from services.gap_analysis_service import get_profile_gaps
 from .base_workflow import BaseWorkflow, BaseWorkflowState
 
 logger = logging.getLogger(__name__)
@@ -20,6 +22,11 @@ class GapProfileState(BaseWorkflowState):
 class GapProfileWorkflow(BaseWorkflow):
     """Workflow for analyzing general profile skill gaps"""
     
+    ESCAPE_RESPONSE = "✅ **Gap analysis stopped!** I've cleared the workflow. What would you like to do next?"
+    
+    # Number of gaps walked through per analysis
+    MAX_GAPS = 3
+    
     def get_workflow_name(self) -> str:
         return "gap_analysis_profile"
     
@@ -27,22 +34,46 @@ class GapProfileWorkflow(BaseWorkflow):
         return """You are a career coach helping identify skill gaps and growth areas.
         Be constructive and provide actionable advice for improvement."""
     
-    def _build_graph(self):
+    def _build_graph(self) -> StateGraph:
         """Build the profile gap analysis workflow graph"""
-        # Default graph - will be overridden with dynamic entry points
         workflow = StateGraph(GapProfileState)
         
         workflow.add_node("identify_gaps", self._identify_gaps)
+        workflow.add_node("await_response", self._await_user_response)
         workflow.add_node("show_next_gap", self._show_next_gap)
         workflow.add_node("complete_analysis", self._complete_analysis)
         
         workflow.set_entry_point("identify_gaps")
         
-        workflow.add_edge("identify_gaps", END)
-        workflow.add_edge("show_next_gap", END)  
+        # Each gap prompt pauses for the user's plan before moving on
+        workflow.add_conditional_edges(
+            "identify_gaps",
+            self._route_after_identify,
+            {
+                "await_response": "await_response",
+                "end": END
+            }
+        )
+        workflow.add_conditional_edges(
+            "await_response",
+            self._route_after_response,
+            {
+                "next_gap": "show_next_gap",
+                "complete": "complete_analysis"
+            }
+        )
+        # Answering the last gap completes the analysis in the same turn
+        workflow.add_conditional_edges(
+            "show_next_gap",
+            self._route_after_next_gap,
+            {
+                "await_response": "await_response",
+                "complete": "complete_analysis"
+            }
+        )
         workflow.add_edge("complete_analysis", END)
         
-        self.graph = workflow.compile()
+        return workflow
     
     def _create_initial_state(self, user_message: str, user_id: int, session=None, context: Dict = None) -> Dict[str, Any]:
         """Create initial state with profile gap analysis specific fields"""
@@ -54,111 +85,54 @@ class GapProfileWorkflow(BaseWorkflow):
         })
         return state
     
-    async def process_message(self, user_message: str, user_id: int, session=None, context: Dict = None):
-        """Override to control workflow entry point based on session state"""
-        session_key = f"user_{user_id}_{self.get_workflow_name()}"
-        
-        # Check for escape phrases FIRST
-        if self._should_break_session(user_message):
-            logger.info(f"User {user_id} triggered escape phrase in gap_profile_workflow")
-            # Clear this workflow's session
-            if session_key in self._global_workflow_sessions:
-                del self._global_workflow_sessions[session_key]
-            # Return escape message
-            return {
-                "response": "✅ **Gap analysis stopped!** I've cleared the workflow. What would you like to do next?",
-                "workflow_name": self.get_workflow_name(),
-                "workflow_complete": True,
-                "metadata": {"action": "workflow_escaped"}
-            }
-        
-        # Check for existing workflow state
-        existing_state = self._global_workflow_sessions.get(session_key)
-        
-        if existing_state and not existing_state.get("workflow_complete"):
-            # Continue existing workflow - add user message
-            existing_state["messages"].append({"role": "user", "content": user_message})
-            
-            # Determine which node to run based on progress
-            if existing_state["current_gap_index"] >= existing_state["total_gaps"]:
-                # All gaps addressed - run completion
-                start_node = "complete_analysis"
-            else:
-                # More gaps to show - run gap handler
-                start_node = "show_next_gap"
-                
-            # Create graph with appropriate entry point
-            self.graph = self._create_graph_with_entry_point(start_node)
-            state = existing_state
-        else:
-            # Start new workflow - clear old session if it exists
-            if existing_state:
-                logger.info(f"Clearing completed workflow session for user {user_id}")
-                del self._global_workflow_sessions[session_key]
-                
-            state = self._create_initial_state(user_message, user_id, session, context)
-            # Use identify_gaps as entry point for new workflows
-            self.graph = self._create_graph_with_entry_point("identify_gaps")
-            
-        # Store state and run workflow
-        self._global_workflow_sessions[session_key] = state
-        
-        try:
-            result = await self.graph.ainvoke(state)
-            self._global_workflow_sessions[session_key] = result
-            return self._format_result(result)
-        except Exception as e:
-            logger.error(f"Workflow {self.get_workflow_name()} failed: {e}")
-            return self._create_error_response(str(e))
-            
-    def _create_graph_with_entry_point(self, entry_node: str):
-        """Create a graph with specified entry point"""
-        workflow = StateGraph(GapProfileState)
-        
-        # Add all nodes
-        workflow.add_node("identify_gaps", self._identify_gaps)
-        workflow.add_node("show_next_gap", self._show_next_gap)
-        workflow.add_node("complete_analysis", self._complete_analysis)
-        
-        # Set dynamic entry point
-        workflow.set_entry_point(entry_node)
-        
-        # Each node ends immediately to pause for user input
-        workflow.add_edge("identify_gaps", END)
-        workflow.add_edge("show_next_gap", END)  
-        workflow.add_edge("complete_analysis", END)
-        
-        return workflow.compile()
+    def _route_after_identify(self, state: GapProfileState) -> str:
+        """Finish straight away when there is no profile or no gap to work on"""
+        return "end" if state["workflow_complete"] else "await_response"
+    
+    def _route_after_response(self, state: GapProfileState) -> str:
+        """Show the next gap, or complete once every gap has been acknowledged"""
+        if state["current_gap_index"] >= state["total_gaps"]:
+            return "complete"
+        return "next_gap"
     
-    async def _identify_gaps(self, state: GapProfileState) -> GapProfileState:
+    def _route_after_next_gap(self, state: GapProfileState) -> str:
+        """Wait for the plan for the gap just shown, or complete after the final gap"""
+        if state["current_gap_index"] >= state["total_gaps"]:
+            return "complete"
+        return "await_response"
+    
+    async def _identify_gaps(self, state: GapProfileState, config: RunnableConfig) -> GapProfileState:
         """Identify profile skill gaps and show first gap"""
         logger.info(f"Identifying profile gaps for user {state['user_id']}")
         
-        # Hardcoded profile gaps for demo
-        state["identified_gaps"] = [
-            {
-                "skill": "Cloud Technologies",
-                "current_level": "Basic",
-                "required_level": "Advanced", 
-                "importance": "high",
-                "suggestions": ["Take AWS certification", "Build cloud projects"]
-            },
-            {
-                "skill": "Leadership Experience", 
-                "current_level": "Individual Contributor",
-                "required_level": "Team Lead",
-                "importance": "medium",
-                "suggestions": ["Lead a project", "Mentor junior developers"]
-            },
-            {
-                "skill": "System Design",
-                "current_level": "Junior Level",
-                "required_level": "Senior Level", 
-                "importance": "high",
-                "suggestions": ["Study system design patterns", "Practice design interviews"]
-            }
-        ]
+        analysis = await get_profile_gaps(self._get_db_session(config), state["user_id"], top_k=self.MAX_GAPS)
+        
+        if not analysis or not analysis["gaps"]:
+            if analysis:
+                response = """🎉 **Profile Gap Analysis**
+
+I couldn't find any significant skill gaps in your profile - your skills already cover the areas I check for.
+
+*Try analyzing gaps against a specific job posting for a more targeted comparison.*"""
+            else:
+                response = """I couldn't find a profile for you yet.
+
+Upload your resume and I'll build your profile, then ask me again to identify your skill gaps."""
+            
+            state["messages"].append({
+                "role": "assistant",
+                "content": response,
+                "metadata": {
+                    "action": "analysis_complete",
+                    "workflow_complete": True,
+                    "total_gaps": 0
+                }
+            })
+            state["workflow_complete"] = True
+            state["current_step"] = "complete"
+            return state
         
+        state["identified_gaps"] = analysis["gaps"]
         state["total_gaps"] = len(state["identified_gaps"])
         
         # Show first gap immediately
@@ -9,6 +9,24 @@ from .base_workflow import BaseWorkflow, BaseWorkflowState
 
 logger = logging.getLogger(__name__)
 
+REACHOUT_PROMPT = """Write a {reachout_type} outreach message from a job seeker.
+
+Recipient: {referrer_info}
+Role of interest: {job_info}
+What the user asked for: {request}
+
+Start with a "Subject:" line, keep the body under 180 words, and use [Name] and
+[Your name] placeholders. Return only the message."""
+
+REACHOUT_INTRO = "I've generated a personalized reachout message for you:\n\n---\n\n"
+
+REACHOUT_TIPS = """**Tips for sending:**
+1. Personalize the [Name] and any [bracketed] sections
+2. Keep the message concise and respectful
+3. Send during business hours (Tue-Thu, 9-11 AM works best)
+4. Follow up once after a week if no response
+5. Always attach your resume for referral requests"""
+
 
 class GenerateReachoutState(BaseWorkflowState):
     """State for reachout generation workflow"""
@@ -28,7 +46,7 @@ class GenerateReachoutWorkflow(BaseWorkflow):
         return """You are an expert at crafting personalized, professional outreach messages.
         Create compelling messages that are respectful, concise, and action-oriented."""
     
-    def _build_graph(self):
+    def _build_graph(self) -> StateGraph:
         """Build the reachout generation workflow graph"""
         workflow = StateGraph(GenerateReachoutState)
         
@@ -43,7 +61,7 @@ class GenerateReachoutWorkflow(BaseWorkflow):
         workflow.add_edge("analyze_context", "generate_message")
         workflow.add_edge("generate_message", END)
         
-        self.graph = workflow.compile()
+        return workflow
     
     async def _analyze_context(self, state: GenerateReachoutState) -> GenerateReachoutState:
         """Analyze the context for the reachout"""
@@ -64,10 +82,10 @@ class GenerateReachoutWorkflow(BaseWorkflow):
         return state
     
     async def _generate_message(self, state: GenerateReachoutState) -> GenerateReachoutState:
-        """Generate the personalized reachout message"""
+        """Generate the personalized reachout message, streaming it as it is written"""
         
         if state["reachout_type"] == "referral":
-            message = f"""Subject: Referral Request - {state.get('job_info', 'Position at Your Company')}
+            template = f"""Subject: Referral Request - {state.get('job_info', 'Position at Your Company')}
 
 Hi [Name],
 
@@ -82,7 +100,7 @@ I've attached my resume for your reference. Thank you for considering my request
 Best regards,
 [Your name]"""
         else:
-            message = """Subject: Connecting with a Fellow Tech Professional
+            template = """Subject: Connecting with a Fellow Tech Professional
 
 Hi [Name],
 
@@ -95,22 +113,24 @@ Looking forward to connecting!
 Best regards,
 [Your name]"""
         
+        prompt = REACHOUT_PROMPT.format(
+            reachout_type=state["reachout_type"],
+            referrer_info=state.get("referrer_info") or "Not specified",
+            job_info=state.get("job_info") or "Not specified",
+            request=state["messages"][0]["content"]
+        )
+        message = await self._stream_llm(
+            prompt,
+            fallback=template,
+            prefix=REACHOUT_INTRO,
+            max_tokens=600
+        )
+        suffix = f"\n\n---\n\n{REACHOUT_TIPS}"
+        self._emit_text(suffix)
+        
         state["generated_message"] = message
         
-        response = f"""I've generated a personalized reachout message for you:
-
----
-
-{message}
-
----
-
-**Tips for sending:**
-1. Personalize the [Name] and any [bracketed] sections
-2. Keep the message concise and respectful
-3. Send during business hours (Tue-Thu, 9-11 AM works best)
-4. Follow up once after a week if no response
-5. Always attach your resume for referral requests"""
+        response = f"{REACHOUT_INTRO}{message}{suffix}"
         
         state["messages"].append({
             "role": "assistant",
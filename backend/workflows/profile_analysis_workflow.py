@@ -4,7 +4,9 @@ Handles user profile analysis, strengths identification, and career insights
 """
 import logging
 from typing import Dict, Any
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
+from services.profile_analysis_service import get_profile_analysis
 from .base_workflow import BaseWorkflow, BaseWorkflowState
 
 logger = logging.getLogger(__name__)
@@ -13,6 +15,7 @@ logger = logging.getLogger(__name__)
 class ProfileAnalysisState(BaseWorkflowState):
     """State for profile analysis workflow"""
     profile_data: Dict[str, Any]
+    insights: str
     analysis_complete: bool
 
 
@@ -27,7 +30,7 @@ class ProfileAnalysisWorkflow(BaseWorkflow):
         Provide insights about their strengths, experience, and career trajectory.
         Be encouraging and constructive in your analysis."""
     
-    def _build_graph(self):
+    def _build_graph(self) -> StateGraph:
         """Build the profile analysis workflow graph"""
         workflow = StateGraph(ProfileAnalysisState)
         
@@ -42,43 +45,34 @@ class ProfileAnalysisWorkflow(BaseWorkflow):
         workflow.add_edge("analyze_profile", "generate_insights")
         workflow.add_edge("generate_insights", END)
         
-        self.graph = workflow.compile()
+        return workflow
     
-    async def _analyze_profile(self, state: ProfileAnalysisState) -> ProfileAnalysisState:
-        """Analyze the user's profile - simplified for now"""
+    async def _analyze_profile(self, state: ProfileAnalysisState, config: RunnableConfig) -> ProfileAnalysisState:
+        """Load the user's profile and compute (or reuse cached) analysis"""
         logger.info(f"Analyzing profile for user {state['user_id']}")
         
-        # FAKE LOGIC: Simulate profile retrieval
-        state["profile_data"] = {
-            "skills": ["Python", "React", "Node.js"],
-            "experience_years": 5,
-            "education": "BS Computer Science",
-            "strengths": ["Full-stack development", "Problem solving", "Team collaboration"]
-        }
+        analysis = await get_profile_analysis(self._get_db_session(config), state["user_id"])
+        
+        if analysis:
+            state["profile_data"] = analysis["features"]
+            state["insights"] = analysis["insights"]
+        else:
+            state["profile_data"] = {}
+            state["insights"] = ""
         
         state["current_step"] = "analyzing"
         return state
     
     async def _generate_insights(self, state: ProfileAnalysisState) -> ProfileAnalysisState:
-        """Generate insights about the profile"""
+        """Present insights about the profile"""
         profile = state["profile_data"]
         
-        # FAKE LOGIC: Generate simple insights
-        insights = f"""Based on your profile analysis:
-
-**Key Strengths:**
-- Strong technical foundation with {profile['experience_years']} years of experience
-- Versatile skill set covering {', '.join(profile['skills'][:2])} and more
-- {profile['education']} provides solid theoretical background
+        if profile:
+            insights = state["insights"]
+        else:
+            insights = """I couldn't find a profile for you yet.
 
-**Career Highlights:**
-- Your combination of {profile['skills'][0]} and {profile['skills'][1]} is highly sought after
-- {profile['strengths'][0]} expertise positions you well for senior roles
-
-**Growth Opportunities:**
-- Consider expanding into cloud technologies or DevOps
-- Leadership and mentoring skills could enhance your career trajectory
-- Certifications in your core technologies could validate your expertise"""
+Upload your resume and I'll build your profile, then ask me again for a full analysis of your strengths, highlights and growth opportunities."""
         
         state["messages"].append({
             "role": "assistant",
@@ -93,4 +87,4 @@ class ProfileAnalysisWorkflow(BaseWorkflow):
         state["analysis_complete"] = True
         state["current_step"] = "complete"
         
-        return state
\ No newline at end of file
+        return state
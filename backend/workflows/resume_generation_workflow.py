@@ -3,101 +3,123 @@ Resume Generation Workflow
 Handles resume creation and optimization
 """
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
+from models import ResumeRead
+from services import NotFoundException
+from services.resume_generation_service import generate_resume, render_section
 from .base_workflow import BaseWorkflow, BaseWorkflowState
 
 logger = logging.getLogger(__name__)
 
+RESUME_NEXT_STEPS = """**Next Steps:**
+1. Review and customize the content
+2. Add specific metrics and achievements
+3. Tailor keywords to match job descriptions
+4. Format for ATS compatibility"""
+
 
 class ResumeGenerationState(BaseWorkflowState):
     """State for resume generation workflow"""
+    job_posting_id: Optional[int]
     target_role: str
     resume_sections: Dict[str, Any]
 
 
 class ResumeGenerationWorkflow(BaseWorkflow):
     """Workflow for generating tailored resumes"""
-    
+
     def get_workflow_name(self) -> str:
         return "resume_generation"
-    
+
     def get_system_prompt(self) -> str:
         return """You are a professional resume writer creating tailored resumes.
         Focus on highlighting relevant experience and achievements."""
-    
-    def _build_graph(self):
+
+    def _build_graph(self) -> StateGraph:
         """Build the resume generation workflow graph"""
         workflow = StateGraph(ResumeGenerationState)
-        
+
         # Add nodes
         workflow.add_node("gather_info", self._gather_info)
         workflow.add_node("generate_resume", self._generate_resume)
-        
+
         # Set entry point
         workflow.set_entry_point("gather_info")
-        
+
         # Add edges
         workflow.add_edge("gather_info", "generate_resume")
         workflow.add_edge("generate_resume", END)
-        
-        self.graph = workflow.compile()
-    
+
+        return workflow
+
+    def _create_initial_state(self, user_message: str, user_id: int, session=None, context: Dict = None) -> Dict[str, Any]:
+        """Create initial state with resume generation specific fields"""
+        state = super()._create_initial_state(user_message, user_id, session, context)
+        state.update({
+            "job_posting_id": context.get("job_posting_id") if context else None,
+            "target_role": "",
+            "resume_sections": {}
+        })
+        return state
+
     async def _gather_info(self, state: ResumeGenerationState) -> ResumeGenerationState:
         """Gather information needed for resume"""
-        logger.info(f"Gathering info for resume generation - user {state['user_id']}")
-        
-        # FAKE LOGIC: Simulate gathering user info
-        state["target_role"] = "Software Engineer"
-        state["resume_sections"] = {
-            "summary": "Experienced software engineer with 5 years in full-stack development",
-            "skills": ["Python", "JavaScript", "React", "Node.js", "PostgreSQL"],
-            "experience": [
-                {
-                    "title": "Senior Developer",
-                    "company": "Tech Corp",
-                    "duration": "2021-Present",
-                    "achievements": ["Led team of 5", "Improved performance by 40%"]
-                }
-            ]
-        }
-        
+        logger.info(f"Gathering info for resume generation - user {state['user_id']}, job {state['job_posting_id']}")
         state["current_step"] = "info_gathered"
         return state
-    
-    async def _generate_resume(self, state: ResumeGenerationState) -> ResumeGenerationState:
-        """Generate the resume content"""
-        sections = state["resume_sections"]
-        
-        response = f"""I've created a tailored resume for the {state['target_role']} position:
 
-**PROFESSIONAL SUMMARY**
-{sections['summary']}
+    async def _generate_resume(self, state: ResumeGenerationState, config: RunnableConfig) -> ResumeGenerationState:
+        """Generate the resume section by section, streaming each section as it is ready"""
+        intro_sent = False
 
-**TECHNICAL SKILLS**
-{', '.join(sections['skills'])}
+        def on_section(section, content, cached):
+            nonlocal intro_sent
+            if not intro_sent:
+                self._emit_text("I've created a tailored resume for you:\n\n")
+                intro_sent = True
+            self._emit_text(render_section(section, content))
 
-**EXPERIENCE**
-{sections['experience'][0]['title']} | {sections['experience'][0]['company']}
-{sections['experience'][0]['duration']}
-• {chr(10).join('• ' + ach for ach in sections['experience'][0]['achievements'])}
+        try:
+            result = await generate_resume(
+                self._get_db_session(config), state["user_id"], state["job_posting_id"], on_section=on_section
+            )
+        except NotFoundException as e:
+            if e.error_code == "PROFILE_NOT_FOUND":
+                response = """I couldn't find a profile for you yet.
+
+Upload your resume and I'll build your profile, then ask me again to generate a tailored resume."""
+            else:
+                response = """I couldn't find that job posting.
+
+Save the job posting you're interested in first, then ask me again to tailor a resume to it."""
+            state["messages"].append({"role": "assistant", "content": response})
+            state["workflow_complete"] = True
+            state["current_step"] = "complete"
+            return state
+
+        resume = ResumeRead.model_validate(result["resume"]).model_dump(mode="json")
+        state["job_posting_id"] = result["job_posting_id"]
+        state["target_role"] = result["target_role"] or "General resume"
+        state["resume_sections"] = result["sections"]
+
+        self._emit_text(RESUME_NEXT_STEPS)
+        response = f"I've created a tailored resume for you:\n\n{result['markdown']}{RESUME_NEXT_STEPS}"
 
-**Next Steps:**
-1. Review and customize the content
-2. Add specific metrics and achievements
-3. Tailor keywords to match job descriptions
-4. Format for ATS compatibility"""
-        
         state["messages"].append({
             "role": "assistant",
             "content": response,
             "metadata": {
-                "resume_data": sections,
-                "target_role": state["target_role"]
+                "resume_id": resume.get("id"),
+                "version": result["version"],
+                "resume_data": resume,
+                "target_role": state["target_role"],
+                "sections": result["sections"]
             }
         })
-        
+
         state["workflow_complete"] = True
         state["current_step"] = "complete"
-        
-        return state
\ No newline at end of file
+
+        return state
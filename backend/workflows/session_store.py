@@ -0,0 +1,180 @@
+"""
+Workflow Session Store
+Bounded, TTL-evicting storage for in-flight workflow sessions with a per-user index
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[int, str]
+
+
+class _SessionEntry:
+    """A stored workflow state plus bookkeeping for eviction and accounting"""
+
+    __slots__ = ("state", "size_bytes", "last_access")
+
+    def __init__(self, state: Dict[str, Any], size_bytes: int, last_access: float):
+        self.state = state
+        self.size_bytes = size_bytes
+        self.last_access = last_access
+
+
+class WorkflowSessionStore:
+    """
+    In-process store for workflow sessions keyed by (user_id, workflow_name).
+
+    - Entries idle for longer than ``ttl_seconds`` are expired.
+    - At most ``max_sessions`` entries are kept; the least recently used is evicted.
+    - Only the last ``max_messages`` messages of a session are retained.
+    - A per-user index makes clearing all sessions for a user O(sessions of that user).
+    """
+
+    def __init__(self, ttl_seconds: float = 1800, max_sessions: int = 10000, max_messages: int = 50):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+
+        # Ordered by last access: oldest first, so expiry and LRU eviction pop from the front
+        self._entries: "OrderedDict[SessionKey, _SessionEntry]" = OrderedDict()
+        self._user_index: Dict[int, Set[str]] = {}
+        self._total_bytes = 0
+
+    # ----- Gauges -----
+
+    @property
+    def session_count(self) -> int:
+        """Number of live sessions"""
+        return len(self._entries)
+
+    @property
+    def session_bytes(self) -> int:
+        """Approximate serialized size of all live sessions"""
+        return self._total_bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of store gauges for health/metrics endpoints"""
+        self._expire()
+        return {
+            "live_sessions": self.session_count,
+            "live_session_bytes": self.session_bytes,
+            "users_with_sessions": len(self._user_index),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    # ----- Session operations -----
+
+    def get(self, user_id: int, workflow_name: str) -> Optional[Dict[str, Any]]:
+        """Get a session's state, refreshing its idle timer. Returns None if missing or expired."""
+        key = (user_id, workflow_name)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        now = time.monotonic()
+        if now - entry.last_access > self.ttl_seconds:
+            logger.info(f"Workflow session {key} expired after {self.ttl_seconds}s idle")
+            self._remove(key)
+            return None
+
+        entry.last_access = now
+        self._entries.move_to_end(key)
+        return entry.state
+
+    def put(self, user_id: int, workflow_name: str, state: Dict[str, Any]) -> None:
+        """Store or replace a session's state"""
+        key = (user_id, workflow_name)
+        self._trim_messages(state)
+        size_bytes = self._estimate_size(state)
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = _SessionEntry(state, size_bytes, time.monotonic())
+        self._user_index.setdefault(user_id, set()).add(workflow_name)
+        self._total_bytes += size_bytes
+
+        self._expire()
+        while len(self._entries) > self.max_sessions:
+            evicted_key, _ = next(iter(self._entries.items()))
+            logger.info(f"Evicting least recently used workflow session {evicted_key}")
+            self._remove(evicted_key)
+
+    def delete(self, user_id: int, workflow_name: str) -> bool:
+        """Delete a single session. Returns True if it existed."""
+        key = (user_id, workflow_name)
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        return True
+
+    def clear_user(self, user_id: int, keep: Optional[str] = None) -> List[str]:
+        """
+        Clear all sessions for a user
+
+        Args:
+            user_id: ID of the user
+            keep: Optional workflow name whose session should be preserved
+
+        Returns:
+            Names of the workflows whose sessions were cleared
+        """
+        workflow_names = self._user_index.get(user_id)
+        if not workflow_names:
+            return []
+
+        cleared = [name for name in workflow_names if name != keep]
+        for name in cleared:
+            self._remove((user_id, name))
+        return cleared
+
+    def user_workflows(self, user_id: int) -> List[str]:
+        """Names of the workflows the user currently has sessions for"""
+        return list(self._user_index.get(user_id, ()))
+
+    def clear(self) -> None:
+        """Remove every session"""
+        self._entries.clear()
+        self._user_index.clear()
+        self._total_bytes = 0
+
+    # ----- Internals -----
+
+    def _remove(self, key: SessionKey) -> None:
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.size_bytes
+
+        user_id, workflow_name = key
+        names = self._user_index.get(user_id)
+        if names is not None:
+            names.discard(workflow_name)
+            if not names:
+                del self._user_index[user_id]
+
+    def _expire(self) -> None:
+        """Drop idle sessions from the front of the LRU order"""
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.last_access > cutoff:
+                break
+            logger.info(f"Workflow session {key} expired after {self.ttl_seconds}s idle")
+            self._remove(key)
+
+    def _trim_messages(self, state: Dict[str, Any]) -> None:
+        messages = state.get("messages")
+        if isinstance(messages, list) and len(messages) > self.max_messages:
+            del messages[:-self.max_messages]
+
+    @staticmethod
+    def _estimate_size(state: Dict[str, Any]) -> int:
+        """Approximate memory footprint as the size of the JSON-serialized state"""
+        try:
+            return len(json.dumps(state, default=str))
+        except (TypeError, ValueError):
+            return 0
@@ -53,6 +53,7 @@ class WorkflowVisualizer:
    "What's 2+2?"             • get_user_profile()
    "Hello"                   • get_user_resumes()
                             • identify_gaps_per_job()
+                            • rank_job_postings()
                             
 🧑 PROFILE_ANALYSIS ─────► ProfileAnalysisWorkflow
    "Tell me about my profile" • Analyze strengths
@@ -180,13 +181,20 @@ class WorkflowVisualizer:
         print("="*80)
         
         session_info = """
-🔑 Session Keys: "user_{user_id}_{workflow_name}"
-   Example: "user_123_gap_analysis_general"
+🔑 Session Keys: (user_id, workflow_name)
+   Example: (123, "gap_analysis_profile")
 
-🗃️  Storage: BaseWorkflow._global_workflow_sessions (class-level dict)
+🗃️  Storage: BaseWorkflow.get_session_store() (WorkflowSessionStore)
    • Shared across all workflow instances
    • Persists between HTTP requests
-   • Cleared when workflow_complete = True
+   • Idle sessions expire after WORKFLOW_SESSION_TTL_SECONDS
+   • LRU-evicted beyond WORKFLOW_SESSION_MAX_SESSIONS
+   • Per-user index: clearing a user's sessions is O(1)
+
+💽 Durable state: LangGraph checkpointer (WORKFLOW_CHECKPOINTER)
+   • SQLite locally, Postgres in production
+   • Thread ID per user + workflow: "user_{user_id}_{workflow_name}"
+   • Multi-turn workflows pause on interrupts and resume after restarts
 
 📊 Session State Structure:
    {
@@ -203,11 +211,10 @@ class WorkflowVisualizer:
    }
 
 🔄 Flow:
-   1. New message → Check existing session
-   2. If session exists + not complete → Continue workflow
-   3. If no session → Start new workflow
-   4. Update session state after each step
-   5. Session deleted when workflow_complete = true
+   1. New message → Check existing session (store, then checkpointer)
+   2. If thread is paused on an interrupt → Resume with the message
+   3. Otherwise → Start new workflow on a clean thread
+   4. Checkpoint state after each step
         """
         
         print(session_info)
@@ -296,27 +296,63 @@ class ApiClient {
   }
 
   /**
-   * Upload file to S3
+   * Upload file straight to S3 with a presigned POST, then confirm it with the API
    */
   async uploadFile(file: File): Promise<{
     success: boolean
     file_url: string
     s3_key: string
     bucket: string
-    original_name: string
     uploaded_name: string
     content_type: string
     file_size: number
     folder: string
   }> {
+    const headers: Record<string, string> = {
+      'Content-Type': 'application/json',
+    }
+
+    if (this.token) {
+      headers['Authorization'] = `Bearer ${this.token}`
+    }
+
+    const presignResponse = await fetch(`${this.baseUrl}/upload/presign`, {
+      method: 'POST',
+      headers,
+      body: JSON.stringify({
+        filename: file.name,
+        content_type: file.type || undefined,
+        file_size: file.size,
+      }),
+    })
+
+    if (!presignResponse.ok) {
+      const errorData = await presignResponse.json().catch(() => ({}))
+      throw new Error(errorData.detail || `Upload failed with status ${presignResponse.status}`)
+    }
+
+    const presigned: { url: string; fields: Record<string, string>; s3_key: string } = await presignResponse.json()
+
+    // The policy fields must come before the file in the form
     const formData = new FormData()
+    Object.entries(presigned.fields).forEach(([name, value]) => formData.append(name, value))
     formData.append('file', file)
 
-    const response = await fetch(`${this.baseUrl}/upload`, {
+    const uploadResponse = await fetch(presigned.url, {
       method: 'POST',
       body: formData,
     })
 
+    if (!uploadResponse.ok) {
+      throw new Error(`Upload to storage failed with status ${uploadResponse.status}`)
+    }
+
+    const response = await fetch(`${this.baseUrl}/upload/complete`, {
+      method: 'POST',
+      headers,
+      body: JSON.stringify({ s3_key: presigned.s3_key }),
+    })
+
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({}))
       throw new Error(errorData.detail || `Upload failed with status ${response.status}`)
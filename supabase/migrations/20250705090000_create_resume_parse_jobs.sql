@@ -0,0 +1,39 @@
+-- RESUME PARSE JOBS
+-- Background resume parsing: one row per uploaded PDF, updated by the API's parse
+-- workers as the job moves through queued -> running -> succeeded/failed/cancelled
+
+CREATE TABLE resume_parse_jobs (
+    id UUID PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+
+    filename TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+
+    -- Latest progress reported by the parser
+    step TEXT,
+    progress INTEGER DEFAULT 0,
+    message TEXT,
+
+    -- Outcome: saved profile/resume on success, error and partial profile on failure
+    result JSONB,
+    error TEXT,
+
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX idx_resume_parse_jobs_user_id ON resume_parse_jobs(user_id);
+CREATE INDEX idx_resume_parse_jobs_status ON resume_parse_jobs(status);
+
+CREATE TRIGGER update_resume_parse_jobs_updated_at 
+    BEFORE UPDATE ON resume_parse_jobs 
+    FOR EACH ROW 
+    EXECUTE FUNCTION update_updated_at_column();
+
+COMMENT ON TABLE resume_parse_jobs IS 'Background resume parse jobs submitted through /parse-resume-jobs';
+COMMENT ON COLUMN resume_parse_jobs.status IS 'queued, running, succeeded, failed or cancelled';
+
+ALTER TABLE resume_parse_jobs ENABLE ROW LEVEL SECURITY;
+GRANT ALL ON resume_parse_jobs TO authenticated;
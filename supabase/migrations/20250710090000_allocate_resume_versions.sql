@@ -0,0 +1,31 @@
+-- RESUME VERSIONS
+-- Generated resumes are numbered per (profile, job posting). Reading the latest
+-- version and inserting latest + 1 from the API raced when two generations for
+-- the same posting ran at once, so the number is now allocated by the insert.
+
+-- Inserts with a NULL version get the next version for their profile and job
+-- posting. The advisory lock is held until the inserting transaction commits,
+-- so concurrent inserts for the same key are numbered one after the other.
+CREATE OR REPLACE FUNCTION assign_resume_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.version IS NULL THEN
+        PERFORM pg_advisory_xact_lock(NEW.profile_id, COALESCE(NEW.job_posting_id, 0));
+        SELECT COALESCE(MAX(version), 0) + 1 INTO NEW.version
+        FROM resumes_v2
+        WHERE profile_id = NEW.profile_id
+          AND job_posting_id IS NOT DISTINCT FROM NEW.job_posting_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER assign_resumes_v2_version
+    BEFORE INSERT ON resumes_v2
+    FOR EACH ROW
+    EXECUTE FUNCTION assign_resume_version();
+
+CREATE INDEX IF NOT EXISTS idx_resumes_v2_profile_posting_version
+    ON resumes_v2(profile_id, job_posting_id, version DESC);
+
+COMMENT ON COLUMN resumes_v2.version IS 'Per profile and job posting; allocated on insert when NULL';